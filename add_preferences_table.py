@@ -1,6 +1,8 @@
 from app import app, db
-from database.db import StudentPreference
+from database.migrations import run_migrations
 
+# Kept for existing setup instructions; student_preferences is now created by
+# the versioned migrations in database/migrations.py
 with app.app_context():
-    db.create_all()
+    run_migrations(db.engine)
     print("Student preferences table created successfully!")
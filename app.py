@@ -1,63 +1,42 @@
-from flask import Flask, render_template, request, redirect, session, url_for, flash, jsonify
-from flask_socketio import SocketIO, emit
-from database.db import db, User, StudySession, TAProfile, Match, Note, LiveSession, StudentPreference
+from flask import Flask, render_template, request, redirect, session, url_for, flash, jsonify, Response
+from flask_socketio import SocketIO, emit, join_room, leave_room, close_room
+from database.db import db, User, StudySession, TAProfile, Match, Note, LiveSession, SwipePass
+from database.config import configure_database
+from database.migrations import run_migrations
 from auth.utils import hash_password, verify_password, login_required, role_required
-from services.real_speech_service import speech_service
+from services.real_speech_service import speech_service, live_session_room
+from services.study_stats_service import study_stats_service
+from services.note_writer import note_write_queue
+from services.swipe_feed_service import swipe_feed_service
+from services.ai_matching_service import ai_matching_service
+from services.subject_index import subject_index
+from services.preference_service import preference_service
+from services.admin_metrics import admin_metrics_service
+from services.user_directory import user_directory
+from services.note_search import note_search
+from services.note_listing import note_listing
+from services.note_cache import note_cache, note_etag
+from services.timetable_scheduler import timetable_scheduler, TimetableError
+from services.deadlines import load_deadlines, parse_datetime, sample_deadlines
+from services.study_planner import study_planner
 from sqlalchemy import text
 import os
 from datetime import datetime, timedelta
 import json
+from werkzeug.http import is_resource_modified
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'supersecretkey')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///learning_companion.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Initialize SocketIO. With more than one worker, SOCKETIO_MESSAGE_QUEUE
+# (e.g. redis://localhost:6379/0) relays room broadcasts between them
+socketio = SocketIO(app, cors_allowed_origins="*", message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'))
 #main
-db.init_app(app)
-
-# Create tables
-with app.app_context():
-    db.create_all()
-    # Create additional tables from schema
-    try:
-        db.session.execute(text("""
-            CREATE TABLE IF NOT EXISTS deadlines (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title VARCHAR(200) NOT NULL,
-                subject VARCHAR(100) NOT NULL,
-                due_date DATETIME NOT NULL,
-                priority VARCHAR(20) DEFAULT 'medium',
-                study_hours INTEGER DEFAULT 5,
-                description TEXT,
-                completed BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """))
-        
-        db.session.execute(text("""
-            CREATE TABLE IF NOT EXISTS timetable_entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title VARCHAR(200) NOT NULL,
-                start_time DATETIME NOT NULL,
-                end_time DATETIME NOT NULL,
-                subject VARCHAR(100),
-                description TEXT,
-                duration VARCHAR(50),
-                priority VARCHAR(20) DEFAULT 'medium',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """))
-        
-        db.session.commit()
-    except Exception as e:
-        print(f"Tables already exist or error: {e}")
+# DATABASE_URL selects the backend (SQLite by default, Postgres supported)
+configure_database(app, db)
+note_write_queue.init_app(app)
+speech_service.init_socketio(socketio, interim_window=int(os.environ.get('INTERIM_COALESCE_WINDOW_MS', 250)) / 1000)
 
 # ==================== LANDING & ENTRY ====================
 @app.route("/")
@@ -124,17 +103,16 @@ def logout():
 @role_required("student")
 def student_dashboard():
     user_id = session["user_id"]
-    sessions = StudySession.query.filter_by(user_id=user_id).all()
+    totals = study_stats_service.get_dashboard_stats(user_id)
     
-    total_hours = sum(s.completed_duration for s in sessions) / 3600
-    today_sessions = [s for s in sessions if s.created_at.date() == datetime.now().date()]
-    daily_focus = sum(s.completed_duration for s in today_sessions) / 3600
+    total_hours = totals["total_seconds"] / 3600
+    daily_focus = totals["today_seconds"] / 3600
     
     stats = {
         "total_hours": round(total_hours, 1),
         "daily_focus": f"{daily_focus:.1f}h",
         "active_streak": "5 days",
-        "last_timer": sessions[-1].timer_type if sessions else "None",
+        "last_timer": totals["last_timer"] or "None",
         "match_status": "2 active matches"
     }
     
@@ -168,6 +146,8 @@ def start_timer():
         duration=data["duration"]
     )
     db.session.add(session_obj)
+    db.session.flush()
+    study_stats_service.record_session_started(session_obj)
     db.session.commit()
     return jsonify({"session_id": session_obj.id})
 
@@ -177,53 +157,81 @@ def end_timer():
     data = request.json
     session_obj = StudySession.query.get(data["session_id"])
     if session_obj:
+        previous_completed = session_obj.completed_duration
         session_obj.completed_duration = data["completed_duration"]
         session_obj.interruptions = data.get("interruptions", 0)
         session_obj.focus_score = data.get("focus_score", 0.0)
+        study_stats_service.record_session_completed(session_obj, previous_completed)
         db.session.commit()
     return jsonify({"success": True})
 
+@app.route("/student/preferences", methods=["GET", "POST"])
+@login_required
+@role_required("student")
+def student_preferences():
+    if request.method == "POST":
+        subjects = request.form.getlist("subjects")
+        preference_service.save(
+            session["user_id"],
+            subjects,
+            {subject: request.form.get(f"confidence_{subject}", 3) for subject in subjects},
+            deadlines=request.form.get("deadlines"),
+            learning_style=request.form.get("learning_style")
+        )
+        db.session.commit()
+        return redirect(url_for("student_dashboard"))
+    return render_template("student/preferences.html", preferences=preference_service.get(session["user_id"]))
+
 @app.route("/student/swipe")
 @login_required
 @role_required("student")
 def swipe():
-    # Create sample TA profiles including Sarah Chen
-    ta_profiles = [
-        {
-            "id": 1,
-            "name": "Sarah Chen",
-            "subjects": "Mathematics, Physics",
-            "bio": "PhD in Mathematics with 5 years teaching experience. Specializes in calculus and linear algebra.",
-            "rating": 4.9
-        },
-        {
-            "id": 2,
-            "name": "Michael Rodriguez",
-            "subjects": "Computer Science",
-            "bio": "Software engineer turned educator. Expert in Python, algorithms, and data structures.",
-            "rating": 4.7
-        },
-        {
-            "id": 3,
-            "name": "Emily Watson",
-            "subjects": "Chemistry, Biology",
-            "bio": "Research scientist with passion for teaching. Makes complex concepts simple.",
-            "rating": 4.8
-        }
-    ]
-    return render_template("student/swipe.html", ta_profiles=ta_profiles)
+    preferences = preference_service.get(session["user_id"])
+    feed = swipe_feed_service.page(session["user_id"], preferences)
+    return render_template("student/swipe.html", ta_profiles=feed["tas"], next_cursor=feed["next_cursor"])
+
+@app.route("/api/swipe/feed")
+@login_required
+@role_required("student")
+def swipe_feed():
+    preferences = preference_service.get(session["user_id"])
+    return jsonify(swipe_feed_service.page(
+        session["user_id"], preferences,
+        cursor=request.args.get("cursor"),
+        limit=request.args.get("limit", type=int)
+    ))
+
+@app.route("/api/student/recommendations")
+@login_required
+@role_required("student")
+def student_recommendations():
+    # Never waits on the model: the last cached ranking is returned and a
+    # background rerank refreshes it when preferences or TAs have changed
+    preferences = preference_service.get(session["user_id"])
+    candidates = ai_matching_service.candidate_tas(preferences)
+    limit = request.args.get("limit", 10, type=int)
+    return jsonify(ai_matching_service.get_ta_recommendations(preferences, candidates)[:limit])
 
 @app.route("/api/swipe", methods=["POST"])
 @login_required
 def handle_swipe():
     data = request.json
-    match = Match(
-        student_id=session["user_id"],
-        ta_id=data["ta_id"],
-        status="pending"
-    )
-    db.session.add(match)
-    db.session.commit()
+    student_id = session["user_id"]
+    if data.get("direction") == "left":
+        # Passes only exist to keep the TA out of this student's feed
+        if not db.session.get(SwipePass, (student_id, data["ta_id"])):
+            db.session.add(SwipePass(student_id=student_id, ta_id=data["ta_id"]))
+            db.session.commit()
+        return jsonify({"success": True})
+
+    if not Match.query.filter_by(student_id=student_id, ta_id=data["ta_id"]).first():
+        match = Match(
+            student_id=student_id,
+            ta_id=data["ta_id"],
+            status="pending"
+        )
+        db.session.add(match)
+        db.session.commit()
     return jsonify({"success": True})
 
 @app.route("/student/matches")
@@ -244,17 +252,66 @@ def live_class():
     active_sessions = LiveSession.query.filter_by(is_active=True).all()
     return render_template("student/live_class.html", sessions=active_sessions)
 
+@app.route("/api/notes/search")
+@login_required
+def search_notes():
+    try:
+        results = note_search.search(
+            request.args.get("q", ""),
+            subject=request.args.get("subject"),
+            ta_id=request.args.get("ta_id", type=int),
+            limit=request.args.get("limit", 20),
+            # ?recent=1 ranks only the newest matches, for speed
+            recent=request.args.get("recent", type=int) == 1
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    return jsonify(results)
+
+@app.route("/api/notes")
+@login_required
+def list_notes():
+    try:
+        page = note_listing.page(
+            ta_id=request.args.get("ta_id", type=int),
+            subject=request.args.get("subject"),
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit", 24)
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+    return jsonify(page)
+
 @app.route("/api/note/<int:note_id>")
 @login_required
 def get_note(note_id):
-    note = Note.query.get_or_404(note_id)
-    return jsonify({
-        "id": note.id,
-        "title": note.title,
-        "content": note.content,
-        "subject": note.subject,
-        "created_at": note.created_at.strftime('%B %d, %Y')
-    })
+    # The body is only read when the client's copy is out of date and the
+    # serialized note is not cached for the current ETag
+    note = Note.query.options(db.load_only(
+        Note.id, Note.title, Note.subject, Note.created_at, Note.updated_at, Note.content_hash
+    )).get_or_404(note_id)
+    etag = note_etag(note)
+    last_modified = note.updated_at or note.created_at
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        body = note_cache.get(note.id, etag)
+        if body is None:
+            body = json.dumps({
+                "id": note.id,
+                "title": note.title,
+                "content": note.content,
+                "subject": note.subject,
+                "created_at": note.created_at.strftime('%B %d, %Y')
+            })
+            note_cache.put(note.id, etag, body)
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Browsers keep the note but check with us before reusing it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 @app.route("/api/save-live-notes", methods=["POST"])
 @login_required
@@ -263,15 +320,13 @@ def save_live_notes():
     notes_content = data.get('notes', '')
     
     if notes_content:
-        note = Note(
+        queued = note_write_queue.enqueue(
             ta_id=session["user_id"],
             title=f"Live Notes - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
             content=notes_content,
             subject="Live Speech Notes"
         )
-        db.session.add(note)
-        db.session.commit()
-        return jsonify({"success": True})
+        return jsonify({"success": queued})
     
     return jsonify({"success": False})
 
@@ -279,38 +334,20 @@ def save_live_notes():
 @login_required
 @role_required("student")
 def student_notes():
-    try:
-        notes = Note.query.all()
-    except:
-        notes = []
-    return render_template("student/notes.html", notes=notes)
+    # Cards are fetched page by page from /api/notes
+    return render_template("student/notes.html", total_notes=note_listing.count())
 
 @app.route("/student/stats")
 @login_required
 @role_required("student")
 def student_stats():
     user_id = session["user_id"]
-    sessions = StudySession.query.filter_by(user_id=user_id).all()
     
     # Timer usage stats
-    timer_stats = []
-    timer_types = {}
-    for s in sessions:
-        if s.timer_type not in timer_types:
-            timer_types[s.timer_type] = {'total_time': 0, 'count': 0}
-        timer_types[s.timer_type]['total_time'] += s.completed_duration / 60
-        timer_types[s.timer_type]['count'] += 1
-    
-    for timer_type, data in timer_types.items():
-        timer_stats.append([timer_type, int(data['total_time']), data['count']])
+    timer_stats = study_stats_service.get_timer_stats(user_id)
     
     # Daily stats (last 7 days)
-    daily_stats = []
-    for i in range(7):
-        date = datetime.now() - timedelta(days=i)
-        day_sessions = [s for s in sessions if s.created_at.date() == date.date()]
-        total_minutes = sum(s.completed_duration for s in day_sessions) / 60
-        daily_stats.append([date.strftime('%a'), int(total_minutes)])
+    daily_stats = study_stats_service.get_daily_stats(user_id, days=7)
     
     return render_template("student/stats_fixed.html", timer_stats=timer_stats, daily_stats=daily_stats)
 
@@ -365,12 +402,21 @@ def ta_live_class():
     sessions = LiveSession.query.filter_by(ta_id=session["user_id"]).all()
     return render_template("ta/live_class.html", sessions=sessions)
 
+@app.route("/ta/live-class/<int:live_session_id>")
+@login_required
+@role_required("ta")
+def ta_live_broadcast(live_session_id):
+    live_session = LiveSession.query.get_or_404(live_session_id)
+    if live_session.ta_id != session["user_id"]:
+        return redirect(url_for("ta_live_class"))
+    return render_template("student/live_notes_simple.html", live_session=live_session)
+
 @app.route("/ta/notes")
 @login_required
 @role_required("ta")
 def ta_notes():
-    notes = Note.query.filter_by(ta_id=session["user_id"]).all()
-    return render_template("ta/notes.html", notes=notes)
+    # Cards are fetched page by page from /api/notes
+    return render_template("ta/notes.html", total_notes=note_listing.count(ta_id=session["user_id"]))
 
 @app.route("/ta/notes/create", methods=["POST"])
 @login_required
@@ -391,39 +437,62 @@ def create_note():
 @login_required
 @role_required("admin")
 def admin_dashboard():
-    total_users = User.query.count()
-    active_sessions = StudySession.query.filter(
-        StudySession.created_at >= datetime.now() - timedelta(hours=1)
-    ).count()
-    total_study_hours = db.session.query(db.func.sum(StudySession.completed_duration)).scalar() or 0
-    
-    admin_stats = {
-        "total_users": total_users,
-        "active_sessions": active_sessions,
-        "study_hours_logged": round(total_study_hours / 3600, 1),
-        "total_matches": Match.query.count()
-    }
-    return render_template("admin/dashboard.html", admin_stats=admin_stats)
+    return render_template("admin/dashboard.html", admin_stats=admin_metrics_service.metrics())
 
 @app.route("/admin/users")
 @login_required
 @role_required("admin")
 def admin_users():
-    users = User.query.all()
-    return render_template("admin/users.html", users=users)
+    # Rows are fetched page by page from /api/admin/users
+    return render_template("admin/users.html", metrics=admin_metrics_service.metrics())
+
+@app.route("/api/admin/users")
+@login_required
+@role_required("admin")
+def admin_users_page():
+    try:
+        page = user_directory.page(
+            query=request.args.get("q"),
+            role=request.args.get("role"),
+            status=request.args.get("status"),
+            sort=request.args.get("sort", "newest"),
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit", 50)
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+    return jsonify(page)
+
+@app.route("/api/admin/realtime-stats")
+@login_required
+@role_required("admin")
+def admin_realtime_stats():
+    coalescer = speech_service.coalescer
+    return jsonify({
+        "live_transcriptions": len(speech_service.registry),
+        "transcript_updates": coalescer.stats if coalescer else {},
+        "note_writer": note_write_queue.stats,
+        "note_cache": note_cache.stats
+    })
+
+@app.route("/api/admin/matching-stats")
+@login_required
+@role_required("admin")
+def admin_matching_stats():
+    return jsonify(ai_matching_service.stats())
+
+@app.route("/api/admin/metrics")
+@login_required
+@role_required("admin")
+def admin_metrics():
+    return jsonify(admin_metrics_service.metrics())
 
 @app.route("/admin/analytics")
 @login_required
 @role_required("admin")
 def admin_analytics():
-    matches = Match.query.all()
-    match_stats = {
-        "total_matches": len(matches),
-        "pending": len([m for m in matches if m.status == "pending"]),
-        "accepted": len([m for m in matches if m.status == "accepted"]),
-        "rejected": len([m for m in matches if m.status == "rejected"])
-    }
-    return render_template("admin/analytics.html", match_stats=match_stats)
+    return render_template("admin/analytics.html", metrics=admin_metrics_service.metrics(),
+                           confidence_by_subject=preference_service.confidence_by_subject())
 
 # ==================== WEBSOCKET SPEECH RECOGNITION ====================
 @socketio.on('start_transcription')
@@ -435,10 +504,24 @@ def handle_start_transcription(data):
         emit('error', {'message': 'Not authenticated'})
         return
     
+    live_session_id = data.get('live_session_id')
+    if live_session_id:
+        live_session = LiveSession.query.get(live_session_id)
+        if not live_session or live_session.ta_id != user_id:
+            emit('error', {'message': 'Live session not found'})
+            return
+        live_session_id = live_session.id
+        live_session.is_active = True
+        live_session.start_time = live_session.start_time or datetime.now()
+        db.session.commit()
+        # The lecturer is a member of the room too, so their own page gets the
+        # same updates as every listener
+        join_room(live_session_room(live_session.id))
+    
     try:
-        success = speech_service.start_transcription(user_id, language)
+        success = speech_service.start_transcription(request.sid, user_id, language, live_session_id)
         if success:
-            emit('transcription_started', {'status': 'success'})
+            emit('transcription_started', {'status': 'success', 'live_session_id': live_session_id})
         else:
             emit('error', {'message': 'Failed to start transcription'})
     except Exception as e:
@@ -449,14 +532,17 @@ def handle_speech_result(data):
     try:
         transcript = data.get('transcript', '')
         is_final = data.get('is_final', True)
-        speech_service.process_speech_result(transcript, is_final)
+        speech_service.process_speech_result(request.sid, transcript, is_final)
     except Exception as e:
         emit('error', {'message': str(e)})
 
 @socketio.on('stop_transcription')
 def handle_stop_transcription():
     try:
-        ai_notes = speech_service.stop_transcription()
+        transcription = speech_service.registry.get(request.sid)
+        ai_notes = speech_service.stop_transcription(request.sid)
+        if transcription and transcription.live_session_id:
+            end_live_session(transcription.live_session_id)
         emit('transcription_stopped', {
             'status': 'success',
             'ai_notes': ai_notes
@@ -464,6 +550,49 @@ def handle_stop_transcription():
     except Exception as e:
         emit('error', {'message': str(e)})
 
+@socketio.on('disconnect')
+def handle_disconnect():
+    transcription = speech_service.registry.get(request.sid)
+    speech_service.disconnect(request.sid)
+    if transcription and transcription.live_session_id:
+        end_live_session(transcription.live_session_id)
+
+def end_live_session(live_session_id):
+    live_session = LiveSession.query.get(live_session_id)
+    if live_session:
+        live_session.is_active = False
+        db.session.commit()
+    room = live_session_room(live_session_id)
+    socketio.emit('live_session_ended', {'live_session_id': live_session_id}, to=room)
+    close_room(room)
+
+@socketio.on('join_live_session')
+def handle_join_live_session(data):
+    if not session.get('user_id'):
+        emit('error', {'message': 'Not authenticated'})
+        return
+
+    live_session = LiveSession.query.get(data.get('live_session_id'))
+    if not live_session or not live_session.is_active:
+        emit('error', {'message': 'Live session is not running'})
+        return
+
+    join_room(live_session_room(live_session.id))
+    # Late joiners catch up from the lecturer's buffer when it lives in this
+    # worker; otherwise they start from the next update
+    transcription = speech_service.registry.for_live_session(live_session.id)
+    transcript = [segment.text for segment in transcription.transcript.iter_segments()] if transcription else []
+    emit('joined_live_session', {
+        'live_session_id': live_session.id,
+        'title': live_session.title,
+        'instructor': live_session.ta.name,
+        'transcript': transcript
+    })
+
+@socketio.on('leave_live_session')
+def handle_leave_live_session(data):
+    leave_room(live_session_room(data.get('live_session_id')))
+
 @app.route("/student/live-notes")
 @login_required
 @role_required("student")
@@ -477,11 +606,7 @@ def student_timetable():
     user_id = session["user_id"]
     
     try:
-        # Get deadlines for the user
-        deadlines = db.session.execute(
-            text("SELECT * FROM deadlines WHERE user_id = :user_id ORDER BY due_date"),
-            {"user_id": user_id}
-        ).fetchall()
+        deadlines = load_deadlines(db.session.connection(), user_id)
         
         # Get timetable entries for the user
         timetable_entries = db.session.execute(
@@ -491,32 +616,16 @@ def student_timetable():
         
         # Add sample data if no deadlines exist
         if not deadlines:
-            from datetime import datetime, timedelta
-            now = datetime.now()
-            sample_deadlines = [
-                (1, user_id, "Machine Learning Assignment", "Computer Science", (now + timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S"), "high", 8, "Complete neural network project with documentation", False, now.strftime("%Y-%m-%d %H:%M:%S")),
-                (2, user_id, "Calculus Midterm Exam", "Mathematics", (now + timedelta(days=4)).strftime("%Y-%m-%d %H:%M:%S"), "critical", 12, "Study integration, differentiation, and limits", False, now.strftime("%Y-%m-%d %H:%M:%S")),
-                (3, user_id, "Physics Lab Report", "Physics", (now + timedelta(days=10)).strftime("%Y-%m-%d %H:%M:%S"), "medium", 6, "Analyze pendulum motion experiment results", False, now.strftime("%Y-%m-%d %H:%M:%S")),
-                (4, user_id, "English Essay", "English", (now + timedelta(days=12)).strftime("%Y-%m-%d %H:%M:%S"), "low", 4, "Write 1500-word essay on Shakespeare's themes", False, now.strftime("%Y-%m-%d %H:%M:%S")),
-                (5, user_id, "Chemistry Quiz", "Chemistry", (now + timedelta(days=6)).strftime("%Y-%m-%d %H:%M:%S"), "medium", 3, "Organic chemistry reactions and mechanisms", False, now.strftime("%Y-%m-%d %H:%M:%S"))
-            ]
-            deadlines = sample_deadlines
+            deadlines = sample_deadlines(user_id)
             
     except Exception as e:
         print(f"Database error: {e}")
         # Provide sample data on error
-        from datetime import datetime, timedelta
-        now = datetime.now()
-        sample_deadlines = [
-            (1, user_id, "Machine Learning Assignment", "Computer Science", (now + timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S"), "high", 8, "Complete neural network project with documentation", False, now.strftime("%Y-%m-%d %H:%M:%S")),
-            (2, user_id, "Calculus Midterm Exam", "Mathematics", (now + timedelta(days=4)).strftime("%Y-%m-%d %H:%M:%S"), "critical", 12, "Study integration, differentiation, and limits", False, now.strftime("%Y-%m-%d %H:%M:%S")),
-            (3, user_id, "Physics Lab Report", "Physics", (now + timedelta(days=10)).strftime("%Y-%m-%d %H:%M:%S"), "medium", 6, "Analyze pendulum motion experiment results", False, now.strftime("%Y-%m-%d %H:%M:%S"))
-        ]
-        deadlines = sample_deadlines
+        deadlines = sample_deadlines(user_id, count=3)
         timetable_entries = []
     
     return render_template("student/timetable_formatted.html", 
-                         deadlines=deadlines, 
+                         deadlines=[deadline.to_dict() for deadline in deadlines], 
                          timetable_entries=timetable_entries)
 
 @app.route("/calendar/add-deadline", methods=["POST"])
@@ -531,8 +640,8 @@ def add_deadline():
     description = request.form.get("description", "")
     
     try:
-        db.session.execute(
-            text("INSERT INTO deadlines (user_id, title, subject, due_date, priority, study_hours, description) VALUES (:user_id, :title, :subject, :due_date, :priority, :study_hours, :description)"),
+        deadline_id = db.session.execute(
+            text("INSERT INTO deadlines (user_id, title, subject, due_date, priority, study_hours, description) VALUES (:user_id, :title, :subject, :due_date, :priority, :study_hours, :description) RETURNING id"),
             {
                 "user_id": user_id,
                 "title": title,
@@ -542,9 +651,55 @@ def add_deadline():
                 "study_hours": study_hours,
                 "description": description
             }
-        )
+        ).scalar()
+        # Fit the new deadline into the saved plan and send back only the
+        # days that changed
+        plan = study_planner.replan(db.session.connection(), user_id, [deadline_id])
         db.session.commit()
-        return jsonify({"success": True})
+        return jsonify({"success": True, "deadline_id": deadline_id, "plan": plan})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route("/calendar/update-deadline/<int:deadline_id>", methods=["POST"])
+@login_required
+def update_deadline(deadline_id):
+    user_id = session["user_id"]
+    fields = {}
+    for field in ("title", "subject", "due_date", "priority", "description"):
+        if field in request.form:
+            fields[field] = request.form[field]
+    if "study_hours" in request.form:
+        try:
+            fields["study_hours"] = int(request.form["study_hours"])
+        except ValueError:
+            return jsonify({"success": False, "error": "study_hours must be a whole number"}), 400
+        if fields["study_hours"] < 0:
+            return jsonify({"success": False, "error": "study_hours cannot be negative"}), 400
+    if "due_date" in fields:
+        # A stored date the planner cannot parse would break every later
+        # timetable for this student
+        try:
+            parse_datetime(fields["due_date"])
+        except ValueError:
+            return jsonify({"success": False, "error": "due_date must be an ISO date and time"}), 400
+    if "completed" in request.form:
+        fields["completed"] = request.form["completed"].lower() in ("1", "true", "on", "yes")
+    if not fields:
+        return jsonify({"success": False, "error": "Nothing to update"}), 400
+    
+    try:
+        assignments = ", ".join(f"{field} = :{field}" for field in fields)
+        updated = db.session.execute(
+            text(f"UPDATE deadlines SET {assignments} WHERE id = :id AND user_id = :user_id"),
+            {**fields, "id": deadline_id, "user_id": user_id}
+        ).rowcount
+        if not updated:
+            db.session.rollback()
+            return jsonify({"success": False, "error": "Deadline not found"}), 404
+        plan = study_planner.replan(db.session.connection(), user_id, [deadline_id])
+        db.session.commit()
+        return jsonify({"success": True, "plan": plan})
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)})
@@ -554,142 +709,45 @@ def add_deadline():
 def generate_timetable():
     user_id = session["user_id"]
     
+    # The client sends the plan version it already holds and gets back only
+    # the days that changed since then
+    since = (request.get_json(silent=True) or {}).get("since")
+    
     try:
-        # Get pending deadlines
-        deadlines = db.session.execute(
-            text("SELECT * FROM deadlines WHERE user_id = :user_id AND completed = 0 ORDER BY due_date"),
-            {"user_id": user_id}
-        ).fetchall()
-        
-        # Use sample data if no deadlines exist
-        if not deadlines:
-            from datetime import datetime, timedelta
-            now = datetime.now()
-            sample_deadlines = [
-                (1, user_id, "Machine Learning Assignment", "Computer Science", (now + timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S"), "high", 8, "Complete neural network project", False, now.strftime("%Y-%m-%d %H:%M:%S")),
-                (2, user_id, "Calculus Midterm Exam", "Mathematics", (now + timedelta(days=4)).strftime("%Y-%m-%d %H:%M:%S"), "critical", 12, "Study calculus concepts", False, now.strftime("%Y-%m-%d %H:%M:%S")),
-                (3, user_id, "Physics Lab Report", "Physics", (now + timedelta(days=10)).strftime("%Y-%m-%d %H:%M:%S"), "medium", 6, "Complete lab analysis", False, now.strftime("%Y-%m-%d %H:%M:%S"))
-            ]
-            deadlines = sample_deadlines
+        now = datetime.now()
+        timetable = study_planner.timetable(db.session.connection(), user_id, since, now)
         
-        # Generate AI timetable
-        timetable = generate_ai_timetable(deadlines)
+        # Use sample data if no deadlines exist; sample plans are not saved
+        if timetable is None:
+            _, busy, studied = timetable_scheduler.load(db.session.connection(), user_id, now)
+            timetable = timetable_scheduler.plan(sample_deadlines(user_id, now, count=3), busy, studied, now)
         
+        db.session.commit()
         return jsonify({"success": True, "timetable": timetable})
     except Exception as e:
+        db.session.rollback()
         return jsonify({"success": False, "message": f"Error generating timetable: {str(e)}"})
 
 @app.route("/calendar/apply-timetable", methods=["POST"])
 @login_required
 def apply_timetable():
     user_id = session["user_id"]
-    timetable_data = request.json["timetable"]
     
     try:
-        # Clear existing timetable entries
-        db.session.execute(
-            text("DELETE FROM timetable_entries WHERE user_id = :user_id"),
-            {"user_id": user_id}
-        )
-        
-        # Add new timetable entries
-        for day in timetable_data["daily_schedule"]:
-            for session in day["sessions"]:
-                if "Break" not in session["title"]:
-                    db.session.execute(
-                        text("INSERT INTO timetable_entries (user_id, title, start_time, end_time, subject, description, duration, priority) VALUES (:user_id, :title, :start_time, :end_time, :subject, :description, :duration, :priority)"),
-                        {
-                            "user_id": user_id,
-                            "title": session["title"],
-                            "start_time": f"{day['date']} {session['time'].split(' - ')[0]}:00",
-                            "end_time": f"{day['date']} {session['time'].split(' - ')[1]}:00",
-                            "subject": session.get("subject", "Study"),
-                            "description": session["description"],
-                            "duration": session["duration"],
-                            "priority": session.get("stress_level", "medium")
-                        }
-                    )
-        
+        result = timetable_scheduler.apply(db.session.connection(), user_id, request.json["timetable"])
         db.session.commit()
-        return jsonify({"success": True})
+        return jsonify({"success": True, **result})
+    except TimetableError as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e), "message": str(e)}), 400
     except Exception as e:
         db.session.rollback()
-        return jsonify({"success": False, "error": str(e)})
-
-def generate_ai_timetable(deadlines):
-    from datetime import datetime, timedelta
-    import random
-    
-    timetable = {
-        "total_sessions": 0,
-        "total_hours": 0,
-        "subjects": [],
-        "daily_schedule": []
-    }
-    
-    subjects = list(set([d[2] for d in deadlines]))  # subject column
-    timetable["subjects"] = subjects
-    
-    # Generate 7-day schedule
-    for i in range(7):
-        date = datetime.now() + timedelta(days=i)
-        day_schedule = {
-            "day_name": date.strftime("%A"),
-            "date": date.strftime("%Y-%m-%d"),
-            "sessions": []
-        }
-        
-        # Morning session (9-11 AM)
-        if deadlines:
-            deadline = deadlines[i % len(deadlines)]
-            day_schedule["sessions"].append({
-                "time": "09:00 - 11:00",
-                "title": f"Study: {deadline[1]}",  # title column
-                "description": f"Focus on {deadline[2]} concepts",  # subject column
-                "duration": "2 hours",
-                "stress_level": deadline[5],  # priority column
-                "subject": deadline[2]  # subject column
-            })
-            timetable["total_sessions"] += 1
-            timetable["total_hours"] += 2
-        
-        # Break
-        day_schedule["sessions"].append({
-            "time": "11:00 - 11:30",
-            "title": "Break Time",
-            "description": "Rest and refresh",
-            "duration": "30 minutes",
-            "stress_level": "low"
-        })
-        
-        # Afternoon session (2-4 PM)
-        if len(deadlines) > 1:
-            deadline = deadlines[(i + 1) % len(deadlines)]
-            day_schedule["sessions"].append({
-                "time": "14:00 - 16:00",
-                "title": f"Practice: {deadline[1]}",
-                "description": f"Solve problems for {deadline[2]}",
-                "duration": "2 hours",
-                "stress_level": deadline[5],
-                "subject": deadline[2]
-            })
-            timetable["total_sessions"] += 1
-            timetable["total_hours"] += 2
-        
-        # Evening review (7-8 PM)
-        day_schedule["sessions"].append({
-            "time": "19:00 - 20:00",
-            "title": "Daily Review",
-            "description": "Review today's learning",
-            "duration": "1 hour",
-            "stress_level": "medium"
-        })
-        timetable["total_sessions"] += 1
-        timetable["total_hours"] += 1
-        
-        timetable["daily_schedule"].append(day_schedule)
-    
-    return timetable
+        return jsonify({"success": False, "error": str(e), "message": str(e)})
 
 if __name__ == "__main__":
+    # Schema changes are applied by `python -m database.migrations` before
+    # deploying; the dev server applies any pending ones itself for convenience
+    with app.app_context():
+        run_migrations(db.engine)
+        subject_index.load()
     socketio.run(app, debug=True, allow_unsafe_werkzeug=True)
\ No newline at end of file
@@ -0,0 +1,6 @@
+from app import app
+from services.study_stats_service import study_stats_service
+
+with app.app_context():
+    rows = study_stats_service.backfill()
+    print(f"Rebuilt study_stat_rollups from study_sessions ({rows} rollup rows)")
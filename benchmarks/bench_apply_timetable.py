@@ -0,0 +1,96 @@
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import run_migrations
+from services.deadlines import Deadline
+from services.timetable_scheduler import TimetableScheduler
+
+# Writing a generated multi-week timetable to timetable_entries. "per-row"
+# is the old apply_timetable: delete everything, then one INSERT per session
+# with the time strings split on every row. The bulk path validates the plan,
+# diffs it against the stored entries and writes the difference with one
+# DELETE and one executemany.
+#   python benchmarks/bench_apply_timetable.py [deadlines] [weeks]
+
+DEADLINES = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+WEEKS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+USER_ID = 1
+NOW = datetime(2026, 1, 5, 8, 0)
+PRIORITIES = ['low', 'medium', 'high', 'critical']
+
+LEGACY_INSERT = text("INSERT INTO timetable_entries (user_id, title, start_time, end_time, subject, description, duration, priority) "
+                     "VALUES (:user_id, :title, :start_time, :end_time, :subject, :description, :duration, :priority)")
+
+def legacy_apply(connection, timetable):
+    connection.execute(text("DELETE FROM timetable_entries WHERE user_id = :user_id"), {"user_id": USER_ID})
+    for day in timetable["daily_schedule"]:
+        for session in day["sessions"]:
+            if "Break" not in session["title"]:
+                connection.execute(LEGACY_INSERT, {
+                    "user_id": USER_ID,
+                    "title": session["title"],
+                    "start_time": f"{day['date']} {session['time'].split(' - ')[0]}:00",
+                    "end_time": f"{day['date']} {session['time'].split(' - ')[1]}:00",
+                    "subject": session.get("subject", "Study"),
+                    "description": session["description"],
+                    "duration": session["duration"],
+                    "priority": session.get("stress_level", "medium")
+                })
+
+def timed(engine, apply, timetable, repeats=5, reset=None):
+    best = None
+    for _ in range(repeats):
+        with engine.begin() as connection:
+            if reset:
+                reset(connection)
+            start = time.perf_counter()
+            result = apply(connection, timetable)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    random.seed(9)
+    path = os.path.join(tempfile.mkdtemp(), 'bench_apply.db')
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    scheduler = TimetableScheduler()
+    tasks = []
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password_hash, name, role) VALUES (1, 'student@example.edu', 'x', 'Student', 'student')"))
+        for i in range(1, DEADLINES + 1):
+            due = NOW + timedelta(days=random.uniform(2, WEEKS * 7), hours=random.randint(0, 10))
+            task = Deadline(i, USER_ID, f"Deadline {i}", f"Subject {i % 8}", due, random.choice(PRIORITIES), random.randint(2, 10))
+            connection.execute(text("INSERT INTO deadlines (id, user_id, title, subject, due_date, priority, study_hours) "
+                                    "VALUES (:id, 1, :title, :subject, :due, :priority, :hours)"),
+                               {'id': i, 'title': task.title, 'subject': task.subject, 'due': due,
+                                'priority': task.priority, 'hours': task.study_hours})
+            tasks.append(task)
+    timetable = scheduler.plan(tasks, now=NOW)
+    # Same plan after one deadline gained two hours of work
+    changed = list(tasks)
+    changed[0] = changed[0].replace(study_hours=changed[0].study_hours + 2)
+    replanned = scheduler.plan(changed, now=NOW)
+
+    print(f"{timetable['total_sessions']} sessions over {len(timetable['daily_schedule'])} days ({WEEKS} weeks, {DEADLINES} deadlines)")
+    print(f"{'':<34} {'ms':>8} {'inserted':>9} {'deleted':>8} {'kept':>6}")
+    seconds, _ = timed(engine, legacy_apply, timetable)
+    print(f"{'per-row, any apply':<34} {seconds * 1000:>8.2f} {timetable['total_sessions']:>9} {timetable['total_sessions']:>8} {0:>6}")
+
+    bulk = lambda connection, plan: scheduler.apply(connection, USER_ID, plan, now=NOW)
+    clear = lambda connection: connection.execute(text("DELETE FROM timetable_entries"))
+    restore = lambda connection: (clear(connection), bulk(connection, timetable))
+    for label, plan, reset in [('bulk, empty timetable', timetable, clear),
+                               ('bulk, same plan again', timetable, None),
+                               ('bulk, one deadline changed', replanned, restore)]:
+        seconds, result = timed(engine, bulk, plan, reset=reset)
+        print(f"{label:<34} {seconds * 1000:>8.2f} {result['inserted']:>9} {result['deleted']:>8} {result['unchanged']:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import HOT_QUERIES, run_migrations, explain_hot_queries
+
+# Seeds a scratch SQLite database with N study sessions (default 1M) and times
+# every route's hot query before and after the index migration.
+#   python benchmarks/bench_indexes.py [sessions]
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+USERS = 10_000
+TAS = 500
+RUNS = 50
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'schema.sql')
+
+LIVE_SESSIONS_DDL = """
+CREATE TABLE live_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ta_id INTEGER NOT NULL,
+    title VARCHAR(200) NOT NULL,
+    description TEXT,
+    start_time DATETIME,
+    duration INTEGER,
+    is_active BOOLEAN DEFAULT 0
+)
+"""
+
+def seed(engine):
+    raw = engine.raw_connection()
+    cursor = raw.cursor()
+    with open(SCHEMA_PATH) as f:
+        cursor.executescript(f.read())
+    cursor.execute(LIVE_SESSIONS_DDL)
+
+    now = datetime.now()
+    cursor.executemany(
+        "INSERT INTO users (id, email, password_hash, name, role) VALUES (?, ?, 'x', ?, ?)",
+        ((i, f"user{i}@bench.local", f"User {i}", 'ta' if i <= TAS else 'student') for i in range(1, USERS + 1))
+    )
+
+    def sessions():
+        for _ in range(SESSIONS):
+            created = now - timedelta(seconds=random.randint(0, 365 * 86400))
+            yield (random.randint(TAS + 1, USERS), 'Pomodoro Timer', 1500, random.randint(0, 1500),
+                   created.strftime('%Y-%m-%d %H:%M:%S.%f'))
+    cursor.executemany(
+        "INSERT INTO study_sessions (user_id, timer_type, duration, completed_duration, created_at) VALUES (?, ?, ?, ?, ?)",
+        sessions()
+    )
+    cursor.executemany(
+        "INSERT INTO matches (student_id, ta_id, status) VALUES (?, ?, ?)",
+        ((random.randint(TAS + 1, USERS), random.randint(1, TAS), random.choice(['pending', 'accepted', 'rejected']))
+         for _ in range(SESSIONS // 10))
+    )
+    cursor.executemany(
+        "INSERT INTO deadlines (user_id, title, subject, due_date, completed) VALUES (?, 'Deadline', 'Maths', ?, ?)",
+        ((random.randint(TAS + 1, USERS), (now + timedelta(days=random.randint(-30, 60))).strftime('%Y-%m-%d %H:%M:%S'),
+          random.random() < 0.7) for _ in range(SESSIONS // 10))
+    )
+    cursor.executemany(
+        "INSERT INTO timetable_entries (user_id, title, start_time, end_time) VALUES (?, 'Study', ?, ?)",
+        ((random.randint(TAS + 1, USERS), now.strftime('%Y-%m-%d 09:00:00'), now.strftime('%Y-%m-%d 11:00:00'))
+         for _ in range(SESSIONS // 10))
+    )
+    cursor.executemany(
+        "INSERT INTO live_sessions (ta_id, title, is_active) VALUES (?, 'Lecture', ?)",
+        ((random.randint(1, TAS), random.random() < 0.01) for _ in range(SESSIONS // 100))
+    )
+    cursor.executemany(
+        "INSERT INTO notes (ta_id, title, content) VALUES (?, 'Note', 'content')",
+        ((random.randint(1, TAS), ) for _ in range(SESSIONS // 20))
+    )
+    raw.commit()
+    cursor.execute("ANALYZE")
+    raw.close()
+
+def time_queries(engine):
+    timings = {}
+    with engine.connect() as connection:
+        for route, sql, params, _ in HOT_QUERIES:
+            samples = []
+            for _ in range(RUNS):
+                bound = dict(params)
+                if 'user_id' in bound:
+                    bound['user_id'] = random.randint(TAS + 1, USERS)
+                if 'ta_id' in bound:
+                    bound['ta_id'] = random.randint(1, TAS)
+                if 'since' in bound:
+                    bound['since'] = (datetime.now() - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+                start = time.perf_counter()
+                connection.execute(text(sql), bound).fetchall()
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            timings[route] = samples[len(samples) // 2] * 1000
+    return timings
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), 'bench_indexes.db')
+    engine = create_engine(f"sqlite:///{path}")
+
+    start = time.perf_counter()
+    seed(engine)
+    print(f"Seeded {SESSIONS:,} study sessions in {time.perf_counter() - start:.1f}s ({path})")
+
+    before = time_queries(engine)
+    start = time.perf_counter()
+    run_migrations(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    print(f"Applied index migration in {time.perf_counter() - start:.1f}s")
+    after = time_queries(engine)
+
+    print(f"\n{'route':<28}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for route in before:
+        speedup = before[route] / after[route] if after[route] else float('inf')
+        print(f"{route:<28}{before[route]:>14.3f}{after[route]:>14.3f}{speedup:>9.0f}x")
+
+    print()
+    for result in explain_hot_queries(engine):
+        print(f"[{'ok' if result['uses_index'] else 'MISSING'}] {result['route']}: {' | '.join(result['plan'])}")
+
+    engine.dispose()
+    os.remove(path)
+
+if __name__ == '__main__':
+    main()
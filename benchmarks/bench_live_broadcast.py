@@ -0,0 +1,126 @@
+import os
+import sys
+import pickle
+import queue
+import statistics
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from flask import Flask
+from flask_socketio import SocketIO, join_room
+from socketio.pubsub_manager import PubSubManager
+from services.real_speech_service import RealSpeechService, live_session_room
+
+# Fans one lecturer's transcript out to a room of student sockets and measures
+# how long it takes from process_speech_result until the last listener has
+# the packet. Listeners are Flask-SocketIO test clients, so this measures the
+# server side of the broadcast (room lookup, encoding, per-socket send) rather
+# than network time.
+#   python benchmarks/bench_live_broadcast.py [listeners] [broadcasts]
+#
+# The second run routes every emit through a message queue manager the same
+# way a multi-worker deployment with SOCKETIO_MESSAGE_QUEUE does. An in-process
+# queue stands in for Redis: payloads are pickled and handed to a listener
+# thread, which is the hop the Redis manager adds minus the network.
+
+LISTENERS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+BROADCASTS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+LIVE_SESSION_ID = 1
+
+class LocalQueueManager(PubSubManager):
+    name = 'local-queue'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.messages = queue.Queue()
+
+    def _publish(self, data):
+        self.messages.put(pickle.dumps(data))
+
+    def _listen(self):
+        while True:
+            yield pickle.loads(self.messages.get())
+
+class BenchSpeechService(RealSpeechService):
+    def save_notes(self, session, ai_notes):
+        pass
+
+def build():
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+
+    @socketio.on('join')
+    def handle_join(data):
+        join_room(live_session_room(data['live_session_id']))
+
+    clients = []
+    for _ in range(LISTENERS):
+        client = socketio.test_client(app)
+        client.emit('join', {'live_session_id': LIVE_SESSION_ID})
+        clients.append(client)
+    return app, socketio, clients
+
+def use_message_queue(socketio):
+    # Test clients refuse to connect through a pub/sub manager, so the room
+    # membership built above is carried over to one after the fact
+    server = socketio.server
+    manager = LocalQueueManager()
+    manager.set_server(server)
+    manager.rooms = server.manager.rooms
+    manager.eio_to_sid = server.manager.eio_to_sid
+    manager.initialize()
+    server.manager = manager
+
+def count_deliveries(socketio):
+    server = socketio.server
+    send_packet = server._send_eio_packet
+    state = {'received': 0, 'expected': 0, 'done': threading.Event()}
+
+    def counting_send_packet(eio_sid, pkt):
+        send_packet(eio_sid, pkt)
+        state['received'] += 1
+        if state['received'] == state['expected']:
+            state['done'].set()
+
+    server._send_eio_packet = counting_send_packet
+    return state
+
+def run(label, app, socketio, clients):
+    service = BenchSpeechService(emit=socketio.emit)
+    service.start_transcription('lecturer', user_id=1, live_session_id=LIVE_SESSION_ID)
+    state = count_deliveries(socketio)
+
+    latencies = []
+    with app.app_context():
+        for i in range(BROADCASTS):
+            state['received'] = 0
+            state['expected'] = LISTENERS
+            state['done'].clear()
+            start = time.perf_counter()
+            service.process_speech_result('lecturer', f"sentence number {i} of the lecture.", is_final=True)
+            if not state['done'].wait(10):
+                raise RuntimeError(f"only {state['received']} of {LISTENERS} listeners got broadcast {i}")
+            latencies.append(time.perf_counter() - start)
+
+    for client in clients:
+        assert sum(1 for message in client.get_received() if message['name'] == 'transcript_update') == BROADCASTS
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<24} {statistics.median(latencies) * 1000:>10.2f} {p95 * 1000:>10.2f} "
+          f"{max(latencies) * 1000:>10.2f} {LISTENERS / statistics.median(latencies):>14,.0f}")
+
+def main():
+    print(f"{LISTENERS} listeners in one room, {BROADCASTS} final results from one lecturer")
+    print(f"{'manager':<24} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10} {'deliveries/s':>14}")
+
+    app, socketio, clients = build()
+    run('in-process', app, socketio, clients)
+
+    app, socketio, clients = build()
+    use_message_queue(socketio)
+    run('message queue (local)', app, socketio, clients)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import itertools
+import os
+import sys
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import run_migrations
+from services.note_search import NoteSearch
+
+# Searching note titles and content. "like scan" reads every note looking
+# for the words; the search service answers from the notes_fts index with
+# BM25 ranking and a snippet per result, over every match or (recent=True)
+# only the newest ones. Notes are synthetic lecture transcripts of a few
+# hundred words.
+#   python benchmarks/bench_note_search.py [notes] [words per note]
+
+NOTES = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+WORDS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+TAS = 50
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'Biology', 'Computer Science', 'History', 'Economics', 'English']
+
+def vocabulary(size):
+    random.seed(22)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(random.choice(letters) for _ in range(random.randint(3, 10))) for _ in range(size)]
+
+def timed(fn, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    words = vocabulary(20000)
+    # Zipf-like word frequencies, like real text
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    path = os.path.join(tempfile.mkdtemp(), 'bench_notes.db')
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password_hash, name, role) VALUES (:id, :email, 'x', :name, 'ta')"),
+                           [{'id': i, 'email': f"ta{i}@example.edu", 'name': f"TA {i}"} for i in range(1, TAS + 1)])
+        for batch in range(0, NOTES, 5000):
+            connection.execute(text("INSERT INTO notes (ta_id, title, content, subject, created_at) "
+                                    "VALUES (:ta_id, :title, :content, :subject, CURRENT_TIMESTAMP)"), [{
+                'ta_id': random.randint(1, TAS),
+                'title': ' '.join(random.choices(words[:2000], k=4)).title(),
+                'content': ' '.join(random.choices(words, cum_weights=weights, k=WORDS)),
+                'subject': random.choice(SUBJECTS)
+            } for _ in range(batch, min(batch + 5000, NOTES))])
+    print(f"{NOTES} notes of {WORDS} words, indexed while inserting in {time.perf_counter() - start:.1f}s")
+
+    search = NoteSearch()
+    # A common word, a mid-frequency pair and a rare word
+    queries = [words[5], f"{words[300]} {words[301]}", words[15000], words[800][:4] + '*']
+    print(f"{'':<40} {'ms':>8} {'results':>8}")
+    with engine.connect() as connection:
+        for query in queries:
+            terms = query.split()
+            like = " AND ".join(f"(lower(title) LIKE :t{n} OR lower(content) LIKE :t{n})" for n in range(len(terms)))
+            seconds, rows = timed(lambda: connection.execute(
+                text(f"SELECT id, title FROM notes WHERE {like} LIMIT 20"),
+                {f"t{n}": f"%{term.rstrip('*')}%" for n, term in enumerate(terms)}).fetchall(), repeats=2)
+            print(f"{'like scan ' + repr(query):<40} {seconds * 1000:>8.2f} {len(rows):>8}")
+            seconds, results = timed(lambda: search.search(query, connection=connection))
+            print(f"{'fts ' + repr(query):<40} {seconds * 1000:>8.2f} {len(results['results']):>8}")
+            seconds, results = timed(lambda: search.search(query, recent=True, connection=connection))
+            label = '  newest matches only' + (' (truncated)' if results['truncated'] else '')
+            print(f"{label:<40} {seconds * 1000:>8.2f} {len(results['results']):>8}")
+            seconds, results = timed(lambda: search.search(query, subject='physics', ta_id=7, connection=connection))
+            print(f"{'  + subject and TA filter':<40} {seconds * 1000:>8.2f} {len(results['results']):>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import itertools
+import os
+import sys
+import random
+import tempfile
+import time
+from sqlalchemy import bindparam, create_engine, select, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.compression import compress_text
+from database.db import Note
+from database.migrations import run_migrations
+
+# Storing lecture transcripts in notes.content. "plain" writes the text as
+# it is, the way notes were stored before; "compressed" goes through the
+# CompressedText column type, which zlib-compresses anything over the
+# threshold. Both databases carry the notes_fts index and its triggers, so
+# insert times include indexing. Transcripts are synthetic markdown with
+# Zipf-distributed words.
+#   python benchmarks/bench_note_storage.py [notes] [words per note]
+
+NOTES = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+WORDS = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+READS = 2000
+
+def transcripts():
+    random.seed(25)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = [''.join(random.choice(letters) for _ in range(random.randint(2, 9))) for _ in range(20000)]
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    for i in range(NOTES):
+        sentences = [' '.join(random.choices(words, cum_weights=weights, k=15)).capitalize() + '.'
+                     for _ in range(WORDS // 15)]
+        yield (f"# 📚 AI-Generated Lecture Notes\n\n## 📊 Session Summary\n- **Lecture**: {i}\n\n"
+               "## 📝 Full Transcript\n" + '\n'.join(sentences))
+
+def build(path, encode):
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password_hash, name, role) VALUES (1, 'ta@example.edu', 'x', 'TA', 'ta')"))
+    elapsed = 0
+    batch = []
+    for i, content in enumerate(transcripts(), 1):
+        batch.append({'ta_id': 1, 'title': f"Lecture {i}", 'content': content, 'subject': 'Physics'})
+        if len(batch) == 500 or i == NOTES:
+            # Encoding is timed with the insert, as the column type does it
+            start = time.perf_counter()
+            with engine.begin() as connection:
+                connection.execute(text("INSERT INTO notes (ta_id, title, content, subject) VALUES (:ta_id, :title, :content, :subject)"),
+                                   [dict(row, content=encode(row['content'])) for row in batch])
+            elapsed += time.perf_counter() - start
+            batch = []
+    engine.dispose()
+    return engine, elapsed
+
+def content_size(engine):
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT SUM(length(CAST(content AS BLOB))) FROM notes")).scalar()
+
+def read_latency(engine):
+    random.seed(7)
+    ids = [random.randint(1, NOTES) for _ in range(READS)]
+    query = select(Note.__table__.c.content).where(Note.__table__.c.id == bindparam('id'))
+    with engine.connect() as connection:
+        start = time.perf_counter()
+        for note_id in ids:
+            connection.execute(query, {'id': note_id}).scalar()
+        return (time.perf_counter() - start) / READS
+
+def main():
+    directory = tempfile.mkdtemp()
+    total = sum(len(content.encode()) for content in transcripts())
+    print(f"{NOTES} transcripts of {WORDS} words, {total / NOTES / 1024:.1f} KiB each on average")
+    # db MiB includes the full-text index, which compression does not shrink
+    print(f"{'':<12} {'content MiB':>12} {'db MiB':>8} {'notes/s':>9} {'read ms':>8}")
+    for label, encode in [('plain', lambda content: content), ('compressed', compress_text)]:
+        path = os.path.join(directory, f'bench_{label}.db')
+        engine, seconds = build(path, encode)
+        size = os.path.getsize(path) + (os.path.getsize(path + '-wal') if os.path.exists(path + '-wal') else 0)
+        print(f"{label:<12} {content_size(engine) / 2 ** 20:>12.1f} {size / 2 ** 20:>8.1f} "
+              f"{NOTES / seconds:>9.0f} {read_latency(engine) * 1000:>8.3f}")
+
+if __name__ == "__main__":
+    main()
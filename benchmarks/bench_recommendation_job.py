@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import run_migrations
+from services.recommendation_job import RecommendationJob
+from services.preference_service import rebuild_student_subjects
+from services.subject_index import rebuild_ta_subjects
+from services.swipe_feed_service import SwipeFeedService, NEVER
+
+# Offline ranking of every student against every TA: full runs with one
+# worker vs a process pool, an incremental rerun after a share of students
+# changed preferences, and the cost of reading the first swipe page from the
+# precomputed table vs the live (rating-ordered, subject-filtered) query.
+#   python benchmarks/bench_recommendation_job.py [students] [tas] [changed_pct]
+
+STUDENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+TAS = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+CHANGED = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'Biology', 'Computer Science', 'English', 'History', 'Engineering']
+
+def populate(engine):
+    random.seed(3)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password_hash, name, role) VALUES (:id, :email, 'x', :name, :role)"),
+                           [{'id': i, 'email': f"user{i}@example.edu", 'name': f"User {i}", 'role': 'ta' if i <= TAS else 'student'}
+                            for i in range(1, TAS + STUDENTS + 1)])
+        connection.execute(text("INSERT INTO ta_profiles (user_id, subjects, rating) VALUES (:user_id, :subjects, :rating)"),
+                           [{'user_id': i, 'subjects': ', '.join(random.sample(SUBJECTS, random.randint(1, 3))),
+                             'rating': round(random.uniform(3, 5), 1)} for i in range(1, TAS + 1)])
+        rows = []
+        for i in range(TAS + 1, TAS + STUDENTS + 1):
+            subjects = random.sample(SUBJECTS, random.randint(1, 3))
+            rows.append({'user_id': i, 'subjects': json.dumps(subjects),
+                         'confidence_levels': json.dumps({s: random.randint(1, 5) for s in subjects}),
+                         'updated_at': datetime.utcnow()})
+        connection.execute(text("INSERT INTO student_preferences (user_id, subjects, confidence_levels, updated_at) "
+                                "VALUES (:user_id, :subjects, :confidence_levels, :updated_at)"), rows)
+        rebuild_ta_subjects(connection)
+        rebuild_student_subjects(connection)
+
+def touch_preferences(engine, share):
+    ids = random.sample(range(TAS + 1, TAS + STUDENTS + 1), int(STUDENTS * share / 100))
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE student_preferences SET learning_style = 'Visual', updated_at = :now WHERE user_id = :id"),
+                           [{'id': i, 'now': datetime.utcnow()} for i in ids])
+    return len(ids)
+
+def first_pages(engine, feed, phase, fresh_since, samples=200):
+    # First page of the feed for a sample of students, through one phase query
+    students = random.sample(range(TAS + 1, TAS + STUDENTS + 1), samples)
+    with engine.connect() as connection:
+        subject_ids = [row[0] for row in connection.execute(text("SELECT id FROM subjects WHERE name IN ('physics', 'biology')"))]
+        query = feed._query(phase, False)
+        start = time.perf_counter()
+        for student_id in students:
+            params = {'student_id': student_id, 'limit': feed.page_size, 'fresh_since': fresh_since}
+            if phase in ('s', 'o'):
+                params['subject_ids'] = subject_ids
+            connection.execute(query, params).fetchall()
+        return (time.perf_counter() - start) / samples
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), 'bench_recommendations.db')
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    populate(engine)
+    workers = os.cpu_count() or 1
+    print(f"{STUDENTS:,} students x {TAS:,} TAs, top 50 per student")
+    print(f"{'':<28} {'students':>10} {'seconds':>10}")
+
+    for label, job in [('full, 1 worker', RecommendationJob(engine, workers=1)),
+                       (f"full, {workers} workers", RecommendationJob(engine, workers=workers))]:
+        result = job.run(incremental=False)
+        print(f"{label:<28} {result['students']:>10,} {result['seconds']:>10.2f}")
+
+    changed = touch_preferences(engine, CHANGED)
+    result = RecommendationJob(engine, workers=workers).run()
+    print(f"{f'incremental ({changed} changed)':<28} {result['students']:>10,} {result['seconds']:>10.2f}")
+
+    feed = SwipeFeedService()
+    precomputed = first_pages(engine, feed, 'r', NEVER)
+    live = first_pages(engine, feed, 's', NEVER)
+    print(f"first page, precomputed    {precomputed * 1000:>10.3f} ms")
+    print(f"first page, live           {live * 1000:>10.3f} ms (before the per-page engine rerank)")
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT count(*) FROM ta_recommendations")).scalar()
+    print(f"ta_recommendations rows    {rows:>10,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import random
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.real_speech_service import RealSpeechService
+
+# Drives hundreds of concurrent transcription streams through one
+# RealSpeechService, the way a single worker sees them: final results from
+# every connection arrive interleaved.
+#   python benchmarks/bench_speech_sessions.py [streams] [results_per_stream]
+
+STREAMS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+RESULTS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+WORDS = ("gradient descent converges when the learning rate is small enough and the loss "
+         "surface is smooth so we take steps proportional to the negative gradient").split()
+
+class BenchSpeechService(RealSpeechService):
+    def save_notes(self, session, ai_notes):
+        pass
+
+def sentence():
+    return ' '.join(random.choices(WORDS, k=14)) + '.'
+
+def main():
+    emitted = [0]
+    service = BenchSpeechService(emit=lambda *args, **kwargs: emitted.__setitem__(0, emitted[0] + 1))
+
+    tracemalloc.start()
+    for i in range(STREAMS):
+        service.start_transcription(f"sid-{i}", user_id=i)
+
+    events = [(f"sid-{i}", f"[stream {i}] {sentence()}") for i in range(STREAMS) for _ in range(RESULTS)]
+    random.shuffle(events)
+
+    start = time.perf_counter()
+    for sid, transcript in events:
+        service.process_speech_result(sid, transcript, is_final=True)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Every stream must contain only its own results
+    for i in range(STREAMS):
+        session = service.registry.get(f"sid-{i}")
+        text = session.transcript.text()
+        assert text.count('[stream ') == RESULTS
+        assert text.count(f"[stream {i}] ") == RESULTS
+
+    start = time.perf_counter()
+    for i in range(STREAMS):
+        service.stop_transcription(f"sid-{i}")
+    stop_elapsed = time.perf_counter() - start
+
+    print(f"{STREAMS} concurrent streams x {RESULTS} final results ({len(events):,} events)")
+    print(f"  process_speech_result: {len(events) / elapsed:,.0f} results/s ({elapsed / len(events) * 1e6:.1f} us each)")
+    print(f"  stop + note generation: {stop_elapsed / STREAMS * 1000:.2f} ms per stream")
+    print(f"  peak traced memory: {peak / 1024 / 1024:.1f} MB ({peak / STREAMS / 1024:.1f} KB per stream)")
+    print(f"  emits: {emitted[0]:,}, sessions left in registry: {len(service.registry)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import run_migrations
+from services.study_planner import StudyPlanner
+
+# Reacting to one deadline change for a student with a saved plan. "full" is
+# what generate-timetable did before plans were saved: schedule every
+# deadline again and send the whole timetable. "replan" fits only the
+# changed deadline around the saved blocks and sends the days that changed.
+# Every run is rolled back so each one starts from the same saved plan.
+#   python benchmarks/bench_study_planner.py [deadlines] [weeks]
+
+DEADLINES = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+WEEKS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+USER_ID = 1
+NOW = datetime(2026, 1, 5, 8, 0)
+PRIORITIES = ['low', 'medium', 'high', 'critical']
+
+def add_deadline(connection):
+    return connection.execute(text("INSERT INTO deadlines (user_id, title, subject, due_date, priority, study_hours) "
+                                   "VALUES (1, 'New deadline', 'Subject 0', :due, 'high', 6) RETURNING id"),
+                              {'due': NOW + timedelta(days=12)}).scalar()
+
+def complete_deadline(connection):
+    return connection.execute(text("UPDATE deadlines SET completed = 1 WHERE id = 1 RETURNING id")).scalar()
+
+def timed(engine, change, respond, repeats=5):
+    best = None
+    for _ in range(repeats):
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            deadline_id = change(connection)
+            start = time.perf_counter()
+            payload = json.dumps(respond(connection, deadline_id))
+            elapsed = time.perf_counter() - start
+            transaction.rollback()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, payload
+
+def main():
+    random.seed(9)
+    path = os.path.join(tempfile.mkdtemp(), 'bench_planner.db')
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    planner = StudyPlanner()
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password_hash, name, role) VALUES (1, 'student@example.edu', 'x', 'Student', 'student')"))
+        for i in range(1, DEADLINES + 1):
+            due = NOW + timedelta(days=random.uniform(2, WEEKS * 7), hours=random.randint(0, 10))
+            connection.execute(text("INSERT INTO deadlines (id, user_id, title, subject, due_date, priority, study_hours) "
+                                    "VALUES (:id, 1, :title, :subject, :due, :priority, :hours)"),
+                               {'id': i, 'title': f"Deadline {i}", 'subject': f"Subject {i % 8}", 'due': due,
+                                'priority': random.choice(PRIORITIES), 'hours': random.randint(2, 10)})
+        plan = planner.generate(connection, USER_ID, NOW)
+
+    print(f"{plan['total_sessions']} sessions over {len(plan['daily_schedule'])} days ({WEEKS} weeks, {DEADLINES} deadlines)")
+    print(f"{'':<28} {'ms':>8} {'bytes':>8} {'days':>6}")
+    full = lambda connection, deadline_id: planner.generate(connection, USER_ID, NOW)
+    replan = lambda connection, deadline_id: planner.replan(connection, USER_ID, [deadline_id], NOW)
+    for label, change in [('deadline added', add_deadline), ('deadline completed', complete_deadline)]:
+        for mode, respond in [('full', full), ('replan', replan)]:
+            seconds, payload = timed(engine, change, respond)
+            days = len(json.loads(payload)['daily_schedule'])
+            print(f"{label + ', ' + mode:<28} {seconds * 1000:>8.2f} {len(payload):>8} {days:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import run_migrations
+from services.subject_index import SubjectIndex, rebuild_ta_subjects
+from services.subjects import parse_subjects
+
+# Candidate generation for a student's subjects over a large TA population:
+# scanning every TAProfile.subjects string (in SQL with LIKE, or in Python
+# after loading them) versus intersecting posting lists of the subject index.
+#   python benchmarks/bench_subject_index.py [tas]
+
+TAS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+SUBJECTS = [f"Subject {i}" for i in range(200)] + [
+    'Mathematics', 'Physics', 'Chemistry', 'Biology', 'Computer Science', 'English', 'History', 'Engineering'
+]
+QUERIES = [['Mathematics'], ['Mathematics', 'Physics'], ['Subject 150', 'Subject 7', 'Chemistry']]
+
+def populate(engine):
+    random.seed(3)
+    # A few popular subjects and a long tail, like real course catalogs
+    weights = [50 if not s.startswith('Subject') else 1 for s in SUBJECTS]
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password_hash, name, role) VALUES (:id, :email, 'x', :name, 'ta')"),
+                           [{'id': i, 'email': f"ta{i}@example.edu", 'name': f"TA {i}"} for i in range(1, TAS + 1)])
+        connection.execute(text("INSERT INTO ta_profiles (user_id, subjects, rating) VALUES (:user_id, :subjects, :rating)"),
+                           [{'user_id': i,
+                             'subjects': ', '.join(set(random.choices(SUBJECTS, weights, k=random.randint(1, 4)))),
+                             'rating': round(random.uniform(3, 5), 1)} for i in range(1, TAS + 1)])
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), 'bench_subjects.db')
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    populate(engine)
+
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        rebuild_ta_subjects(connection)
+    rebuild = time.perf_counter() - start
+
+    index = SubjectIndex()
+    with engine.connect() as connection:
+        start = time.perf_counter()
+        index.load(connection)
+        load = time.perf_counter() - start
+
+        print(f"{TAS:,} TAs, {len(index.postings)} subjects")
+        print(f"  rebuild ta_subjects: {rebuild * 1000:8.1f} ms   load index: {load * 1000:8.1f} ms")
+        print(f"{'query':<44} {'hits':>7} {'SQL LIKE':>10} {'py scan':>10} {'index':>10}")
+
+        for query in QUERIES:
+            wanted = parse_subjects(query)
+            like_sql = "SELECT user_id FROM ta_profiles WHERE " + " OR ".join(
+                f"lower(subjects) LIKE :s{i}" for i in range(len(wanted)))
+            like_params = {f"s{i}": f"%{name}%" for i, name in enumerate(wanted)}
+            like, _ = timed(lambda: connection.execute(text(like_sql), like_params).fetchall())
+
+            def scan():
+                rows = connection.execute(text("SELECT user_id, subjects FROM ta_profiles")).fetchall()
+                return {ta_id for ta_id, subjects in rows if set(parse_subjects(subjects)) & set(wanted)}
+            scanned, expected = timed(scan)
+
+            indexed, found = timed(lambda: index.candidates(query), repeat=50)
+            # LIKE also matches "Subject 15" inside "Subject 150", so only the
+            # exact scan is used as the reference
+            assert found == expected
+            print(f"{', '.join(query):<44} {len(found):>7,} {like * 1000:>8.2f}ms {scanned * 1000:>8.2f}ms {indexed * 1000:>8.3f}ms")
+
+            both, _ = timed(lambda: index.candidates(query, match_all=True), repeat=50)
+            print(f"{'  (all of)':<44} {len(index.candidates(query, match_all=True)):>7,} {'':>10} {'':>10} {both * 1000:>8.3f}ms")
+
+if __name__ == "__main__":
+    main()
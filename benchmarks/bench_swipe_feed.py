@@ -0,0 +1,110 @@
+import os
+import sys
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import run_migrations
+from services.subject_index import rebuild_ta_subjects
+from services.swipe_feed_service import SwipeFeedService, NEVER
+
+# Pages through the swipe feed of one student with a long swipe history.
+# The old approach (kernel-master) filters with NOT IN over the student's
+# matches and pages with OFFSET; the feed service uses keyset pagination on
+# (rating, user_id) and NOT EXISTS probes against the exclusion indexes.
+#   python benchmarks/bench_swipe_feed.py [tas] [swiped]
+
+TAS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+SWIPED = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+PAGE = 10
+PAGES = 200
+STUDENT_ID = TAS + 1
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'Biology', 'Computer Science', 'English', 'History', 'Engineering']
+
+LEGACY_SQL = text("""
+    SELECT u.id, u.name, p.subjects, p.bio, p.rating, p.profile_image
+    FROM ta_profiles p JOIN users u ON u.id = p.user_id
+    WHERE u.role = 'ta'
+      AND p.user_id NOT IN (SELECT ta_id FROM matches WHERE student_id = :student_id)
+      AND p.user_id NOT IN (SELECT ta_id FROM swipe_passes WHERE student_id = :student_id)
+    ORDER BY p.rating DESC, p.user_id DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+def populate(engine):
+    random.seed(11)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, password_hash, name, role) VALUES (:id, :email, 'x', :name, :role)"),
+                           [{'id': i, 'email': f"user{i}@example.edu", 'name': f"User {i}", 'role': 'ta' if i <= TAS else 'student'}
+                            for i in range(1, TAS + 2)])
+        connection.execute(text("INSERT INTO ta_profiles (user_id, subjects, rating) VALUES (:user_id, :subjects, :rating)"),
+                           [{'user_id': i, 'subjects': ', '.join(random.sample(SUBJECTS, random.randint(1, 3))),
+                             'rating': round(random.uniform(3, 5), 1)} for i in range(1, TAS + 1)])
+        swiped = random.sample(range(1, TAS + 1), SWIPED)
+        half = SWIPED // 2
+        connection.execute(text("INSERT INTO matches (student_id, ta_id, status) VALUES (:student_id, :ta_id, 'pending')"),
+                           [{'student_id': STUDENT_ID, 'ta_id': ta_id} for ta_id in swiped[:half]])
+        connection.execute(text("INSERT INTO swipe_passes (student_id, ta_id) VALUES (:student_id, :ta_id)"),
+                           [{'student_id': STUDENT_ID, 'ta_id': ta_id} for ta_id in swiped[half:]])
+        rebuild_ta_subjects(connection)
+        subject_ids = [row[0] for row in connection.execute(text("SELECT id FROM subjects WHERE name IN ('physics', 'biology')"))]
+    return subject_ids
+
+def keyset_pages(connection, feed, subject_ids):
+    # Same live-phase walk as SwipeFeedService.page, on a plain connection
+    timings, seen = [], []
+    phases, cursor = ['s', 'o'], None
+    while len(timings) < PAGES and phases:
+        phase = phases[0]
+        params = {'student_id': STUDENT_ID, 'limit': PAGE, 'subject_ids': subject_ids, 'fresh_since': NEVER}
+        if cursor:
+            params.update(position=cursor[0], ta_id=cursor[1])
+        start = time.perf_counter()
+        rows = connection.execute(feed._query(phase, cursor is not None, connection.dialect), params).fetchall()
+        timings.append(time.perf_counter() - start)
+        seen.extend(row[0] for row in rows)
+        if len(rows) < PAGE:
+            phases, cursor = phases[1:], None
+        else:
+            cursor = (rows[-1][6], rows[-1][0])
+    return timings, seen
+
+def offset_pages(connection):
+    timings, seen = [], []
+    for page in range(PAGES):
+        start = time.perf_counter()
+        rows = connection.execute(LEGACY_SQL, {'student_id': STUDENT_ID, 'limit': PAGE, 'offset': page * PAGE}).fetchall()
+        timings.append(time.perf_counter() - start)
+        seen.extend(row[0] for row in rows)
+    return timings, seen
+
+def summary(label, timings):
+    first = sum(timings[:10]) / 10
+    last = sum(timings[-10:]) / 10
+    print(f"{label:<28} {first * 1000:>10.2f} {last * 1000:>10.2f} {sum(timings) * 1000:>12.1f}")
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), 'bench_swipe.db')
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    subject_ids = populate(engine)
+    feed = SwipeFeedService()
+
+    with engine.connect() as connection:
+        print(f"{TAS:,} TAs, student has swiped {SWIPED:,}; {PAGES} pages of {PAGE}")
+        print(f"{'':<28} {'first ms':>10} {'last ms':>10} {'total ms':>12}")
+        legacy, legacy_seen = offset_pages(connection)
+        summary('NOT IN + OFFSET', legacy)
+        keyset, keyset_seen = keyset_pages(connection, feed, subject_ids)
+        summary('keyset + NOT EXISTS', keyset)
+
+        swiped = {row[0] for row in connection.execute(text(
+            "SELECT ta_id FROM matches WHERE student_id = :s UNION SELECT ta_id FROM swipe_passes WHERE student_id = :s"),
+            {'s': STUDENT_ID})}
+        assert not swiped & set(keyset_seen) and len(set(keyset_seen)) == len(keyset_seen)
+        assert not swiped & set(legacy_seen)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import random
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.ta_ranking_engine import TARankingEngine, RankingCache
+
+# Ranks a pool of TAs for one student with the local engine and compares it
+# with how the old matcher turned a ranked id list back into TA dicts (a
+# next(...) scan per id plus list membership for the remainder).
+#   python benchmarks/bench_ta_ranking.py [tas]
+
+TAS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'Biology', 'Computer Science', 'English', 'History', 'Engineering']
+
+def make_tas(n):
+    return [{
+        'id': i,
+        'name': f"TA {i}",
+        'subjects': ', '.join(random.sample(SUBJECTS, random.randint(1, 3))),
+        'bio': 'Experienced tutor',
+        'rating': round(random.uniform(3.0, 5.0), 1)
+    } for i in range(1, n + 1)]
+
+def legacy_resolve(ranked_ids, available_tas):
+    ranked_tas = []
+    for ta_id in ranked_ids:
+        ta = next((t for t in available_tas if t['id'] == ta_id), None)
+        if ta:
+            ranked_tas.append(ta)
+    for ta in available_tas:
+        if ta not in ranked_tas:
+            ranked_tas.append(ta)
+    return ranked_tas
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    random.seed(7)
+    tas = make_tas(TAS)
+    preferences = SimpleNamespace(
+        subjects=json.dumps(['Mathematics', 'Physics']),
+        confidence_levels=json.dumps({'Mathematics': 2, 'Physics': 4}),
+        deadlines='Math exam on Dec 15, Physics project due Dec 20',
+        learning_style='Visual'
+    )
+    engine = TARankingEngine()
+    cache = RankingCache()
+
+    start = time.perf_counter()
+    key, pool = engine.pool(tas)
+    build = time.perf_counter() - start
+    score, ranked_ids = timed(lambda: engine.rank(preferences, pool))
+    lookup, _ = timed(lambda: engine.pool(tas))
+
+    def resolve_ids():
+        tas_by_id = {ta['id']: ta for ta in tas}
+        return [tas_by_id[ta_id] for ta_id in ranked_ids]
+    resolve, _ = timed(resolve_ids)
+    cache.put((engine.fingerprint(preferences), key), ranked_ids)
+    hit, _ = timed(lambda: cache.get((engine.fingerprint(preferences), key)))
+
+    print(f"{TAS} TAs, {len(pool.vocabulary)} subjects")
+    print(f"  pool build (once per TA set):   {build * 1000:9.2f} ms")
+    print(f"  pool lookup (digest of TA set): {lookup * 1000:9.2f} ms")
+    print(f"  score + sort all TAs:           {score * 1000:9.2f} ms")
+    print(f"  resolve ids via dict:           {resolve * 1000:9.2f} ms")
+    print(f"  cached ranking hit:             {hit * 1000:9.3f} ms")
+
+    # The quadratic resolve is only practical on small pools
+    sample = tas[:min(TAS, 2000)]
+    sample_ids = [ta['id'] for ta in sample]
+    random.shuffle(sample_ids)
+    legacy, _ = timed(lambda: legacy_resolve(sample_ids[:len(sample_ids) // 2], sample), repeat=1)
+    print(f"  legacy resolve ({len(sample)} TAs):      {legacy * 1000:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
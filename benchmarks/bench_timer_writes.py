@@ -0,0 +1,121 @@
+import os
+import sys
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.config import engine_options, install_sqlite_pragmas
+from database.migrations import run_migrations
+
+# Load test for concurrent timer completions: writer threads run the same
+# UPDATE + rollup upsert as /api/end_timer while reader threads load the
+# dashboard totals. Runs once with SQLite defaults (rollback journal) and once
+# with the WAL/pragma configuration from database/config.py.
+#   python benchmarks/bench_timer_writes.py [writers] [readers] [seconds]
+
+WRITERS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+READERS = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+DURATION = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+READ_INTERVAL = 0.005  # think time between dashboard loads per reader
+USERS = 200
+SESSIONS = 20_000
+
+END_TIMER_SQL = text("UPDATE study_sessions SET completed_duration = :completed, focus_score = :focus WHERE id = :id")
+ROLLUP_SQL = text("""
+    INSERT INTO study_stat_rollups (user_id, day, timer_type, total_seconds, session_count)
+    VALUES (:user_id, :day, 'Pomodoro Timer', :seconds, 0)
+    ON CONFLICT (user_id, day, timer_type) DO UPDATE SET
+        total_seconds = study_stat_rollups.total_seconds + excluded.total_seconds
+""")
+DASHBOARD_SQL = text("SELECT coalesce(sum(total_seconds), 0) FROM study_stat_rollups WHERE user_id = :user_id")
+
+def build_database(path):
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO users (id, email, password_hash, name, role) VALUES (:id, :email, 'x', 'User', 'student')"),
+            [{'id': i, 'email': f"user{i}@bench.local"} for i in range(1, USERS + 1)]
+        )
+        connection.execute(
+            text("INSERT INTO study_sessions (id, user_id, timer_type, duration, completed_duration, created_at) "
+                 "VALUES (:id, :user_id, 'Pomodoro Timer', 1500, 0, :created_at)"),
+            [{'id': i, 'user_id': random.randint(1, USERS), 'created_at': datetime.utcnow()} for i in range(1, SESSIONS + 1)]
+        )
+    engine.dispose()
+
+def run(engine):
+    stop = threading.Event()
+    counts = {'writes': 0, 'reads': 0, 'locked': 0}
+    latencies = []
+    lock = threading.Lock()
+    today = datetime.utcnow().date().isoformat()
+
+    def writer():
+        while not stop.is_set():
+            session_id = random.randint(1, SESSIONS)
+            start = time.perf_counter()
+            try:
+                with engine.begin() as connection:
+                    connection.execute(END_TIMER_SQL, {'completed': 1500, 'focus': 0.9, 'id': session_id})
+                    connection.execute(ROLLUP_SQL, {'user_id': random.randint(1, USERS), 'day': today, 'seconds': 1500})
+                with lock:
+                    counts['writes'] += 1
+                    latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                with lock:
+                    counts['locked'] += 1
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with engine.connect() as connection:
+                    connection.execute(DASHBOARD_SQL, {'user_id': random.randint(1, USERS)}).scalar()
+                with lock:
+                    counts['reads'] += 1
+            except OperationalError:
+                with lock:
+                    counts['locked'] += 1
+            time.sleep(READ_INTERVAL)
+
+    threads = [threading.Thread(target=writer) for _ in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    return counts, p50, p99
+
+def main():
+    workdir = tempfile.mkdtemp()
+    print(f"{WRITERS} writers, {READERS} readers, {DURATION:.0f}s per run\n")
+    print(f"{'configuration':<22}{'writes/s':>10}{'reads/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'locked':>8}")
+
+    for label, configured in (('sqlite defaults', False), ('WAL + pragmas', True)):
+        path = os.path.join(workdir, f"{'configured' if configured else 'default'}.db")
+        build_database(path)
+        url = f"sqlite:///{path}"
+        if configured:
+            engine = create_engine(url, **engine_options(url))
+            install_sqlite_pragmas(engine)
+        else:
+            engine = create_engine(url, connect_args={'check_same_thread': False})
+
+        counts, p50, p99 = run(engine)
+        print(f"{label:<22}{counts['writes'] / DURATION:>10.0f}{counts['reads'] / DURATION:>10.0f}"
+              f"{p50:>9.2f}{p99:>9.2f}{counts['locked']:>8}")
+        engine.dispose()
+
+if __name__ == '__main__':
+    main()
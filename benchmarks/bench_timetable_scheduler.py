@@ -0,0 +1,62 @@
+import os
+import sys
+import random
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.deadlines import Deadline
+from services.timetable_scheduler import TimetableScheduler
+
+# Scheduling time of TimetableScheduler against the number of deadlines and
+# the planning horizon (deadlines spread evenly over it), with a few fixed
+# weekly classes blocking time. "planned" is the share of requested study
+# hours that fit before their due dates.
+#   python benchmarks/bench_timetable_scheduler.py [repeats]
+
+REPEATS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+PRIORITIES = ['low', 'medium', 'medium', 'high', 'critical']
+NOW = datetime(2026, 1, 5, 8, 0)
+
+def make_tasks(n, horizon_days):
+    return [Deadline(i, 1, f"Deadline {i}", f"Subject {i % 12}",
+                     NOW + timedelta(days=random.uniform(1, horizon_days), hours=random.randint(0, 12)),
+                     random.choice(PRIORITIES), random.randint(2, 12)) for i in range(1, n + 1)]
+
+def make_classes(horizon_days):
+    # Three lectures a week, 10:00-12:00 Mon/Wed and 14:00-16:00 Fri
+    busy = []
+    for day in range(horizon_days):
+        date = NOW.date() + timedelta(days=day)
+        start = {0: 10, 2: 10, 4: 14}.get(date.weekday())
+        if start is not None:
+            origin = datetime.combine(date, datetime.min.time())
+            busy.append((origin + timedelta(hours=start), origin + timedelta(hours=start + 2)))
+    return busy
+
+def measure(scheduler, deadlines, horizon_days):
+    random.seed(deadlines * 1000 + horizon_days)
+    tasks = make_tasks(deadlines, horizon_days)
+    busy = make_classes(horizon_days)
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        blocks, unscheduled = scheduler.schedule(tasks, busy, now=NOW)
+        timings.append(time.perf_counter() - start)
+    requested = sum(task.study_hours for task in tasks)
+    planned = sum((b.end - b.start).total_seconds() for b in blocks) / 3600
+    return min(timings), len(blocks), planned / requested
+
+def main():
+    scheduler = TimetableScheduler()
+    print(f"{'deadlines':>10} {'horizon':>8} {'ms':>10} {'blocks':>8} {'planned':>9}")
+    for horizon_days in (7, 30, 120):
+        for deadlines in (5, 20, 100):
+            seconds, blocks, share = measure(scheduler, deadlines, horizon_days)
+            print(f"{deadlines:>10} {horizon_days:>7}d {seconds * 1000:>10.2f} {blocks:>8} {share:>8.0%}")
+    for deadlines in (100, 250, 500, 1000):
+        seconds, blocks, share = measure(scheduler, deadlines, 180)
+        print(f"{deadlines:>10} {180:>7}d {seconds * 1000:>10.2f} {blocks:>8} {share:>8.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.transcript_buffer import TranscriptBuffer
+
+# Compares the old `current_session['transcript'] += ...` pattern against
+# TranscriptBuffer for long lectures. A final result every 3s over 3 hours is
+# 3,600 segments; the faster rates model chattier recognizers.
+#   python benchmarks/bench_transcript_buffer.py
+
+HOURS = 3
+WORDS = ("so the eigenvalues of a symmetric matrix are always real and the eigenvectors "
+         "can be chosen to be orthogonal which is why we diagonalise it this way").split()
+
+def sentences(count):
+    return [' '.join(random.choices(WORDS, k=random.randint(8, 20))) + '.' for _ in range(count)]
+
+def string_concat(results):
+    session = {'transcript': ''}
+    for sentence in results:
+        session['transcript'] += f"[Speaker 0] {sentence} "
+    return session['transcript'].strip()
+
+def transcript_buffer(results):
+    buffer = TranscriptBuffer()
+    for sentence in results:
+        buffer.append(sentence, speaker=0)
+    return buffer.text()
+
+def timed(fn, results):
+    start = time.perf_counter()
+    text = fn(results)
+    return time.perf_counter() - start, len(text)
+
+def main():
+    print(f"{'results/s':>10}{'segments':>10}{'chars':>12}{'str += (ms)':>14}{'buffer (ms)':>14}")
+    for interval in (3.0, 1.0, 0.25):
+        results = sentences(int(HOURS * 3600 / interval))
+        concat_time, chars = timed(string_concat, results)
+        buffer_time, buffer_chars = timed(transcript_buffer, results)
+        assert chars == buffer_chars
+        print(f"{1 / interval:>10.2f}{len(results):>10,}{chars:>12,}{concat_time * 1000:>14.1f}{buffer_time * 1000:>14.1f}")
+
+if __name__ == '__main__':
+    main()
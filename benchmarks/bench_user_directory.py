@@ -0,0 +1,75 @@
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import run_migrations
+from services.user_directory import UserDirectory
+
+# The admin user directory. "load all" is the old admin_users, which read
+# every user for one page; "like scan" is substring search over every row.
+# The directory reads one keyset page of (created_at, id), at any depth, and
+# searches name/email prefixes through the users_fts index.
+#   python benchmarks/bench_user_directory.py [users]
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+FIRST = ['Anna', 'Ben', 'Chloe', 'David', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jonas', 'Kemi', 'Liam']
+LAST = ['Smith', 'Garcia', 'Nguyen', 'Okafor', 'Rossi', 'Schmidt', 'Tanaka', 'Walker', 'Yilmaz', 'Kowalski']
+START = datetime(2024, 1, 1)
+
+def timed(fn, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    random.seed(21)
+    path = os.path.join(tempfile.mkdtemp(), 'bench_users.db')
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (email, password_hash, name, role, created_at, is_active) "
+                                "VALUES (:email, 'x', :name, :role, :created_at, :is_active)"), [{
+            'email': f"user{i}@uni{i % 40}.edu",
+            'name': f"{random.choice(FIRST)} {random.choice(LAST)}{i % 97}",
+            'role': random.choice(['student', 'student', 'student', 'ta', 'admin']),
+            'created_at': START + timedelta(minutes=i * 7),
+            'is_active': random.random() > 0.1
+        } for i in range(USERS)])
+
+    directory = UserDirectory()
+    print(f"{USERS} users")
+    print(f"{'':<34} {'ms':>8} {'rows':>7}")
+    with engine.connect() as connection:
+        seconds, rows = timed(lambda: connection.execute(text("SELECT * FROM users")).fetchall())
+        print(f"{'load all':<34} {seconds * 1000:>8.2f} {len(rows):>7}")
+
+        page = lambda **kw: directory.page(connection=connection, **kw)
+        seconds, result = timed(lambda: page())
+        print(f"{'first page':<34} {seconds * 1000:>8.2f} {len(result['users']):>7}")
+        cursor = None
+        for _ in range(USERS // 100):
+            cursor = page(cursor=cursor, limit=50)['next_cursor']
+        seconds, result = timed(lambda: page(cursor=cursor))
+        print(f"{'page at row ' + str(USERS // 2):<34} {seconds * 1000:>8.2f} {len(result['users']):>7}")
+        seconds, result = timed(lambda: page(role='ta', status='active', cursor=cursor))
+        print(f"{'  same depth, active TAs':<34} {seconds * 1000:>8.2f} {len(result['users']):>7}")
+
+        for query in ['kem', 'elena tana', 'user4999']:
+            seconds, rows = timed(lambda: connection.execute(
+                text("SELECT id FROM users WHERE lower(name) LIKE :q OR lower(email) LIKE :q ORDER BY created_at DESC LIMIT 51"),
+                {'q': f"%{query}%"}).fetchall())
+            print(f"{'like scan ' + repr(query):<34} {seconds * 1000:>8.2f} {len(rows):>7}")
+            seconds, result = timed(lambda: page(query=query))
+            print(f"{'prefix search ' + repr(query):<34} {seconds * 1000:>8.2f} {len(result['users']):>7}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from app import app, db
-from sqlalchemy import text
+from datetime import datetime
+from sqlalchemy import bindparam, text
 from auth.utils import hash_password
+from services.subject_index import subject_index
 
 def create_sample_tas():
     with app.app_context():
@@ -23,9 +25,12 @@ def create_sample_tas():
             password_hash = hash_password('password123')
             
             # Insert user
+            # created_at is set here as the ORM would; the column has no
+            # database default and the user directory pages on it
             result = db.session.execute(text(
-                "INSERT INTO users (name, email, password_hash, role) VALUES (:name, :email, :password_hash, 'ta')"
-            ), {'name': name, 'email': email, 'password_hash': password_hash})
+                "INSERT INTO users (name, email, password_hash, role, created_at) VALUES (:name, :email, :password_hash, 'ta', :created_at)"
+            ).bindparams(bindparam('created_at', type_=db.DateTime)),
+                {'name': name, 'email': email, 'password_hash': password_hash, 'created_at': datetime.utcnow()})
             
             user_id = result.lastrowid
             
@@ -35,6 +40,8 @@ def create_sample_tas():
             ), {'user_id': user_id, 'subjects': subjects, 'bio': bio, 'rating': rating, 'hours': hours, 'image': image})
         
         db.session.commit()
+        # Raw inserts bypass the ORM hooks that keep ta_subjects in sync
+        subject_index.rebuild()
         print(f"Created {len(tas)} TA profiles with images!")
 
 if __name__ == '__main__':
@@ -0,0 +1,58 @@
+import sqlite3
+import zlib
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import Text, TypeDecorator
+
+# Below this many bytes of UTF-8 a note is stored as it is; zlib saves little
+# on short text and the content can be read straight from the table
+COMPRESS_THRESHOLD = 1024
+COMPRESS_LEVEL = 6
+
+def compress_text(value, threshold=COMPRESS_THRESHOLD, level=COMPRESS_LEVEL):
+    if value is None:
+        return None
+    raw = value.encode()
+    if len(raw) < threshold:
+        return value
+    packed = zlib.compress(raw, level)
+    return packed if len(packed) < len(raw) else value
+
+def decompress_text(value):
+    if isinstance(value, (bytes, memoryview)):
+        return zlib.decompress(value).decode()
+    return value
+
+class CompressedText(TypeDecorator):
+    # Text that SQLite stores zlib-compressed once it reaches the threshold.
+    # SQLite keeps a BLOB as-is in a TEXT column, so compressed and plain rows
+    # live side by side and plain-text rows written around the ORM still
+    # load. Other databases compress large text themselves and get it
+    # unchanged.
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value) if dialect.name == 'sqlite' else value
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+# note_text(content) gives SQL the stored text back. The notes_fts triggers
+# and the notes_text view it reads snippets from call it, so a connection
+# without it cannot insert, update or delete notes ("no such function:
+# note_text") or read notes_fts columns and snippets ("SQL logic error").
+# SQLAlchemy engines get it on connect; scripts using sqlite3 directly have
+# to open the database with connect() below, and the sqlite3 shell can
+# only read.
+def add_note_text(dbapi_connection):
+    dbapi_connection.create_function('note_text', 1, decompress_text, deterministic=True)
+    return dbapi_connection
+
+def connect(database, **kwargs):
+    return add_note_text(sqlite3.connect(database, **kwargs))
+
+@event.listens_for(Engine, 'connect')
+def register_note_text(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        add_note_text(dbapi_connection)
@@ -0,0 +1,64 @@
+import os
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URL = 'sqlite:///learning_companion.db'
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, so timer completions and note saves no longer queue behind
+# page loads; NORMAL sync is durable in WAL mode except across power loss.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,          # ms to wait on a locked database before erroring
+    'cache_size': -64000,          # negative means KiB, so ~64MB of page cache
+    'mmap_size': 268435456,        # 256MB memory-mapped reads
+    'temp_store': 'MEMORY',
+}
+
+def database_url():
+    url = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def engine_options(url):
+    # Eventlet runs many greenlets per worker, each holding a connection for
+    # the length of a request, so the pool is sized well above the default 5
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+    if url.startswith('sqlite'):
+        if ':memory:' in url or url in ('sqlite://', 'sqlite:///'):
+            # In-memory databases only exist per connection, pooling them is wrong
+            return {}
+        # Connections are handed between greenlets, which sqlite3 treats as threads
+        options['connect_args'] = {'check_same_thread': False}
+    else:
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = 1800
+    return options
+
+def set_sqlite_pragmas(dbapi_connection, connection_record=None, pragmas=None):
+    cursor = dbapi_connection.cursor()
+    for name, value in (pragmas or SQLITE_PRAGMAS).items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def install_sqlite_pragmas(engine, pragmas=None):
+    if engine.dialect.name != 'sqlite':
+        return
+    event.listen(engine, 'connect', lambda conn, record: set_sqlite_pragmas(conn, record, pragmas))
+
+def configure_database(app, db):
+    url = database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+    db.init_app(app)
+
+    # Engines are created by init_app but do not connect until first use, so
+    # the listener is in place before any connection exists
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
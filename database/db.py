@@ -1,9 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+import hashlib
 from datetime import datetime
+from database.compression import CompressedText
 
 db = SQLAlchemy()
 
+# Paged lists order on COALESCE(created_at, '') where SQLite keeps timestamps
+# as text (services/keyset.py); other databases index created_at itself
+def _not_sqlite(ddl, target, bind, **kw):
+    return kw['dialect'].name != 'sqlite'
+
+def position_indexes(name, *columns):
+    return (
+        db.Index(f'ix_{name}_position', *columns, db.text("COALESCE(created_at, '')"), 'id').ddl_if(dialect='sqlite'),
+        db.Index(f'ix_{name}_created', *columns, 'created_at', 'id').ddl_if(callable_=_not_sqlite),
+    )
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -13,6 +26,10 @@ class User(UserMixin, db.Model):
     role = db.Column(db.String(20), nullable=False, default='student')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    __table_args__ = (
+        *position_indexes('users'),
+        *position_indexes('users_role', 'role'),
+    )
 
 class StudySession(db.Model):
     __tablename__ = 'study_sessions'
@@ -24,6 +41,10 @@ class StudySession(db.Model):
     interruptions = db.Column(db.Integer, default=0)
     focus_score = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_study_sessions_user_created', 'user_id', 'created_at'),
+        db.Index('ix_study_sessions_created', 'created_at'),
+    )
 
 class TAProfile(db.Model):
     __tablename__ = 'ta_profiles'
@@ -34,7 +55,26 @@ class TAProfile(db.Model):
     rating = db.Column(db.Float, default=0.0)
     total_hours = db.Column(db.Integer, default=0)
     availability = db.Column(db.Text)
+    profile_image = db.Column(db.String(500))
     user = db.relationship('User', backref='ta_profile')
+    __table_args__ = (
+        db.Index('ix_ta_profiles_score_user', db.text('COALESCE(rating, 0)'), 'user_id'),
+        db.Index('ix_ta_profiles_user', 'user_id'),
+    )
+
+class Subject(db.Model):
+    __tablename__ = 'subjects'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+
+class TASubject(db.Model):
+    __tablename__ = 'ta_subjects'
+    ta_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'), primary_key=True)
+    subject = db.relationship('Subject')
+    __table_args__ = (
+        db.Index('ix_ta_subjects_subject', 'subject_id', 'ta_id'),
+    )
 
 class Match(db.Model):
     __tablename__ = 'matches'
@@ -45,16 +85,44 @@ class Match(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     student = db.relationship('User', foreign_keys=[student_id])
     ta = db.relationship('User', foreign_keys=[ta_id])
+    __table_args__ = (
+        db.Index('ix_matches_ta_status', 'ta_id', 'status'),
+        db.Index('ix_matches_student_ta', 'student_id', 'ta_id'),
+        db.Index('ix_matches_status', 'status'),
+        db.Index('ix_matches_created', 'created_at'),
+    )
+
+class SwipePass(db.Model):
+    __tablename__ = 'swipe_passes'
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    ta_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Note(db.Model):
     __tablename__ = 'notes'
     id = db.Column(db.Integer, primary_key=True)
     ta_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text)
+    # Transcripts run to many kilobytes; lists never need them, so the body
+    # is only loaded (and decompressed) when a note is opened
+    content = db.deferred(db.Column(CompressedText))
+    content_length = db.Column(db.Integer, default=0)
+    content_hash = db.Column(db.String(40))
     subject = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     ta = db.relationship('User', backref='notes')
+    __table_args__ = (
+        db.Index('ix_notes_ta_created', 'ta_id', 'created_at'),
+        db.Index('ix_notes_subject', 'subject'),
+        *position_indexes('notes'),
+    )
+
+    @db.validates('content')
+    def track_content(self, key, content):
+        self.content_length = len(content or '')
+        self.content_hash = hashlib.sha1((content or '').encode()).hexdigest()
+        return content
 
 class LiveSession(db.Model):
     __tablename__ = 'live_sessions'
@@ -66,6 +134,10 @@ class LiveSession(db.Model):
     duration = db.Column(db.Integer)
     is_active = db.Column(db.Boolean, default=False)
     ta = db.relationship('User', backref='live_sessions')
+    __table_args__ = (
+        db.Index('ix_live_sessions_active', 'is_active', sqlite_where=db.text('is_active = 1'), postgresql_where=db.text('is_active')),
+        db.Index('ix_live_sessions_ta', 'ta_id'),
+    )
 
 class StudentPreference(db.Model):
     __tablename__ = 'student_preferences'
@@ -76,4 +148,74 @@ class StudentPreference(db.Model):
     deadlines = db.Column(db.Text)
     learning_style = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    user = db.relationship('User', backref='preferences')
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    user = db.relationship('User', backref='preferences')
+    subject_preferences = db.relationship('StudentSubjectPreference', order_by='StudentSubjectPreference.position',
+                                          cascade='all, delete-orphan')
+    __table_args__ = (
+        db.Index('ix_student_preferences_updated', 'updated_at'),
+    )
+
+class StudentSubjectPreference(db.Model):
+    __tablename__ = 'student_subject_preferences'
+    student_id = db.Column(db.Integer, db.ForeignKey('student_preferences.user_id'), primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'), primary_key=True)
+    confidence = db.Column(db.Integer, nullable=False, default=3)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    subject = db.relationship('Subject')
+    __table_args__ = (
+        db.Index('ix_student_subject_preferences_subject', 'subject_id', 'confidence', 'student_id'),
+    )
+
+class RecommendationRun(db.Model):
+    __tablename__ = 'recommendation_runs'
+    id = db.Column(db.Integer, primary_key=True)
+    mode = db.Column(db.String(20), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime)
+    students = db.Column(db.Integer, default=0)
+
+class TARecommendation(db.Model):
+    __tablename__ = 'ta_recommendations'
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    ta_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    version = db.Column(db.Integer, db.ForeignKey('recommendation_runs.id'), nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False)
+    __table_args__ = (
+        db.Index('ix_ta_recommendations_student_ta', 'student_id', 'ta_id'),
+    )
+
+class StudyPlan(db.Model):
+    __tablename__ = 'study_plans'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    base_version = db.Column(db.Integer, nullable=False, default=1)
+    generated_at = db.Column(db.DateTime, nullable=False)
+
+class StudyPlanBlock(db.Model):
+    __tablename__ = 'study_plan_blocks'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    deadline_id = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    created_version = db.Column(db.Integer, nullable=False)
+    removed_version = db.Column(db.Integer)
+    __table_args__ = (
+        db.Index('ix_study_plan_blocks_user', 'user_id', 'removed_version', 'start_time'),
+    )
+
+class StudyStatRollup(db.Model):
+    __tablename__ = 'study_stat_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    timer_type = db.Column(db.String(50), nullable=False)
+    total_seconds = db.Column(db.Integer, nullable=False, default=0)
+    session_count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', 'timer_type', name='uq_study_stat_rollups_bucket'),
+        db.Index('ix_study_stat_rollups_day', 'day'),
+    )
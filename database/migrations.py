@@ -0,0 +1,675 @@
+import hashlib
+import json
+import sys
+from datetime import datetime
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, Float, Boolean, DateTime, Date,
+    ForeignKey, Index, UniqueConstraint, bindparam, inspect, text, func
+)
+from sqlalchemy.sql.expression import false
+from database.compression import COMPRESS_THRESHOLD, compress_text
+
+# Versioned schema migrations. Each entry is (version, name, steps) and is
+# applied at most once per database; applied versions are recorded in
+# schema_version. A step is either a SQL string or a callable taking the
+# connection, and must be safe to re-run against a database that already
+# has the change (IF NOT EXISTS, checkfirst, column checks).
+#
+# Table definitions below are frozen copies of the schema at the version that
+# introduced them, so later model changes never alter what an old migration
+# creates.
+
+schema = MetaData()
+
+users = Table(
+    'users', schema,
+    Column('id', Integer, primary_key=True),
+    Column('email', String(120), unique=True, nullable=False),
+    Column('password_hash', String(128), nullable=False),
+    Column('name', String(80), nullable=False),
+    Column('role', String(20), nullable=False),
+    Column('created_at', DateTime),
+    Column('is_active', Boolean),
+)
+
+study_sessions = Table(
+    'study_sessions', schema,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('timer_type', String(50), nullable=False),
+    Column('duration', Integer, nullable=False),
+    Column('completed_duration', Integer),
+    Column('interruptions', Integer),
+    Column('focus_score', Float),
+    Column('created_at', DateTime),
+)
+
+ta_profiles = Table(
+    'ta_profiles', schema,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('subjects', Text),
+    Column('bio', Text),
+    Column('rating', Float),
+    Column('total_hours', Integer),
+    Column('availability', Text),
+)
+
+matches = Table(
+    'matches', schema,
+    Column('id', Integer, primary_key=True),
+    Column('student_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('ta_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('status', String(20)),
+    Column('created_at', DateTime),
+)
+
+notes = Table(
+    'notes', schema,
+    Column('id', Integer, primary_key=True),
+    Column('ta_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('title', String(200), nullable=False),
+    Column('content', Text),
+    Column('subject', String(100)),
+    Column('created_at', DateTime),
+)
+
+live_sessions = Table(
+    'live_sessions', schema,
+    Column('id', Integer, primary_key=True),
+    Column('ta_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('title', String(200), nullable=False),
+    Column('description', Text),
+    Column('start_time', DateTime),
+    Column('duration', Integer),
+    Column('is_active', Boolean),
+)
+
+deadlines = Table(
+    'deadlines', schema,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('title', String(200), nullable=False),
+    Column('subject', String(100), nullable=False),
+    Column('due_date', DateTime, nullable=False),
+    Column('priority', String(20), server_default='medium'),
+    Column('study_hours', Integer, server_default='5'),
+    Column('description', Text),
+    Column('completed', Boolean, server_default=false()),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+)
+
+timetable_entries = Table(
+    'timetable_entries', schema,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('title', String(200), nullable=False),
+    Column('start_time', DateTime, nullable=False),
+    Column('end_time', DateTime, nullable=False),
+    Column('subject', String(100)),
+    Column('description', Text),
+    Column('duration', String(50)),
+    Column('priority', String(20), server_default='medium'),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+)
+
+student_preferences = Table(
+    'student_preferences', schema,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False, unique=True),
+    Column('subjects', Text, nullable=False),
+    Column('confidence_levels', Text, nullable=False),
+    Column('deadlines', Text),
+    Column('learning_style', String(50)),
+    Column('created_at', DateTime),
+)
+
+study_stat_rollups = Table(
+    'study_stat_rollups', schema,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('day', Date, nullable=False),
+    Column('timer_type', String(50), nullable=False),
+    Column('total_seconds', Integer, nullable=False),
+    Column('session_count', Integer, nullable=False),
+    UniqueConstraint('user_id', 'day', 'timer_type', name='uq_study_stat_rollups_bucket'),
+)
+
+subjects = Table(
+    'subjects', schema,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False, unique=True),
+)
+
+ta_subjects = Table(
+    'ta_subjects', schema,
+    Column('ta_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('subject_id', Integer, ForeignKey('subjects.id'), primary_key=True),
+    Index('ix_ta_subjects_subject', 'subject_id', 'ta_id'),
+)
+
+swipe_passes = Table(
+    'swipe_passes', schema,
+    Column('student_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('ta_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('created_at', DateTime),
+)
+
+recommendation_runs = Table(
+    'recommendation_runs', schema,
+    Column('id', Integer, primary_key=True),
+    Column('mode', String(20), nullable=False),
+    Column('started_at', DateTime, nullable=False),
+    Column('finished_at', DateTime),
+    Column('students', Integer, server_default='0'),
+)
+
+ta_recommendations = Table(
+    'ta_recommendations', schema,
+    Column('student_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('position', Integer, primary_key=True),
+    Column('ta_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('score', Float, nullable=False),
+    Column('version', Integer, ForeignKey('recommendation_runs.id'), nullable=False),
+    Column('computed_at', DateTime, nullable=False),
+    Index('ix_ta_recommendations_student_ta', 'student_id', 'ta_id'),
+)
+
+student_subject_preferences = Table(
+    'student_subject_preferences', schema,
+    Column('student_id', Integer, ForeignKey('student_preferences.user_id'), primary_key=True),
+    Column('subject_id', Integer, ForeignKey('subjects.id'), primary_key=True),
+    Column('confidence', Integer, nullable=False, server_default='3'),
+    Column('position', Integer, nullable=False, server_default='0'),
+    Index('ix_student_subject_preferences_subject', 'subject_id', 'confidence', 'student_id'),
+)
+
+study_plans = Table(
+    'study_plans', schema,
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('version', Integer, nullable=False),
+    Column('base_version', Integer, nullable=False),
+    Column('generated_at', DateTime, nullable=False),
+)
+
+study_plan_blocks = Table(
+    'study_plan_blocks', schema,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('deadline_id', Integer, ForeignKey('deadlines.id'), nullable=False),
+    Column('start_time', DateTime, nullable=False),
+    Column('end_time', DateTime, nullable=False),
+    Column('created_version', Integer, nullable=False),
+    Column('removed_version', Integer),
+    Index('ix_study_plan_blocks_user', 'user_id', 'removed_version', 'start_time'),
+)
+
+# SQLite SQL for a timestamp in the text form SQLAlchemy stores DateTime in
+# there ('2024-01-01 09:30:00.000000'), so rewritten rows sort and compare
+# like rows the ORM wrote
+ORM_FORMAT = "strftime('%Y-%m-%d %H:%M:%f000', {value})"
+
+def create_tables(*tables):
+    def step(connection):
+        schema.create_all(connection, tables=list(tables), checkfirst=True)
+    return step
+
+def sqlite_only(*statements):
+    def step(connection):
+        if connection.dialect.name == 'sqlite':
+            for sql in statements:
+                connection.execute(text(sql))
+    return step
+
+def add_column(table_name, column_name, ddl):
+    def step(connection):
+        existing = {c['name'] for c in inspect(connection).get_columns(table_name)}
+        if column_name not in existing:
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}"))
+    return step
+
+# Frozen copy of services.subjects.parse_subjects as of migration 5, so the
+# taxonomy an old migration builds does not follow later parser changes
+FROZEN_SUBJECT_ALIASES = {
+    'math': 'mathematics',
+    'maths': 'mathematics',
+    'cs': 'computer science',
+    'comp sci': 'computer science',
+    'bio': 'biology',
+    'chem': 'chemistry',
+    'stats': 'statistics',
+    'ml': 'machine learning',
+}
+
+def frozen_canonical_subject(subject):
+    name = ' '.join(subject.lower().split())
+    return FROZEN_SUBJECT_ALIASES.get(name, name)
+
+def frozen_parse_subjects(subjects):
+    if not subjects:
+        return []
+    if isinstance(subjects, str):
+        stripped = subjects.strip()
+        if stripped.startswith('['):
+            try:
+                subjects = json.loads(stripped)
+            except ValueError:
+                subjects = stripped.split(',')
+        else:
+            subjects = stripped.split(',')
+    names = []
+    for subject in subjects:
+        name = frozen_canonical_subject(subject)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def frozen_subject_ids(connection, names):
+    names = list(names)
+    if not names:
+        return {}
+    select_ids = text("SELECT name, id FROM subjects WHERE name IN :names").bindparams(bindparam('names', expanding=True))
+    ids = dict(connection.execute(select_ids, {'names': names}).fetchall())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        connection.execute(text("INSERT INTO subjects (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
+                           [{'name': name} for name in missing])
+        ids.update(connection.execute(select_ids, {'names': missing}).fetchall())
+    return ids
+
+def populate_ta_subjects(connection):
+    # ta_subjects from every TAProfile.subjects text
+    parsed = [(ta_id, frozen_parse_subjects(subjects))
+              for ta_id, subjects in connection.execute(text("SELECT user_id, subjects FROM ta_profiles"))]
+    connection.execute(text("DELETE FROM ta_subjects"))
+    ids = frozen_subject_ids(connection, {name for _, names in parsed for name in names})
+    pairs = {(ta_id, ids[name]) for ta_id, names in parsed for name in names}
+    if pairs:
+        connection.execute(text("INSERT INTO ta_subjects (ta_id, subject_id) VALUES (:ta_id, :subject_id)"),
+                           [{'ta_id': ta_id, 'subject_id': subject_id} for ta_id, subject_id in pairs])
+
+# Frozen copy of services.subjects.parse_confidence as of migration 8
+def frozen_parse_confidence(confidence_levels):
+    if isinstance(confidence_levels, str):
+        try:
+            confidence_levels = json.loads(confidence_levels)
+        except ValueError:
+            return {}
+    if not isinstance(confidence_levels, dict):
+        return {}
+    levels = {}
+    for subject, level in confidence_levels.items():
+        try:
+            level = min(max(int(level), 1), 5)
+        except (TypeError, ValueError):
+            level = 3
+        levels[frozen_canonical_subject(subject)] = level
+    return levels
+
+def populate_student_subjects(connection):
+    # student_subject_preferences from the JSON subjects/confidence_levels
+    # columns of every student_preferences row
+    parsed = [(student_id, frozen_parse_subjects(subjects), frozen_parse_confidence(confidence_levels))
+              for student_id, subjects, confidence_levels in connection.execute(
+                  text("SELECT user_id, subjects, confidence_levels FROM student_preferences"))]
+    connection.execute(text("DELETE FROM student_subject_preferences"))
+    ids = frozen_subject_ids(connection, {name for _, names, _ in parsed for name in names})
+    rows = [{
+        'student_id': student_id,
+        'subject_id': ids[name],
+        'confidence': confidence.get(name, 3),
+        'position': position
+    } for student_id, names, confidence in parsed for position, name in enumerate(names)]
+    if rows:
+        connection.execute(text("""
+            INSERT INTO student_subject_preferences (student_id, subject_id, confidence, position)
+            VALUES (:student_id, :subject_id, :confidence, :position)
+        """), rows)
+
+def backfill_note_hashes(connection, batch_size=500):
+    # Hashed in Python to match Note.content_hash; SQLite has no SHA-1
+    last_id = 0
+    while True:
+        rows = connection.execute(text("""
+            SELECT id, content FROM notes WHERE id > :last_id AND content_hash IS NULL ORDER BY id LIMIT :limit
+        """), {'last_id': last_id, 'limit': batch_size}).fetchall()
+        if not rows:
+            return
+        connection.execute(text("UPDATE notes SET content_hash = :hash WHERE id = :id"), [
+            {'id': note_id, 'hash': hashlib.sha1((content or '').encode()).hexdigest()} for note_id, content in rows
+        ])
+        last_id = rows[-1][0]
+
+def create_active_live_sessions_index(connection):
+    # Partial index predicates have to match the query literally, and SQLite
+    # stores booleans as integers while Postgres has a real boolean type
+    predicate = 'is_active = 1' if connection.dialect.name == 'sqlite' else 'is_active'
+    connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_live_sessions_active ON live_sessions (is_active) WHERE {predicate}"))
+
+def create_search_index(name, table, columns, prefix='2 3', content=None, functions=None):
+    # SQLite only: an external-content FTS5 index over the table's columns,
+    # kept in sync by triggers and built from the existing rows. Searches on
+    # other databases fall back to LIKE. content names a view to read the
+    # indexed text from instead of the table, and functions maps a column to
+    # the SQL function the triggers pass it through to match that view.
+    functions = functions or {}
+    def step(connection):
+        if connection.dialect.name != 'sqlite':
+            return
+        cols = ', '.join(columns)
+        value = lambda row, c: f'{functions[c]}({row}.{c})' if c in functions else f'{row}.{c}'
+        new = ', '.join(value('new', c) for c in columns)
+        old = ', '.join(value('old', c) for c in columns)
+        options = f", prefix='{prefix}'" if prefix else ''
+        for sql in [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({cols}, content='{content or table}', content_rowid='id'{options})",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {name} (rowid, {cols}) VALUES (new.id, {new}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {name} ({name}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+            f"INSERT INTO {name} ({name}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {name} (rowid, {cols}) VALUES (new.id, {new}); END",
+            f"INSERT INTO {name} ({name}) VALUES ('rebuild')",
+        ]:
+            connection.execute(text(sql))
+    return step
+
+def drop_search_index(name):
+    def step(connection):
+        if connection.dialect.name != 'sqlite':
+            return
+        for suffix in ('ai', 'ad', 'au'):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {name}_{suffix}"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    return step
+
+def compress_note_content(connection, batch_size=200):
+    # Same encoding as the CompressedText column type; other databases keep
+    # plain text
+    if connection.dialect.name != 'sqlite':
+        return
+    last_id = 0
+    while True:
+        rows = connection.execute(text("""
+            SELECT id, content FROM notes
+            WHERE id > :last_id AND typeof(content) = 'text' AND length(CAST(content AS BLOB)) >= :threshold
+            ORDER BY id LIMIT :limit
+        """), {'last_id': last_id, 'threshold': COMPRESS_THRESHOLD, 'limit': batch_size}).fetchall()
+        if not rows:
+            return
+        connection.execute(text("UPDATE notes SET content = :content WHERE id = :id"), [
+            {'id': note_id, 'content': compress_text(content)} for note_id, content in rows
+        ])
+        last_id = rows[-1][0]
+
+def create_note_text_view(connection):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(
+            "CREATE VIEW IF NOT EXISTS notes_text AS SELECT id, title, note_text(content) AS content FROM notes"
+        ))
+
+MIGRATIONS = [
+    # Everything app.py used to create at import time via db.create_all()
+    # and its raw CREATE TABLE statements
+    (0, 'baseline_schema', [
+        create_tables(users, study_sessions, ta_profiles, matches, notes, live_sessions, deadlines, timetable_entries),
+    ]),
+    (1, 'hot_query_indexes', [
+        # student_dashboard / student_stats / admin_dashboard
+        "CREATE INDEX IF NOT EXISTS ix_study_sessions_user_created ON study_sessions (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_study_sessions_created ON study_sessions (created_at)",
+        # ta_dashboard / ta_matches
+        "CREATE INDEX IF NOT EXISTS ix_matches_ta_status ON matches (ta_id, status)",
+        # student_timetable lists every deadline, generate_timetable only pending ones
+        "CREATE INDEX IF NOT EXISTS ix_deadlines_user_due ON deadlines (user_id, due_date)",
+        "CREATE INDEX IF NOT EXISTS ix_deadlines_user_completed_due ON deadlines (user_id, completed, due_date)",
+        "CREATE INDEX IF NOT EXISTS ix_timetable_entries_user_start ON timetable_entries (user_id, start_time)",
+        # live_class only ever asks for active sessions, which are a tiny fraction
+        create_active_live_sessions_index,
+        "CREATE INDEX IF NOT EXISTS ix_live_sessions_ta ON live_sessions (ta_id)",
+        "CREATE INDEX IF NOT EXISTS ix_notes_ta_created ON notes (ta_id, created_at)",
+    ]),
+    # Previously the ALTER TABLE at the top of migrate_and_seed.py
+    (2, 'ta_profile_image', [
+        add_column('ta_profiles', 'profile_image', "VARCHAR(500) DEFAULT 'https://images.unsplash.com/photo-1494790108755-2616b612b786?w=400&h=400&fit=crop&crop=face'"),
+    ]),
+    # Previously add_preferences_table.py
+    (3, 'student_preferences', [
+        create_tables(student_preferences),
+    ]),
+    (4, 'study_stat_rollups', [
+        create_tables(study_stat_rollups),
+    ]),
+    # Normalized TAProfile.subjects, backing the in-memory subject index
+    (5, 'subject_taxonomy', [
+        create_tables(subjects, ta_subjects),
+        populate_ta_subjects,
+    ]),
+    # /student/swipe feed: keyset order plus the per-student exclusion probes
+    (6, 'swipe_feed', [
+        create_tables(swipe_passes),
+        "CREATE INDEX IF NOT EXISTS ix_matches_student_ta ON matches (student_id, ta_id)",
+        "CREATE INDEX IF NOT EXISTS ix_ta_profiles_rating_user ON ta_profiles (rating, user_id)",
+    ]),
+    # Precomputed rankings; updated_at lets reruns pick only changed students
+    (7, 'ta_recommendations', [
+        add_column('student_preferences', 'updated_at', 'TIMESTAMP'),
+        "UPDATE student_preferences SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS ix_student_preferences_updated ON student_preferences (updated_at)",
+        create_tables(recommendation_runs, ta_recommendations),
+        "CREATE INDEX IF NOT EXISTS ix_ta_profiles_user ON ta_profiles (user_id)",
+    ]),
+    # StudentPreference.subjects/confidence_levels JSON, one row per subject
+    (8, 'student_subject_preferences', [
+        create_tables(student_subject_preferences),
+        populate_student_subjects,
+    ]),
+    # Ties planned study blocks to their deadline so the scheduler can tell
+    # them apart from fixed entries and count past ones as hours studied
+    (9, 'timetable_entry_deadline', [
+        add_column('timetable_entries', 'deadline_id', 'INTEGER REFERENCES deadlines (id)'),
+        "CREATE INDEX IF NOT EXISTS ix_timetable_entries_user_deadline ON timetable_entries (user_id, deadline_id, end_time)",
+    ]),
+    # Marks rows written by apply-timetable as movable study blocks; every
+    # existing row came from there
+    (10, 'timetable_entry_type', [
+        add_column('timetable_entries', 'entry_type', 'VARCHAR(20)'),
+        "UPDATE timetable_entries SET entry_type = 'study' WHERE entry_type IS NULL",
+    ]),
+    # Persisted generated plans, so deadline changes re-plan incrementally
+    (11, 'study_plans', [
+        create_tables(study_plans, study_plan_blocks),
+    ]),
+    # admin_dashboard / admin_analytics counters and per-day series
+    (12, 'admin_metrics_indexes', [
+        "CREATE INDEX IF NOT EXISTS ix_matches_status ON matches (status)",
+        "CREATE INDEX IF NOT EXISTS ix_matches_created ON matches (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_study_stat_rollups_day ON study_stat_rollups (day)",
+    ]),
+    # /api/admin/users pages on (created_at, id), which must not be NULL, and
+    # searches names and emails by prefix
+    (13, 'user_directory', [
+        "UPDATE users SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS ix_users_created ON users (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_users_role_created ON users (role, created_at, id)",
+        create_search_index('users_fts', 'users', ['name', 'email']),
+    ]),
+    # /api/notes/search. No prefix indexes: they would multiply the size of
+    # the index over long transcripts, and FTS5 answers the occasional
+    # prefix term from the main index anyway
+    (14, 'notes_search', [
+        create_search_index('notes_fts', 'notes', ['title', 'content'], prefix=None),
+        # The subject filter is a substring match, so it scans subjects; the
+        # index lets it do that without reading every transcript
+        "CREATE INDEX IF NOT EXISTS ix_notes_subject ON notes (subject)",
+    ]),
+    # Note lists page on (created_at, id) and show each note's length
+    # without reading its content
+    (15, 'note_listing', [
+        add_column('notes', 'content_length', 'INTEGER DEFAULT 0'),
+        "UPDATE notes SET content_length = COALESCE(length(content), 0)",
+        "UPDATE notes SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS ix_notes_created ON notes (created_at, id)",
+    ]),
+    # ETag and Last-Modified for /api/note/<id>, answered without reading
+    # the note's content
+    (16, 'note_validators', [
+        add_column('notes', 'content_hash', 'VARCHAR(40)'),
+        add_column('notes', 'updated_at', 'DATETIME'),
+        "UPDATE notes SET updated_at = created_at WHERE updated_at IS NULL",
+        backfill_note_hashes,
+    ]),
+    # Long transcripts are stored zlib-compressed (database/compression.py).
+    # notes_fts is rebuilt to index the decompressed text: it reads snippets
+    # through the notes_text view and its triggers decompress with
+    # note_text(). The old index is dropped first so compressing the rows
+    # does not reindex each one. Run with --vacuum to give the freed pages
+    # back to the filesystem.
+    (17, 'compressed_note_content', [
+        drop_search_index('notes_fts'),
+        compress_note_content,
+        create_note_text_view,
+        create_search_index('notes_fts', 'notes', ['title', 'content'], prefix=None,
+                            content='notes_text', functions={'content': 'note_text'}),
+    ]),
+    # The swipe feed orders unrated TAs as rating 0 so they stay on the
+    # keyset walk; the index has to be on the same expression
+    (18, 'swipe_feed_unrated', [
+        "CREATE INDEX IF NOT EXISTS ix_ta_profiles_score_user ON ta_profiles (COALESCE(rating, 0), user_id)",
+        "DROP INDEX IF EXISTS ix_ta_profiles_rating_user",
+    ]),
+    # On SQLite the user directory and note lists resume from the created_at
+    # text of the last row (services/keyset.py), so timestamps backfilled
+    # without microseconds by 13 and 15 are rewritten in the ORM's format to
+    # sort with the rest. NULL created_at sorts as '' and the indexes follow.
+    # Other databases store real timestamps and keep the (created_at, id)
+    # indexes.
+    (19, 'keyset_positions', [
+        sqlite_only(
+            f"UPDATE users SET created_at = {ORM_FORMAT.format(value='created_at')} WHERE length(created_at) = 19",
+            f"UPDATE notes SET created_at = {ORM_FORMAT.format(value='created_at')} WHERE length(created_at) = 19",
+            "CREATE INDEX IF NOT EXISTS ix_users_position ON users (COALESCE(created_at, ''), id)",
+            "CREATE INDEX IF NOT EXISTS ix_users_role_position ON users (role, COALESCE(created_at, ''), id)",
+            "CREATE INDEX IF NOT EXISTS ix_notes_position ON notes (COALESCE(created_at, ''), id)",
+            "DROP INDEX IF EXISTS ix_users_created",
+            "DROP INDEX IF EXISTS ix_users_role_created",
+            "DROP INDEX IF EXISTS ix_notes_created",
+        ),
+    ]),
+]
+
+# The hot query of each route, paired with the index EXPLAIN QUERY PLAN must report
+HOT_QUERIES = [
+    ('student_dashboard', "SELECT timer_type FROM study_sessions WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 1",
+     {'user_id': 1}, 'ix_study_sessions_user_created'),
+    ('admin_dashboard', "SELECT count(*) FROM study_sessions WHERE created_at >= :since",
+     {'since': '2000-01-01 00:00:00'}, 'ix_study_sessions_created'),
+    ('ta_dashboard', "SELECT * FROM matches WHERE ta_id = :ta_id AND status = 'accepted'",
+     {'ta_id': 1}, 'ix_matches_ta_status'),
+    ('student_timetable', "SELECT * FROM deadlines WHERE user_id = :user_id ORDER BY due_date",
+     {'user_id': 1}, 'ix_deadlines_user_due'),
+    ('generate_timetable', "SELECT * FROM deadlines WHERE user_id = :user_id AND completed = :completed ORDER BY due_date",
+     {'user_id': 1, 'completed': False}, 'ix_deadlines_user_completed_due'),
+    ('student_timetable_entries', "SELECT * FROM timetable_entries WHERE user_id = :user_id ORDER BY start_time",
+     {'user_id': 1}, 'ix_timetable_entries_user_start'),
+    ('live_class', "SELECT * FROM live_sessions WHERE is_active = 1",
+     {}, 'ix_live_sessions_active'),
+    ('ta_live_class', "SELECT * FROM live_sessions WHERE ta_id = :ta_id",
+     {'ta_id': 1}, 'ix_live_sessions_ta'),
+    ('ta_notes', "SELECT * FROM notes WHERE ta_id = :ta_id",
+     {'ta_id': 1}, 'ix_notes_ta_created'),
+    ('notes', "SELECT id FROM notes WHERE COALESCE(created_at, '') <= :position AND (COALESCE(created_at, ''), id) < (:position, :id) ORDER BY COALESCE(created_at, '') DESC, id DESC LIMIT 24",
+     {'position': '2100-01-01 00:00:00.000000', 'id': 0}, 'ix_notes_position'),
+    ('notes_search_subject', "SELECT id FROM notes WHERE lower(subject) LIKE :subject",
+     {'subject': '%physics%'}, 'ix_notes_subject'),
+    ('swipe', "SELECT user_id FROM ta_profiles ORDER BY COALESCE(rating, 0) DESC, user_id DESC LIMIT 10",
+     {}, 'ix_ta_profiles_score_user'),
+    ('swipe_exclusion', "SELECT 1 FROM matches WHERE student_id = :student_id AND ta_id = :ta_id",
+     {'student_id': 1, 'ta_id': 1}, 'ix_matches_student_ta'),
+    ('swipe_recommended', "SELECT ta_id FROM ta_recommendations WHERE student_id = :student_id ORDER BY position LIMIT 10",
+     {'student_id': 1}, 'sqlite_autoindex_ta_recommendations_1'),
+    ('swipe_recommended_exclusion', "SELECT 1 FROM ta_recommendations WHERE student_id = :student_id AND ta_id = :ta_id",
+     {'student_id': 1, 'ta_id': 1}, 'ix_ta_recommendations_student_ta'),
+    ('low_confidence_students', "SELECT student_id FROM student_subject_preferences WHERE subject_id = :subject_id AND confidence <= :confidence",
+     {'subject_id': 1, 'confidence': 2}, 'ix_student_subject_preferences_subject'),
+    ('admin_match_counts', "SELECT status, COUNT(*) FROM matches GROUP BY status",
+     {}, 'ix_matches_status'),
+    ('admin_matches_per_day', "SELECT date(created_at), COUNT(*) FROM matches WHERE created_at >= :since GROUP BY date(created_at)",
+     {'since': '2000-01-01 00:00:00'}, 'ix_matches_created'),
+    ('admin_study_per_day', "SELECT day, SUM(total_seconds) FROM study_stat_rollups WHERE day >= :since GROUP BY day",
+     {'since': '2000-01-01'}, 'ix_study_stat_rollups_day'),
+    ('admin_users', "SELECT id FROM users WHERE COALESCE(created_at, '') <= :position AND (COALESCE(created_at, ''), id) < (:position, :id) ORDER BY COALESCE(created_at, '') DESC, id DESC LIMIT 50",
+     {'position': '2100-01-01 00:00:00.000000', 'id': 0}, 'ix_users_position'),
+    ('admin_users_role', "SELECT id FROM users WHERE role = :role AND COALESCE(created_at, '') <= :position AND (COALESCE(created_at, ''), id) < (:position, :id) ORDER BY COALESCE(created_at, '') DESC, id DESC LIMIT 50",
+     {'role': 'student', 'position': '2100-01-01 00:00:00.000000', 'id': 0}, 'ix_users_role_position'),
+]
+
+def _ensure_version_table(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    """))
+
+def applied_versions(engine):
+    with engine.begin() as connection:
+        _ensure_version_table(connection)
+        return {row[0] for row in connection.execute(text("SELECT version FROM schema_version"))}
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return sorted((m for m in MIGRATIONS if m[0] not in applied), key=lambda m: m[0])
+
+def run_migrations(engine):
+    applied = []
+    for version, name, steps in pending_migrations(engine):
+        # One transaction per migration so a failure leaves earlier ones recorded
+        with engine.begin() as connection:
+            for step in steps:
+                if callable(step):
+                    step(connection)
+                else:
+                    connection.execute(text(step))
+            connection.execute(
+                text("INSERT INTO schema_version (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {'version': version, 'name': name, 'applied_at': datetime.utcnow()}
+            )
+        applied.append((version, name))
+    return applied
+
+def explain_hot_queries(engine):
+    results = []
+    with engine.connect() as connection:
+        for route, sql, params, index_name in HOT_QUERIES:
+            plan = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params)]
+            results.append({
+                'route': route,
+                'index': index_name,
+                'plan': plan,
+                'uses_index': any(index_name in step for step in plan)
+            })
+    return results
+
+if __name__ == '__main__':
+    from app import app, db
+
+    with app.app_context():
+        for version, name in run_migrations(db.engine):
+            print(f"Applied migration {version}: {name}")
+
+        if '--vacuum' in sys.argv and db.engine.dialect.name == 'sqlite':
+            # VACUUM cannot run inside a transaction
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(text("VACUUM"))
+            print("Vacuumed the database")
+
+        if '--check' in sys.argv:
+            missing = 0
+            for result in explain_hot_queries(db.engine):
+                status = 'ok' if result['uses_index'] else 'MISSING'
+                print(f"[{status}] {result['route']}: {' | '.join(result['plan'])}")
+                missing += 0 if result['uses_index'] else 1
+            sys.exit(1 if missing else 0)
@@ -1,18 +1,14 @@
 from app import app, db
 from database.db import User, TAProfile
+from database.migrations import run_migrations
 from auth.utils import hash_password
-from sqlalchemy import text
+from services.subject_index import subject_index
 
 def migrate_and_seed():
     with app.app_context():
-        # Add profile_image column to existing table
-        try:
-            db.session.execute(text("ALTER TABLE ta_profiles ADD COLUMN profile_image VARCHAR(500) DEFAULT 'https://images.unsplash.com/photo-1494790108755-2616b612b786?w=400&h=400&fit=crop&crop=face'"))
-            db.session.commit()
-            print("Added profile_image column")
-        except Exception as e:
-            print(f"Column might already exist: {e}")
-            db.session.rollback()
+        # Make sure profile_image and the other schema changes are in place
+        for version, name in run_migrations(db.engine):
+            print(f"Applied migration {version}: {name}")
         
         # Clear existing data
         TAProfile.query.delete()
@@ -125,6 +121,8 @@ def migrate_and_seed():
             db.session.add(profile)
         
         db.session.commit()
+        # The bulk deletes above bypass the ORM hooks that keep ta_subjects in sync
+        subject_index.rebuild()
         print(f"Successfully created {len(tas_data)} TA profiles with images!")
 
 if __name__ == '__main__':
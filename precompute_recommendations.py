@@ -0,0 +1,9 @@
+import sys
+from app import app, db
+from services.recommendation_job import RecommendationJob
+
+# Nightly/cron entry point; pass --full to rerank every student
+with app.app_context():
+    result = RecommendationJob(db.engine).run(incremental='--full' not in sys.argv)
+    print(f"{result['mode'].capitalize()} run {result['version']}: ranked {result['students']} students "
+          f"against {result['tas']} TAs in {result['seconds']:.2f}s")
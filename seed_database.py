@@ -1,6 +1,7 @@
 from app import app, db
 from database.db import User, TAProfile
 from auth.utils import hash_password
+from services.subject_index import subject_index
 
 def seed_database():
     with app.app_context():
@@ -115,6 +116,8 @@ def seed_database():
             db.session.add(profile)
         
         db.session.commit()
+        # The bulk deletes above bypass the ORM hooks that keep ta_subjects in sync
+        subject_index.rebuild()
         print(f"Successfully created {len(tas_data)} TA profiles!")
 
 if __name__ == '__main__':
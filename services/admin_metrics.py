@@ -0,0 +1,81 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, text
+from database.db import db
+
+USER_COUNTS_SQL = text("""
+    SELECT role, COUNT(*), SUM(CASE WHEN is_active THEN 1 ELSE 0 END) FROM users GROUP BY role
+""")
+MATCH_COUNTS_SQL = text("SELECT status, COUNT(*) FROM matches GROUP BY status")
+ACTIVE_SESSIONS_SQL = text("SELECT COUNT(*) FROM study_sessions WHERE created_at >= :since")
+# Study time comes from the per-day rollups rather than the sessions themselves
+STUDY_TOTAL_SQL = text("SELECT COALESCE(SUM(total_seconds), 0) FROM study_stat_rollups")
+MATCHES_PER_DAY_SQL = text("""
+    SELECT date(created_at) AS day, COUNT(*) FROM matches
+    WHERE created_at >= :since
+    GROUP BY date(created_at)
+""")
+STUDY_PER_DAY_SQL = text("""
+    SELECT day, SUM(total_seconds) FROM study_stat_rollups
+    WHERE day >= :since
+    GROUP BY day
+""").bindparams(bindparam('since', type_=db.Date))
+
+class AdminMetricsService:
+    # Platform-wide counters for the admin pages. Each table is read once
+    # with a grouped query and the result is shared by every admin request
+    # for ttl seconds, so the pages cost the same however many rows there are.
+    def __init__(self, ttl=30, days=14):
+        self.ttl = ttl
+        self.days = days
+        self.lock = threading.Lock()
+        self.cached = None
+        self.expires_at = 0
+
+    def metrics(self):
+        with self.lock:
+            if self.cached is not None and time.monotonic() < self.expires_at:
+                return self.cached
+        metrics = self.compute(db.session.connection())
+        with self.lock:
+            self.cached = metrics
+            self.expires_at = time.monotonic() + self.ttl
+        return metrics
+
+    def invalidate(self):
+        with self.lock:
+            self.cached = None
+
+    def compute(self, connection, now=None):
+        now = now or datetime.utcnow()
+        user_rows = connection.execute(USER_COUNTS_SQL).fetchall()
+        users = {role: count for role, count, _ in user_rows}
+        matches = dict(connection.execute(MATCH_COUNTS_SQL).fetchall())
+        active_sessions = connection.execute(ACTIVE_SESSIONS_SQL, {'since': now - timedelta(hours=1)}).scalar()
+        study_seconds = connection.execute(STUDY_TOTAL_SQL).scalar()
+
+        first_day = now.date() - timedelta(days=self.days - 1)
+        matches_by_day = {str(day): count for day, count in connection.execute(
+            MATCHES_PER_DAY_SQL, {'since': datetime.combine(first_day, datetime.min.time())})}
+        seconds_by_day = {str(day): seconds for day, seconds in connection.execute(
+            STUDY_PER_DAY_SQL, {'since': first_day})}
+        days = [str(first_day + timedelta(days=i)) for i in range(self.days)]
+
+        return {
+            'total_users': sum(users.values()),
+            'users_by_role': users,
+            'active_users': sum(active or 0 for _, _, active in user_rows),
+            'active_sessions': active_sessions,
+            'study_hours_logged': round(study_seconds / 3600, 1),
+            'total_matches': sum(matches.values()),
+            'pending': matches.get('pending', 0),
+            'accepted': matches.get('accepted', 0),
+            'rejected': matches.get('rejected', 0),
+            'matches_per_day': [{'day': day, 'matches': matches_by_day.get(day, 0)} for day in days],
+            'study_hours_per_day': [{'day': day, 'hours': round(seconds_by_day.get(day, 0) / 3600, 1)} for day in days],
+            'computed_at': now.isoformat()
+        }
+
+# Global service
+admin_metrics_service = AdminMetricsService()
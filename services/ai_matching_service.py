@@ -1,26 +1,199 @@
 import os
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from sqlalchemy import bindparam, text
+from database.db import db
+from services.ta_ranking_engine import TARankingEngine, TAPool, RankingCache, PreferenceSnapshot
+from services.subject_index import subject_index
+from services.mock_ranking_model import MockRankingModel
 
-load_dotenv()
+# Gemini is only used to rerank the top few candidates, so the app runs
+# without the SDK installed
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+TA_CARD_SQL = """
+    SELECT u.id, u.name, p.subjects, p.bio, p.rating, p.profile_image
+    FROM ta_profiles p JOIN users u ON u.id = p.user_id
+    WHERE u.role = 'ta'
+"""
+
+# What the cache holds per student: the ranking and what it was computed from
+CachedRanking = namedtuple('CachedRanking', 'fingerprint pool_key ranked_ids reranked computed_at')
+
+def default_model():
+    if os.getenv('AI_MATCHING_MODEL') == 'mock':
+        return MockRankingModel()
+    api_key = os.getenv('GEMINI_API_KEY')
+    if api_key and genai:
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel('gemini-pro')
+    return None
 
 class AIMatchingService:
-    def __init__(self):
-        api_key = os.getenv('GEMINI_API_KEY')
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
-        else:
-            self.model = None
+    # Ranking is done locally by TARankingEngine. The model, when configured,
+    # only reorders the top RERANK_TOP_K candidates, and never inside the
+    # request: each student's last ranking is cached and served straight away,
+    # while a background worker reranks it with a hard deadline whenever the
+    # student's preferences or the TA pool have changed.
+    RERANK_TOP_K = 10
+    RERANK_TIMEOUT = 5.0
+
+    def __init__(self, engine=None, cache=None, rerank_top_k=None, model=None, rerank_timeout=None, max_workers=4):
+        self.engine = engine or TARankingEngine()
+        self.cache = cache or RankingCache()
+        self.rerank_top_k = self.RERANK_TOP_K if rerank_top_k is None else rerank_top_k
+        self.rerank_timeout = rerank_timeout or self.RERANK_TIMEOUT
+        self.model = default_model() if model is None else model
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ta-rerank')
+        # Model calls get their own threads so a client that ignores its
+        # timeout can hold up one of these, never a refresh worker
+        self.model_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ta-model')
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.metrics = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes_started': 0,
+            'refreshes_completed': 0,
+            'refreshes_skipped': 0,
+            'rerank_timeouts': 0,
+            'rerank_errors': 0,
+        }
+        self.request_latencies = deque(maxlen=1000)
+        self.rerank_latencies = deque(maxlen=1000)
     
+    def candidate_tas(self, student_preferences):
+        # TAs sharing at least one subject with the student, found through the
+        # subject index instead of scanning every profile. Students without
+        # preferences, or whose subjects nobody teaches, see every TA.
+        ta_ids = subject_index.candidates(student_preferences.subjects) if student_preferences else None
+        if not ta_ids:
+            rows = db.session.execute(text(TA_CARD_SQL)).fetchall()
+        else:
+            query = text(TA_CARD_SQL + " AND p.user_id IN :ta_ids").bindparams(bindparam('ta_ids', expanding=True))
+            ta_ids = sorted(ta_ids)
+            rows = []
+            for i in range(0, len(ta_ids), 500):
+                rows.extend(db.session.execute(query, {'ta_ids': ta_ids[i:i + 500]}).fetchall())
+        return [{
+            'id': row[0],
+            'name': row[1],
+            'subjects': row[2],
+            'bio': row[3],
+            'rating': row[4] or 0.0,
+            'profile_image': row[5]
+        } for row in rows]
+
     def get_ta_recommendations(self, student_preferences, available_tas):
-        if not self.model or not student_preferences:
-            return self._fallback_ranking(available_tas)
-        
+        if not available_tas:
+            return []
+        start = time.perf_counter()
+        if student_preferences is not None and not isinstance(student_preferences, PreferenceSnapshot):
+            student_preferences = PreferenceSnapshot.of(student_preferences)
+
+        pool_key = TAPool.key(available_tas)
+        fingerprint = self.engine.fingerprint(student_preferences)
+        cache_key = student_preferences.user_id if student_preferences else fingerprint
+        cached = self.cache.get(cache_key)
+        use_model = bool(self.model and student_preferences and self.rerank_top_k)
+
+        if cached and cached.fingerprint == fingerprint and cached.pool_key == pool_key:
+            self._count('hits')
+            ranked_ids = cached.ranked_ids
+        elif cached and use_model:
+            # Serve the previous ranking now; it is replaced once the rerank
+            # for the new preferences or pool finishes
+            self._count('stale_hits')
+            ranked_ids = cached.ranked_ids
+            self._schedule_refresh(cache_key, student_preferences, available_tas, pool_key, fingerprint)
+        else:
+            self._count('misses')
+            ranked_ids = self._local_ranking(student_preferences, available_tas, pool_key)
+            self.cache.put(cache_key, CachedRanking(fingerprint, pool_key, ranked_ids, False, time.time()))
+            if use_model:
+                self._schedule_refresh(cache_key, student_preferences, available_tas, pool_key, fingerprint)
+
+        result = self._resolve(ranked_ids, available_tas)
+        self.request_latencies.append(time.perf_counter() - start)
+        return result
+
+    def _local_ranking(self, student_preferences, available_tas, pool_key):
+        _, pool = self.engine.pool(available_tas, pool_key)
+        return self.engine.rank(student_preferences, pool)
+
+    def _resolve(self, ranked_ids, available_tas):
+        # A stale ranking may name TAs that have since left the pool and miss
+        # new ones; the former are dropped and the latter go last by rating
+        tas_by_id = {ta['id']: ta for ta in available_tas}
+        result = [tas_by_id.pop(ta_id) for ta_id in ranked_ids if ta_id in tas_by_id]
+        if tas_by_id:
+            result.extend(sorted(tas_by_id.values(), key=lambda ta: ta.get('rating') or 0, reverse=True))
+        return result
+
+    def _schedule_refresh(self, cache_key, student_preferences, available_tas, pool_key, fingerprint):
+        with self.lock:
+            if cache_key in self.refreshing:
+                self.metrics['refreshes_skipped'] += 1
+                return
+            self.refreshing.add(cache_key)
+            self.metrics['refreshes_started'] += 1
+        self.executor.submit(self._refresh, cache_key, student_preferences, list(available_tas), pool_key, fingerprint)
+
+    def _refresh(self, cache_key, student_preferences, available_tas, pool_key, fingerprint):
         try:
-            subjects = json.loads(student_preferences.subjects) if isinstance(student_preferences.subjects, str) else student_preferences.subjects
-            confidence = json.loads(student_preferences.confidence_levels) if isinstance(student_preferences.confidence_levels, str) else student_preferences.confidence_levels
+            ranked_ids = self._local_ranking(student_preferences, available_tas, pool_key)
+            ranked_ids, reranked = self._rerank(student_preferences, ranked_ids, available_tas)
+            self.cache.put(cache_key, CachedRanking(fingerprint, pool_key, ranked_ids, reranked, time.time()))
+            self._count('refreshes_completed')
+        finally:
+            with self.lock:
+                self.refreshing.discard(cache_key)
+
+    def _count(self, name):
+        with self.lock:
+            self.metrics[name] += 1
+
+    def stats(self):
+        def percentiles(samples):
+            ordered = sorted(samples)
+            if not ordered:
+                return {'count': 0, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+            return {
+                'count': len(ordered),
+                'p50_ms': round(ordered[len(ordered) // 2] * 1000, 2),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                'max_ms': round(ordered[-1] * 1000, 2)
+            }
+        with self.lock:
+            metrics = dict(self.metrics)
+            refreshing = len(self.refreshing)
+        lookups = metrics['hits'] + metrics['stale_hits'] + metrics['misses']
+        metrics['hit_rate'] = round(metrics['hits'] / lookups, 3) if lookups else None
+        metrics['refreshing'] = refreshing
+        metrics['model'] = type(self.model).__name__ if self.model else None
+        metrics['request_latency'] = percentiles(self.request_latencies)
+        metrics['rerank_latency'] = percentiles(self.rerank_latencies)
+        return metrics
+
+    def _rerank(self, student_preferences, ranked_ids, available_tas):
+        top_ids = ranked_ids[:self.rerank_top_k]
+        tas_by_id = {ta['id']: ta for ta in available_tas}
+        start = time.perf_counter()
+        try:
+            subjects = student_preferences.subjects
+            confidence = student_preferences.confidence_levels
             
             prompt = f"""You are an AI matching system for students and teaching assistants.
 
@@ -31,7 +204,7 @@ Student Profile:
 - Learning style: {student_preferences.learning_style or 'Not specified'}
 
 Available TAs:
-{json.dumps([{'id': ta['id'], 'name': ta['name'], 'subjects': ta['subjects'], 'bio': ta['bio'], 'rating': ta['rating']} for ta in available_tas], indent=2)}
+{json.dumps([{'id': ta['id'], 'name': ta['name'], 'subjects': ta['subjects'], 'bio': ta['bio'], 'rating': ta['rating']} for ta in (tas_by_id[i] for i in top_ids)], indent=2)}
 
 Rank these TAs from best to worst match for this student. Consider:
 1. Subject expertise match
@@ -41,25 +214,24 @@ Rank these TAs from best to worst match for this student. Consider:
 
 Return ONLY a JSON array of TA IDs in ranked order, like: [3, 1, 2]"""
 
-            response = self.model.generate_content(prompt)
-            ranked_ids = json.loads(response.text.strip())
-            
-            ranked_tas = []
-            for ta_id in ranked_ids:
-                ta = next((t for t in available_tas if t['id'] == ta_id), None)
-                if ta:
-                    ranked_tas.append(ta)
-            
-            for ta in available_tas:
-                if ta not in ranked_tas:
-                    ranked_tas.append(ta)
-            
-            return ranked_tas
+            future = self.model_executor.submit(
+                self.model.generate_content, prompt, request_options={'timeout': self.rerank_timeout}
+            )
+            response = future.result(timeout=self.rerank_timeout)
+            self.rerank_latencies.append(time.perf_counter() - start)
+            candidates = set(top_ids)
+            reranked = []
+            for ta_id in json.loads(response.text.strip()):
+                if ta_id in candidates:
+                    reranked.append(ta_id)
+                    candidates.discard(ta_id)
+            # Anything the model left out keeps its local order
+            reranked.extend(ta_id for ta_id in top_ids if ta_id in candidates)
+            return reranked + ranked_ids[self.rerank_top_k:], True
         except Exception as e:
-            print(f"AI matching error: {e}")
-            return self._fallback_ranking(available_tas)
-    
-    def _fallback_ranking(self, tas):
-        return sorted(tas, key=lambda x: x.get('rating', 0), reverse=True)
+            timed_out = isinstance(e, (TimeoutError, FutureTimeoutError)) or 'timeout' in str(e).lower()
+            self._count('rerank_timeouts' if timed_out else 'rerank_errors')
+            print(f"AI matching rerank timed out after {self.rerank_timeout}s" if timed_out else f"AI matching error: {e}")
+            return ranked_ids, False
 
 ai_matching_service = AIMatchingService()
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+DEADLINE_COLUMNS = "id, user_id, title, subject, due_date, priority, study_hours, description, completed, created_at"
+
+def parse_datetime(value):
+    if isinstance(value, datetime) or value is None:
+        return value
+    return datetime.fromisoformat(str(value).replace('T', ' '))
+
+class Deadline:
+    # One row of deadlines with its dates parsed, so the scheduler and the
+    # timetable views never index raw rows by position or re-parse strings
+    __slots__ = ('id', 'user_id', 'title', 'subject', 'due_date', 'priority', 'study_hours',
+                 'description', 'completed', 'created_at')
+
+    def __init__(self, id, user_id, title, subject, due_date, priority='medium', study_hours=0,
+                 description='', completed=False, created_at=None):
+        self.id = id
+        self.user_id = user_id
+        self.title = title
+        self.subject = subject
+        self.due_date = due_date
+        self.priority = priority
+        self.study_hours = study_hours
+        self.description = description
+        self.completed = completed
+        self.created_at = created_at
+
+    @classmethod
+    def from_row(cls, row):
+        # Row in DEADLINE_COLUMNS order
+        return cls(row[0], row[1], row[2], row[3], parse_datetime(row[4]), row[5] or 'medium', row[6] or 0,
+                   row[7] or '', bool(row[8]), parse_datetime(row[9]))
+
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return Deadline(**values)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'subject': self.subject,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'priority': self.priority,
+            'study_hours': self.study_hours,
+            'description': self.description,
+            'completed': self.completed
+        }
+
+    def __repr__(self):
+        return f"Deadline({self.id!r}, {self.title!r}, due={self.due_date!r})"
+
+def load_deadlines(connection, user_id, completed=None):
+    # All of a user's deadlines by due date, or only pending/completed ones
+    sql = f"SELECT {DEADLINE_COLUMNS} FROM deadlines WHERE user_id = :user_id"
+    params = {'user_id': user_id}
+    if completed is not None:
+        sql += " AND completed = :completed"
+        params['completed'] = completed
+    return [Deadline.from_row(row) for row in connection.execute(text(sql + " ORDER BY due_date"), params)]
+
+# Shown to students who have not added any deadlines yet. Negative ids never
+# match a real deadline, so applied sample sessions are stored without one.
+SAMPLE_DEADLINES = [
+    ("Machine Learning Assignment", "Computer Science", 7, "high", 8, "Complete neural network project with documentation"),
+    ("Calculus Midterm Exam", "Mathematics", 4, "critical", 12, "Study integration, differentiation, and limits"),
+    ("Physics Lab Report", "Physics", 10, "medium", 6, "Analyze pendulum motion experiment results"),
+    ("English Essay", "English", 12, "low", 4, "Write 1500-word essay on Shakespeare's themes"),
+    ("Chemistry Quiz", "Chemistry", 6, "medium", 3, "Organic chemistry reactions and mechanisms")
+]
+
+def sample_deadlines(user_id, now=None, count=len(SAMPLE_DEADLINES)):
+    now = now or datetime.now()
+    return [Deadline(-n, user_id, title, subject, now + timedelta(days=days), priority, hours, description, False, now)
+            for n, (title, subject, days, priority, hours, description) in enumerate(SAMPLE_DEADLINES[:count], 1)]
@@ -0,0 +1,82 @@
+import threading
+import time
+
+class InterimCoalescer:
+    # Rate-limits interim transcript emits per stream. The first interim after
+    # a quiet period goes out immediately; later ones inside the window replace
+    # each other and only the newest is sent when the window closes. Final
+    # results are never delayed and discard any interim still waiting, since
+    # the final text supersedes it.
+    def __init__(self, emit, window=0.25, start_background_task=None, sleep=time.sleep):
+        self.emit = emit
+        self.window = window
+        self.start_background_task = start_background_task or self._start_thread
+        self.sleep = sleep
+        self.pending = {}
+        self.last_sent = {}
+        self.lock = threading.Lock()
+        self.flusher_running = False
+        self.stats = {
+            'final_sent': 0,
+            'interim_received': 0,
+            'interim_sent': 0,
+            'interim_coalesced': 0,
+            'interim_dropped': 0,
+        }
+
+    def submit(self, stream, event, data, is_final, to=None):
+        to = stream if to is None else to
+        if is_final:
+            with self.lock:
+                if self.pending.pop(stream, None):
+                    self.stats['interim_dropped'] += 1
+                self.emit(event, data, to=to)
+                self.stats['final_sent'] += 1
+            return
+
+        now = time.monotonic()
+        with self.lock:
+            self.stats['interim_received'] += 1
+            last = self.last_sent.get(stream)
+            if stream not in self.pending and (last is None or now - last >= self.window):
+                self.last_sent[stream] = now
+                self.emit(event, data, to=to)
+                self.stats['interim_sent'] += 1
+                return
+
+            if stream in self.pending:
+                self.stats['interim_coalesced'] += 1
+            self.pending[stream] = ((last or now) + self.window, event, data, to)
+            start_flusher = not self.flusher_running
+            self.flusher_running = True
+
+        if start_flusher:
+            self.start_background_task(self._flush_loop)
+
+    def discard(self, stream):
+        with self.lock:
+            if self.pending.pop(stream, None):
+                self.stats['interim_dropped'] += 1
+            self.last_sent.pop(stream, None)
+
+    def _flush_loop(self):
+        while True:
+            self.sleep(self.window / 2)
+            now = time.monotonic()
+            with self.lock:
+                for stream, (due, event, data, to) in list(self.pending.items()):
+                    if due <= now:
+                        del self.pending[stream]
+                        self.last_sent[stream] = now
+                        # Emitted under the lock so a final result for the same
+                        # stream can never overtake this interim
+                        self.emit(event, data, to=to)
+                        self.stats['interim_sent'] += 1
+                if not self.pending:
+                    self.flusher_running = False
+                    return
+
+    def _start_thread(self, target):
+        thread = threading.Thread(target=target, name='interim-coalescer', daemon=True)
+        thread.start()
+        return thread
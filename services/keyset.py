@@ -0,0 +1,34 @@
+from datetime import datetime
+from database.db import db
+
+# Cursors for lists that page newest-first on (created_at, id).
+#
+# On SQLite the cursor carries created_at as the text SQLite stores, and
+# pages compare against the column as it is, so a page resumes right after
+# the row the last one ended on whatever format that row's timestamp was
+# written in. Rows without a created_at sort as '' (oldest), the same
+# expression the ix_*_position indexes are built on. SQLite only
+# range-scans an expression index on a plain comparison, not a row value,
+# so queries bound the position on its own as well as (position, id).
+#
+# Other databases store real timestamps and page on the column itself.
+def position_sql(column, dialect):
+    return f"COALESCE({column}, '')" if dialect.name == 'sqlite' else column
+
+def position_of(column, dialect):
+    # ORM form of position_sql; the '' stays a literal so SQLite matches
+    # the expression to the index
+    if dialect.name != 'sqlite':
+        return column
+    return db.func.coalesce(db.type_coerce(column, db.String), db.literal_column("''"))
+
+def encode_cursor(position, row_id):
+    if isinstance(position, datetime):
+        position = position.isoformat()
+    return f"{position}_{row_id}"
+
+def decode_cursor(cursor, dialect):
+    position, row_id = cursor.rsplit('_', 1)
+    if dialect.name != 'sqlite':
+        position = datetime.fromisoformat(position)
+    return position, int(row_id)
@@ -0,0 +1,35 @@
+import json
+import random
+import re
+import time
+
+class MockResponse:
+    def __init__(self, text):
+        self.text = text
+
+class MockRankingModel:
+    # Local stand-in for the Gemini model used by AIMatchingService. It reads
+    # the TA list out of the prompt and answers with the ids ordered by
+    # rating, after a configurable delay. Honors request_options['timeout']
+    # the way the real client does, so slow responses surface as timeouts.
+    # Enable with AI_MATCHING_MODEL=mock.
+    def __init__(self, latency=0.2, jitter=0.0, fail_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.calls = 0
+
+    def generate_content(self, prompt, request_options=None):
+        self.calls += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        timeout = (request_options or {}).get('timeout')
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"mock model did not answer within {timeout}s")
+        time.sleep(delay)
+        if random.random() < self.fail_rate:
+            raise RuntimeError("mock model error")
+
+        tas = json.loads(re.search(r"Available TAs:\n(\[.*?\n\])", prompt, re.S).group(1))
+        ranked = sorted(tas, key=lambda ta: (-(ta.get('rating') or 0), ta['id']))
+        return MockResponse(json.dumps([ta['id'] for ta in ranked]))
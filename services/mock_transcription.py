@@ -1,11 +1,15 @@
 import json
 import random
 from flask_socketio import emit
-from database.db import db
-from sqlalchemy import text
-from datetime import datetime
+from services.note_writer import note_write_queue
+from services.transcript_buffer import TranscriptBuffer
+from services.notes_engine import IncrementalNotesEngine
+from datetime import datetime, timedelta
 
 class SmartTranscriptionService:
+    TOPIC_KEYWORDS = ['machine learning', 'neural networks', 'data', 'algorithm', 'model', 'learning', 'analysis', 'computer', 'vision', 'processing']
+    NOTES_PUSH_INTERVAL = timedelta(seconds=15)
+
     def __init__(self):
         self.current_session = None
         self.is_active = False
@@ -15,9 +19,9 @@ class SmartTranscriptionService:
         self.current_session = {
             'user_id': user_id,
             'start_time': datetime.now(),
-            'transcript': '',
-            'speakers': {},
-            'sentences': []
+            'transcript': TranscriptBuffer(),
+            'notes': IncrementalNotesEngine(max_key_points=5, min_key_point_chars=0, topic_keywords=self.TOPIC_KEYWORDS),
+            'last_notes_push': datetime.now()
         }
         self.is_active = True
         self.audio_buffer = []
@@ -32,18 +36,21 @@ class SmartTranscriptionService:
         # Process every few audio chunks
         if len(self.audio_buffer) % 3 == 0:
             sentence = self.generate_realistic_sentence()
-            speaker = random.choice([0, 1]) if len(self.current_session['speakers']) > 0 or random.random() > 0.7 else 0
+            speaker = random.choice([0, 1]) if len(self.current_session['transcript'].speakers) > 0 or random.random() > 0.7 else 0
             
-            self.current_session['sentences'].append(sentence)
-            self.current_session['transcript'] += f"[Speaker {speaker}] {sentence} "
-            self.current_session['speakers'][speaker] = self.current_session['speakers'].get(speaker, 0) + 1
+            segment = self.current_session['transcript'].append(sentence, speaker=speaker)
+            self.current_session['notes'].consume(segment.text)
             
             emit('transcript_update', {
-                'transcript': f"[Speaker {speaker}] {sentence}",
+                'transcript': segment.formatted(),
                 'is_final': True,
                 'speaker': speaker,
                 'confidence': round(random.uniform(0.85, 0.98), 2)
             })
+            
+            if datetime.now() - self.current_session['last_notes_push'] >= self.NOTES_PUSH_INTERVAL:
+                self.current_session['last_notes_push'] = datetime.now()
+                emit('notes_update', self.current_session['notes'].snapshot())
     
     def generate_realistic_sentence(self):
         topics = [
@@ -77,41 +84,29 @@ class SmartTranscriptionService:
         return None
     
     def save_transcript_with_ai_notes(self):
-        if not self.current_session or not self.current_session['transcript'].strip():
+        if not self.current_session or not self.current_session['transcript']:
             return None
         
         # Generate AI notes
         ai_notes = self.generate_ai_notes()
         
-        try:
-            db.session.execute(
-                text("""
-                    INSERT INTO notes (user_id, title, content, subject, created_at) 
-                    VALUES (:user_id, :title, :content, :subject, :created_at)
-                """),
-                {
-                    'user_id': self.current_session['user_id'],
-                    'title': f"AI Lecture Notes - {self.current_session['start_time'].strftime('%Y-%m-%d %H:%M')}",
-                    'content': ai_notes,
-                    'subject': 'Live Lecture Notes',
-                    'created_at': datetime.now()
-                }
-            )
-            db.session.commit()
-            return ai_notes
-        except Exception as e:
-            print(f"Error saving notes: {e}")
-            db.session.rollback()
-            return None
+        # Persisted by the background note writer; the caller gets the notes back immediately
+        note_write_queue.enqueue(
+            ta_id=self.current_session['user_id'],
+            title=f"AI Lecture Notes - {self.current_session['start_time'].strftime('%Y-%m-%d %H:%M')}",
+            content=ai_notes,
+            subject='Live Lecture Notes'
+        )
+        return ai_notes
     
     def generate_ai_notes(self):
-        sentences = self.current_session['sentences']
-        transcript = self.current_session['transcript']
+        # Key points and topics were collected as sentences arrived
+        engine = self.current_session['notes']
+        engine.finish()
+        transcript = self.current_session['transcript'].text()
         duration = datetime.now() - self.current_session['start_time']
         
-        # Extract key topics
-        topics = self.extract_topics(sentences)
-        key_points = sentences[:5] if len(sentences) > 5 else sentences
+        topics = engine.topics()
         
         notes = f"""
 # 📚 AI-Generated Lecture Notes
@@ -119,14 +114,14 @@ class SmartTranscriptionService:
 ## 📊 Session Summary
 - **Date**: {self.current_session['start_time'].strftime('%Y-%m-%d %H:%M')}
 - **Duration**: {str(duration).split('.')[0]}
-- **Speakers**: {len(self.current_session['speakers'])}
+- **Speakers**: {len(self.current_session['transcript'].speakers)}
 - **Key Topics**: {', '.join(topics[:3])}
 
 ## 🔑 Key Points
 """
         
-        for i, point in enumerate(key_points, 1):
-            notes += f"{i}. {point}\n"
+        for i, point in engine.key_points:
+            notes += f"{i}. {point}.\n"
         
         notes += f"""
 
@@ -148,17 +143,6 @@ class SmartTranscriptionService:
         """
         
         return notes
-    
-    def extract_topics(self, sentences):
-        topics = set()
-        keywords = ['machine learning', 'neural networks', 'data', 'algorithm', 'model', 'learning', 'analysis', 'computer', 'vision', 'processing']
-        
-        for sentence in sentences:
-            for keyword in keywords:
-                if keyword in sentence.lower():
-                    topics.add(keyword)
-        
-        return list(topics)
 
 # Global transcription service instance
 transcription_service = SmartTranscriptionService()
\ No newline at end of file
@@ -0,0 +1,58 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from sqlalchemy import event
+from database.db import Note
+
+def note_etag(note):
+    # Covers everything /api/note/<id> returns. The content is represented by
+    # its stored hash so the tag can be checked without reading the body;
+    # rows written around the ORM have no hash and fall back to hashing it
+    content_hash = note.content_hash or hashlib.sha1((note.content or '').encode()).hexdigest()
+    return hashlib.sha1(f"{note.id}:{content_hash}:{note.title}:{note.subject}".encode()).hexdigest()
+
+class NotePayloadCache:
+    # LRU of serialized /api/note/<id> responses. Each entry remembers the
+    # ETag it was built for and is only served for that ETag, so a note
+    # changed by another process is rebuilt rather than served stale; local
+    # writes drop the entry straight away.
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, note_id, etag):
+        with self.lock:
+            entry = self.entries.get(note_id)
+            if entry is None or entry[0] != etag:
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(note_id)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, note_id, etag, body):
+        with self.lock:
+            self.entries[note_id] = (etag, body)
+            self.entries.move_to_end(note_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, note_id=None):
+        with self.lock:
+            if note_id is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(note_id, None)
+
+# Global cache
+note_cache = NotePayloadCache()
+
+# Every ORM write to a note drops its entry: create_note, the note writer
+# worker behind save_live_notes, and any later edits
+@event.listens_for(Note, 'after_insert')
+@event.listens_for(Note, 'after_update')
+@event.listens_for(Note, 'after_delete')
+def _note_changed(mapper, connection, target):
+    note_cache.invalidate(target.id)
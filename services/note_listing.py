@@ -0,0 +1,53 @@
+from database.db import db, Note, User
+from services.keyset import decode_cursor, encode_cursor, position_of
+
+PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+class NoteListing:
+    # Pages of note summaries for the notes pages, newest first. Only the
+    # columns a card shows are selected; the body stays in the database
+    # until the note is opened through /api/note/<id>. Pages continue after
+    # the previous page's last (created_at, id), so they cost the same at
+    # any depth.
+    def page(self, ta_id=None, subject=None, cursor=None, limit=PAGE_SIZE):
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        dialect = db.session.get_bind().dialect
+        position = position_of(Note.created_at, dialect)
+        query = db.session.query(Note, position).options(
+            db.load_only(Note.id, Note.ta_id, Note.title, Note.subject, Note.created_at, Note.content_length),
+            db.joinedload(Note.ta).load_only(User.name)
+        )
+        if ta_id:
+            query = query.filter(Note.ta_id == int(ta_id))
+        if subject:
+            query = query.filter(db.func.lower(Note.subject).like(f"%{subject.lower()}%"))
+        if cursor:
+            after, note_id = decode_cursor(cursor, dialect)
+            query = query.filter(position <= after, db.tuple_(position, Note.id) < db.tuple_(after, note_id))
+        rows = query.order_by(position.desc(), Note.id.desc()).limit(limit + 1).all()
+
+        more = len(rows) > limit
+        rows = rows[:limit]
+        notes = [note for note, _ in rows]
+        return {
+            'notes': [{
+                'id': note.id,
+                'title': note.title,
+                'subject': note.subject,
+                'ta_id': note.ta_id,
+                'ta_name': note.ta.name if note.ta else None,
+                'created_at': note.created_at.isoformat() if note.created_at else None,
+                'content_length': note.content_length or 0
+            } for note in notes],
+            'next_cursor': encode_cursor(rows[-1][1], notes[-1].id) if more else None
+        }
+
+    def count(self, ta_id=None):
+        query = db.session.query(db.func.count(Note.id))
+        if ta_id:
+            query = query.filter(Note.ta_id == int(ta_id))
+        return query.scalar()
+
+# Global listing
+note_listing = NoteListing()
@@ -0,0 +1,139 @@
+import re
+from markupsafe import escape
+from sqlalchemy import bindparam, text
+from database.db import db
+
+# Private-use characters mark the matched terms in snippets so the note text
+# can be HTML-escaped before they become <mark> tags
+MARK_OPEN = '\ue000'
+MARK_CLOSE = '\ue001'
+MAX_RESULTS = 50
+
+RESULT_COLUMNS = "n.id, n.title, n.subject, n.ta_id, u.name AS ta_name, n.created_at"
+
+def match_expression(query):
+    # Every word must appear; "photo*" matches any word starting with photo.
+    # Prefix terms are kept opt-in because without a prefix index FTS5 has to
+    # merge the postings of every matching word before it can rank them.
+    terms = re.findall(r'(\w+)(\*?)', query.lower())
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"{star}' for term, star in terms)
+
+def highlight(snippet):
+    return str(escape(snippet or '')).replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>')
+
+class NoteSearch:
+    # Full-text search over note titles and content through the notes_fts
+    # index, which triggers keep in step with the notes table. Results are
+    # ranked by BM25 with title matches weighted above content matches and
+    # come with a highlighted snippet of the best matching passage. Other
+    # databases fall back to an unranked LIKE scan.
+    #
+    # BM25 has to score every match before it can sort, which for a word
+    # found in most notes means most of the table. Callers that prefer speed
+    # can ask for recent=True: only the newest rank_window matches (by rowid,
+    # which FTS5 walks backwards cheaply) are ranked, so a common word costs
+    # the same as a rarer one, and the response says truncated when older
+    # matches were left out. A subject or TA filter already narrows the
+    # candidates, so filtered searches always rank all of them.
+    def __init__(self, title_weight=10.0, content_weight=1.0, snippet_tokens=24, rank_window=5000):
+        self.title_weight = title_weight
+        self.content_weight = content_weight
+        self.snippet_tokens = snippet_tokens
+        self.rank_window = rank_window
+
+    def search(self, query, subject=None, ta_id=None, limit=20, recent=False, connection=None):
+        connection = connection or db.session.connection()
+        match = match_expression(query or '')
+        if match is None:
+            return {'results': [], 'truncated': False}
+        limit = max(1, min(int(limit), MAX_RESULTS))
+        where = []
+        params = {'limit': limit}
+        if subject:
+            where.append("lower(n.subject) LIKE :subject")
+            params['subject'] = f"%{subject.lower()}%"
+        if ta_id:
+            where.append("n.ta_id = :ta_id")
+            params['ta_id'] = int(ta_id)
+        if connection.dialect.name != 'sqlite':
+            return {'results': self._scan(connection, query, where, params), 'truncated': False}
+
+        params['match'] = match
+        truncated = False
+        candidates = "1 = 1"
+        if where:
+            # Filters pick the candidate notes through their own indexes. The
+            # unary plus keeps FTS5 from re-running the MATCH once per
+            # candidate; it walks the matches once and checks each against
+            # the set instead
+            candidates = f"+notes_fts.rowid IN (SELECT n.id FROM notes n WHERE {' AND '.join(where)})"
+        elif recent:
+            # The window's oldest match; anything below it goes unranked
+            params['window'] = self.rank_window
+            cutoff = connection.execute(text("""
+                SELECT rowid FROM notes_fts WHERE notes_fts MATCH :match
+                ORDER BY rowid DESC
+                LIMIT 2 OFFSET :window - 1
+            """), params).fetchall()
+            if cutoff:
+                params['cutoff'] = cutoff[0][0]
+                truncated = len(cutoff) > 1
+                candidates = "notes_fts.rowid >= :cutoff"
+        ranked = connection.execute(text(f"""
+            SELECT notes_fts.rowid, bm25(notes_fts, {float(self.title_weight)}, {float(self.content_weight)}) AS score
+            FROM notes_fts
+            WHERE notes_fts MATCH :match AND {candidates}
+            ORDER BY score
+            LIMIT :limit
+        """), params).fetchall()
+        if not ranked:
+            return {'results': [], 'truncated': truncated}
+
+        # Snippets only for the notes being returned
+        rows = connection.execute(text(f"""
+            SELECT {RESULT_COLUMNS},
+                   snippet(notes_fts, -1, :open, :close, '…', {int(self.snippet_tokens)}) AS snippet
+            FROM notes_fts
+            JOIN notes n ON n.id = notes_fts.rowid
+            JOIN users u ON u.id = n.ta_id
+            WHERE notes_fts MATCH :match AND notes_fts.rowid IN :ids
+        """).bindparams(bindparam('ids', expanding=True)).columns(created_at=db.DateTime), {
+            'match': match, 'open': MARK_OPEN, 'close': MARK_CLOSE, 'ids': [row[0] for row in ranked]
+        })
+        by_id = {row.id: row for row in rows}
+        return {
+            'results': [self._result(by_id[note_id], rank) for note_id, rank in ranked if note_id in by_id],
+            'truncated': truncated
+        }
+
+    def _scan(self, connection, query, where, params):
+        filters = ''.join(f" AND {condition}" for condition in where)
+        for n, (term, _) in enumerate(re.findall(r'(\w+)(\*?)', query.lower())):
+            filters += f" AND (lower(n.title) LIKE :term{n} OR lower(n.content) LIKE :term{n})"
+            params[f'term{n}'] = f"%{term}%"
+        rows = connection.execute(text(f"""
+            SELECT {RESULT_COLUMNS}, substr(n.content, 1, 200) AS snippet
+            FROM notes n
+            JOIN users u ON u.id = n.ta_id
+            WHERE 1 = 1{filters}
+            ORDER BY n.created_at DESC
+            LIMIT :limit
+        """).columns(created_at=db.DateTime), params)
+        return [self._result(row, 0) for row in rows]
+
+    def _result(self, row, rank):
+        return {
+            'id': row.id,
+            'title': row.title,
+            'subject': row.subject,
+            'ta_id': row.ta_id,
+            'ta_name': row.ta_name,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'snippet': highlight(row.snippet),
+            'rank': rank
+        }
+
+# Global search
+note_search = NoteSearch()
@@ -0,0 +1,132 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+from database.db import db, Note
+
+class NoteWriteQueue:
+    # Persists notes on a background worker so Socket.IO handlers and the
+    # save endpoints never wait on an INSERT + COMMIT. Writes are batched into
+    # one transaction, retried while SQLite reports the database as locked, and
+    # drained on interpreter shutdown. A batch that fails for any other reason
+    # is written note by note so one bad note does not take the rest with it.
+    def __init__(self, max_size=1000, batch_size=50, max_retries=5, retry_delay=0.05):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.app = None
+        self.worker = None
+        self.lock = threading.Lock()
+        self.stats = {'enqueued': 0, 'written': 0, 'batches': 0, 'retries': 0, 'failed': 0}
+
+    def init_app(self, app):
+        self.app = app
+        atexit.register(self.shutdown)
+
+    def enqueue(self, ta_id, title, content, subject, created_at=None):
+        self._ensure_worker()
+        note = {
+            'ta_id': ta_id,
+            'title': title,
+            'content': content,
+            'subject': subject,
+            'created_at': created_at or datetime.utcnow()
+        }
+        try:
+            # Never blocks the caller; a full queue means the writer is badly
+            # behind and the note is counted as failed
+            self.queue.put_nowait(note)
+        except queue.Full:
+            self.stats['failed'] += 1
+            return False
+        self.stats['enqueued'] += 1
+        return True
+
+    def _ensure_worker(self):
+        if self.worker and self.worker.is_alive():
+            return
+        with self.lock:
+            if not (self.worker and self.worker.is_alive()):
+                self.worker = threading.Thread(target=self._run, name='note-writer', daemon=True)
+                self.worker.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self.queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        with self.app.app_context():
+            error = self._commit(batch)
+            if error is None:
+                self.stats['written'] += len(batch)
+                self.stats['batches'] += 1
+                return
+            if len(batch) == 1 or self._is_locked(error):
+                print(f"Error saving notes: {error}")
+                self.stats['failed'] += len(batch)
+                return
+            # Find the bad note(s) and keep everyone else's
+            for note in batch:
+                error = self._commit([note])
+                if error is None:
+                    self.stats['written'] += 1
+                else:
+                    print(f"Error saving note {note['title']!r} for TA {note['ta_id']}: {error}")
+                    self.stats['failed'] += 1
+            self.stats['batches'] += 1
+
+    def _is_locked(self, error):
+        return isinstance(error, OperationalError) and 'locked' in str(error)
+
+    def _commit(self, notes):
+        # Returns None once the notes are committed, otherwise the last error
+        for attempt in range(self.max_retries + 1):
+            try:
+                db.session.add_all([Note(**note) for note in notes])
+                db.session.commit()
+                return None
+            except Exception as e:
+                db.session.rollback()
+                if not self._is_locked(e) or attempt == self.max_retries:
+                    return e
+                self.stats['retries'] += 1
+                time.sleep(self.retry_delay * (2 ** attempt))
+            finally:
+                db.session.remove()
+
+    def flush(self):
+        # Blocks until everything enqueued so far has been written or failed
+        if self.worker and self.worker.is_alive():
+            self.queue.join()
+
+    def shutdown(self, timeout=10):
+        if self.worker and self.worker.is_alive():
+            self.queue.put(None)
+            self.worker.join(timeout)
+
+# Global writer instance, bound to the Flask app in app.py
+note_write_queue = NoteWriteQueue()
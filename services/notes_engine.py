@@ -0,0 +1,71 @@
+import re
+from collections import Counter
+
+STOPWORDS = {
+    'about', 'after', 'again', 'also', 'because', 'before', 'being', 'between', 'could',
+    'doing', 'every', 'first', 'going', 'having', 'other', 'right', 'really', 'should',
+    'something', 'their', 'there', 'these', 'thing', 'things', 'think', 'those', 'through',
+    'today', 'under', 'until', 'where', 'which', 'while', 'would', 'yeah', 'you\'re', 'we\'ll',
+    'what', 'when', 'with', 'this', 'that', 'from', 'have', 'just', 'like', 'them', 'then',
+    'they', 'will', 'your', 'into', 'than', 'some', 'very', 'okay', 'know', 'here', 'were',
+}
+
+WORD_RE = re.compile(r"[a-z][a-z'-]+")
+
+class IncrementalNotesEngine:
+    # Builds lecture notes as final transcript segments arrive instead of
+    # re-splitting the whole transcript at stop time. Sentences are split on
+    # '.' like the old generators did, carrying a trailing fragment over to the
+    # next segment, so the result matches what a split of the full text gives.
+    def __init__(self, max_key_points=10, min_key_point_chars=10, topic_keywords=None, max_topics=5):
+        self.max_key_points = max_key_points
+        self.min_key_point_chars = min_key_point_chars
+        self.topic_keywords = topic_keywords
+        self.max_topics = max_topics
+
+        self.key_points = []
+        self.sentence_count = 0
+        self.word_count = 0
+        self.topic_counts = Counter()
+        self._fragment = ''
+
+    def consume(self, text):
+        self.word_count += len(text.split())
+
+        pieces = (self._fragment + ' ' + text if self._fragment else text).split('.')
+        self._fragment = pieces.pop().strip()
+        for sentence in pieces:
+            self._add_sentence(sentence.strip())
+
+    def finish(self):
+        if self._fragment:
+            self._add_sentence(self._fragment)
+            self._fragment = ''
+
+    def _add_sentence(self, sentence):
+        if not sentence:
+            return
+        self.sentence_count += 1
+        if self.sentence_count <= self.max_key_points and len(sentence) > self.min_key_point_chars:
+            self.key_points.append((self.sentence_count, sentence))
+
+        lowered = sentence.lower()
+        if self.topic_keywords:
+            for keyword in self.topic_keywords:
+                if keyword in lowered:
+                    self.topic_counts[keyword] += 1
+        else:
+            for word in WORD_RE.findall(lowered):
+                if len(word) > 4 and word not in STOPWORDS:
+                    self.topic_counts[word] += 1
+
+    def topics(self, limit=None):
+        return [topic for topic, _ in self.topic_counts.most_common(limit or self.max_topics)]
+
+    def snapshot(self):
+        return {
+            'key_points': [sentence for _, sentence in self.key_points],
+            'topics': self.topics(),
+            'sentences': self.sentence_count,
+            'words': self.word_count,
+        }
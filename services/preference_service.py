@@ -0,0 +1,142 @@
+import json
+from itertools import groupby
+from datetime import datetime
+from sqlalchemy import text
+from database.db import db
+from services.subject_index import subject_ids
+from services.subjects import parse_confidence, parse_subjects
+from services.ta_ranking_engine import PreferenceSnapshot
+
+# One row per (student, subject) in the student's order; students without
+# subjects come back as a single row of NULLs from the outer join
+SNAPSHOT_SQL = """
+    SELECT sp.user_id, sp.deadlines, sp.learning_style, sp.updated_at, s.id, s.name, ssp.confidence
+    FROM student_preferences sp
+    LEFT JOIN student_subject_preferences ssp ON ssp.student_id = sp.user_id
+    LEFT JOIN subjects s ON s.id = ssp.subject_id
+    {where}
+    ORDER BY sp.user_id, ssp.position
+"""
+UPSERT_SQL = text("""
+    INSERT INTO student_preferences (user_id, subjects, confidence_levels, deadlines, learning_style, created_at, updated_at)
+    VALUES (:user_id, :subjects, :confidence_levels, :deadlines, :learning_style, :now, :now)
+    ON CONFLICT (user_id) DO UPDATE SET
+        subjects = excluded.subjects,
+        confidence_levels = excluded.confidence_levels,
+        deadlines = excluded.deadlines,
+        learning_style = excluded.learning_style,
+        updated_at = excluded.updated_at
+""")
+CONFIDENCE_BY_SUBJECT_SQL = text("""
+    SELECT s.name, count(*), avg(ssp.confidence), sum(CASE WHEN ssp.confidence <= :low THEN 1 ELSE 0 END)
+    FROM student_subject_preferences ssp JOIN subjects s ON s.id = ssp.subject_id
+    GROUP BY s.name
+    ORDER BY count(*) DESC, s.name
+""")
+
+INSERT_STUDENT_SUBJECT_SQL = text("""
+    INSERT INTO student_subject_preferences (student_id, subject_id, confidence, position)
+    VALUES (:student_id, :subject_id, :confidence, :position)
+""")
+
+def _student_subject_rows(student_id, names, confidence, ids):
+    return [{
+        'student_id': student_id,
+        'subject_id': ids[name],
+        'confidence': confidence.get(name, 3),
+        'position': position
+    } for position, name in enumerate(names)]
+
+def sync_student_subjects(connection, student_id, subjects, confidence_levels):
+    names = parse_subjects(subjects)
+    connection.execute(text("DELETE FROM student_subject_preferences WHERE student_id = :student_id"),
+                       {'student_id': student_id})
+    ids = subject_ids(connection, names)
+    if names:
+        connection.execute(INSERT_STUDENT_SUBJECT_SQL,
+                           _student_subject_rows(student_id, names, parse_confidence(confidence_levels), ids))
+    return names
+
+def rebuild_student_subjects(connection):
+    # Regenerates student_subject_preferences from the JSON
+    # subjects/confidence_levels columns of every student_preferences row,
+    # for bulk writes that bypass save()
+    parsed = [(student_id, parse_subjects(subjects), parse_confidence(confidence_levels))
+              for student_id, subjects, confidence_levels in connection.execute(
+                  text("SELECT user_id, subjects, confidence_levels FROM student_preferences"))]
+    connection.execute(text("DELETE FROM student_subject_preferences"))
+    ids = subject_ids(connection, {name for _, names, _ in parsed for name in names})
+    rows = [row for student_id, names, confidence in parsed
+            for row in _student_subject_rows(student_id, names, confidence, ids)]
+    if rows:
+        connection.execute(INSERT_STUDENT_SUBJECT_SQL, rows)
+
+def load_snapshots(connection, where='', params=None):
+    query = text(SNAPSHOT_SQL.format(where=where)).columns(updated_at=db.DateTime)
+    rows = connection.execute(query, params or {})
+    snapshots = []
+    for user_id, group in groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        subjects = [row[5] for row in group if row[4] is not None]
+        first = group[0]
+        snapshots.append(PreferenceSnapshot(
+            user_id,
+            subjects,
+            {row[5]: row[6] for row in group if row[4] is not None},
+            first[1],
+            first[2],
+            tuple(row[4] for row in group if row[4] is not None),
+            first[3]
+        ))
+    return snapshots
+
+class PreferenceService:
+    # Typed access to student preferences. Subjects and confidence levels live
+    # in student_subject_preferences, one indexed row per subject; the JSON
+    # columns on student_preferences are still written for older readers but
+    # nothing here parses them.
+    LOW_CONFIDENCE = 2
+
+    def get(self, student_id):
+        snapshots = load_snapshots(db.session.connection(), "WHERE sp.user_id = :student_id", {'student_id': student_id})
+        return snapshots[0] if snapshots else None
+
+    def save(self, student_id, subjects, confidence_levels=None, deadlines=None, learning_style=None):
+        names = parse_subjects(subjects)
+        confidence = parse_confidence(confidence_levels or {})
+        confidence = {name: confidence.get(name, 3) for name in names}
+        connection = db.session.connection()
+        connection.execute(UPSERT_SQL, {
+            'user_id': student_id,
+            'subjects': json.dumps(names),
+            'confidence_levels': json.dumps(confidence),
+            'deadlines': deadlines,
+            'learning_style': learning_style,
+            'now': datetime.utcnow()
+        })
+        sync_student_subjects(connection, student_id, names, confidence)
+        return self.get(student_id)
+
+    def students_with_confidence(self, subject, max_confidence=None):
+        # Student ids at or below a confidence level in one subject, served
+        # by ix_student_subject_preferences_subject
+        names = parse_subjects([subject])
+        if not names:
+            return []
+        return [row[0] for row in db.session.execute(text("""
+            SELECT ssp.student_id
+            FROM student_subject_preferences ssp JOIN subjects s ON s.id = ssp.subject_id
+            WHERE s.name = :name AND ssp.confidence <= :confidence
+            ORDER BY ssp.student_id
+        """), {'name': names[0], 'confidence': max_confidence or self.LOW_CONFIDENCE})]
+
+    def confidence_by_subject(self):
+        return [{
+            'subject': row[0],
+            'students': row[1],
+            'average_confidence': round(row[2] or 0, 2),
+            'low_confidence': row[3] or 0
+        } for row in db.session.execute(CONFIDENCE_BY_SUBJECT_SQL, {'low': self.LOW_CONFIDENCE})]
+
+# Global preference service
+preference_service = PreferenceService()
@@ -1,68 +1,172 @@
 from flask_socketio import emit
-from database.db import db
-from sqlalchemy import text
-from datetime import datetime
+from services.note_writer import note_write_queue
+from services.transcript_buffer import TranscriptBuffer
+from services.notes_engine import IncrementalNotesEngine
+from services.emit_coalescer import InterimCoalescer
+from datetime import datetime, timedelta
 import json
 
-class RealSpeechService:
-    def __init__(self):
-        self.current_session = None
-        self.is_active = False
-        
-    def start_transcription(self, user_id, language='en-US'):
-        self.current_session = {
-            'user_id': user_id,
-            'start_time': datetime.now(),
-            'transcript': '',
-            'language': language
-        }
+def live_session_room(live_session_id):
+    return f"live_session_{live_session_id}"
+
+class TranscriptionSession:
+    # Cap on the stored transcript per connection. A three hour lecture is
+    # roughly 200k characters, so this only trips on runaway clients.
+    MAX_TRANSCRIPT_CHARS = 2_000_000
+
+    __slots__ = ('sid', 'user_id', 'language', 'live_session_id', 'room', 'start_time', 'transcript', 'notes', 'last_notes_push', 'is_active')
+
+    def __init__(self, sid, user_id, language='en-US', live_session_id=None):
+        self.sid = sid
+        self.user_id = user_id
+        self.language = language
+        self.live_session_id = live_session_id
+        # Listeners join this Socket.IO room; without a live session only the
+        # lecturer's own connection receives updates
+        self.room = live_session_room(live_session_id) if live_session_id else sid
+        self.start_time = datetime.now()
+        self.transcript = TranscriptBuffer(max_chars=self.MAX_TRANSCRIPT_CHARS)
+        self.notes = IncrementalNotesEngine()
+        self.last_notes_push = self.start_time
         self.is_active = True
-        return True
-    
-    def process_speech_result(self, transcript, is_final=True):
-        if not self.is_active or not self.current_session:
+
+class TranscriptionSessionRegistry:
+    # Live transcription state keyed by Socket.IO sid, with a secondary index
+    # by user so a lecturer's open tabs can be found without a scan
+    def __init__(self, max_sessions=1000):
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.sids_by_user = {}
+        self.sid_by_live_session = {}
+
+    def start(self, sid, user_id, language='en-US', live_session_id=None):
+        self.remove(sid)
+        if len(self.sessions) >= self.max_sessions:
+            return None
+        session = TranscriptionSession(sid, user_id, language, live_session_id)
+        self.sessions[sid] = session
+        self.sids_by_user.setdefault(user_id, set()).add(sid)
+        if live_session_id:
+            self.sid_by_live_session[live_session_id] = sid
+        return session
+
+    def get(self, sid):
+        return self.sessions.get(sid)
+
+    def for_user(self, user_id):
+        return [self.sessions[sid] for sid in self.sids_by_user.get(user_id, ())]
+
+    def for_live_session(self, live_session_id):
+        sid = self.sid_by_live_session.get(live_session_id)
+        return self.sessions.get(sid) if sid else None
+
+    def remove(self, sid):
+        session = self.sessions.pop(sid, None)
+        if session:
+            sids = self.sids_by_user.get(session.user_id)
+            if sids:
+                sids.discard(sid)
+                if not sids:
+                    del self.sids_by_user[session.user_id]
+            if self.sid_by_live_session.get(session.live_session_id) == sid:
+                del self.sid_by_live_session[session.live_session_id]
+        return session
+
+    def __len__(self):
+        return len(self.sessions)
+
+class RealSpeechService:
+    # How often partial notes are pushed to the client during a lecture
+    NOTES_PUSH_INTERVAL = timedelta(seconds=15)
+
+    def __init__(self, registry=None, emit=emit, coalescer=None):
+        self.registry = registry or TranscriptionSessionRegistry()
+        self.emit = emit
+        self.coalescer = coalescer
+
+    def init_socketio(self, socketio, interim_window=0.25):
+        # Interim results are coalesced per connection; without this every
+        # transcript_update is emitted straight back to the sender
+        self.coalescer = InterimCoalescer(
+            socketio.emit,
+            window=interim_window,
+            start_background_task=socketio.start_background_task,
+            sleep=socketio.sleep
+        )
+
+    def start_transcription(self, sid, user_id, language='en-US', live_session_id=None):
+        return self.registry.start(sid, user_id, language, live_session_id) is not None
+
+    def process_speech_result(self, sid, transcript, is_final=True):
+        session = self.registry.get(sid)
+        if not session or not session.is_active:
             return
-            
+
         if is_final:
-            self.current_session['transcript'] += transcript + ' '
-            
-        emit('transcript_update', {
+            segment = session.transcript.append(transcript)
+            if segment:
+                session.notes.consume(segment.text)
+
+        update = {
             'transcript': transcript,
             'is_final': is_final,
             'confidence': 0.95
-        })
-    
-    def stop_transcription(self):
-        if self.is_active and self.current_session:
-            self.is_active = False
-            ai_notes = self.generate_ai_notes()
-            self.save_notes(ai_notes)
+        }
+        if self.coalescer:
+            self.coalescer.submit(sid, 'transcript_update', update, is_final, to=session.room)
+        else:
+            self.emit('transcript_update', update, to=session.room)
+
+        if is_final and datetime.now() - session.last_notes_push >= self.NOTES_PUSH_INTERVAL:
+            session.last_notes_push = datetime.now()
+            self.emit('notes_update', session.notes.snapshot(), to=session.room)
+
+    def stop_transcription(self, sid):
+        session = self.registry.remove(sid)
+        if self.coalescer:
+            self.coalescer.discard(sid)
+        if session and session.is_active:
+            session.is_active = False
+            ai_notes = self.generate_ai_notes(session)
+            self.save_notes(session, ai_notes)
             return ai_notes
         return None
-    
-    def generate_ai_notes(self):
-        transcript = self.current_session['transcript'].strip()
-        if not transcript:
+
+    def disconnect(self, sid):
+        # Keep whatever was transcribed if the lecturer's socket drops mid-class
+        session = self.registry.get(sid)
+        if session and session.transcript:
+            return self.stop_transcription(sid)
+        self.registry.remove(sid)
+        if self.coalescer:
+            self.coalescer.discard(sid)
+        return None
+
+    def generate_ai_notes(self, session):
+        # Key points and topics were built up as results arrived, so this only
+        # formats the document and materializes the transcript once
+        if not session.transcript:
             return "No speech detected."
-            
-        # Use actual transcript, not mock data
-        sentences = [s.strip() for s in transcript.split('.') if s.strip()]
-        duration = datetime.now() - self.current_session['start_time']
-        
+
+        session.notes.finish()
+        transcript = session.transcript.text()
+        duration = datetime.now() - session.start_time
+        topics = session.notes.topics()
+
         notes = f"""# 📚 AI-Generated Lecture Notes
 
 ## 📊 Session Summary
-- **Date**: {self.current_session['start_time'].strftime('%Y-%m-%d %H:%M')}
+- **Date**: {session.start_time.strftime('%Y-%m-%d %H:%M')}
 - **Duration**: {str(duration).split('.')[0]}
-- **Language**: {self.current_session['language']}
+- **Language**: {session.language}
+- **Key Topics**: {', '.join(topics) if topics else 'None detected'}
 
 ## 🔑 Key Points
 """
-        
-        for i, sentence in enumerate(sentences[:10], 1):
-            if len(sentence) > 10:
-                notes += f"{i}. {sentence.capitalize()}.\n"
-        
+
+        for i, sentence in session.notes.key_points:
+            notes += f"{i}. {sentence.capitalize()}.\n"
+
         notes += f"""
 
 ## 📝 Full Transcript
@@ -72,26 +176,16 @@ class RealSpeechService:
 *Generated automatically from live speech recognition*
 """
         return notes
-    
-    def save_notes(self, ai_notes):
-        try:
-            db.session.execute(
-                text("""
-                    INSERT INTO notes (user_id, title, content, subject, created_at) 
-                    VALUES (:user_id, :title, :content, :subject, :created_at)
-                """),
-                {
-                    'user_id': self.current_session['user_id'],
-                    'title': f"Live Notes - {self.current_session['start_time'].strftime('%Y-%m-%d %H:%M')}",
-                    'content': ai_notes,
-                    'subject': 'Live Speech Notes',
-                    'created_at': datetime.now()
-                }
-            )
-            db.session.commit()
-        except Exception as e:
-            print(f"Error saving notes: {e}")
-            db.session.rollback()
-
-# Global service instance
-speech_service = RealSpeechService()
\ No newline at end of file
+
+    def save_notes(self, session, ai_notes):
+        # Written by the background note writer so the socket handler returns
+        # without waiting on the database
+        return note_write_queue.enqueue(
+            ta_id=session.user_id,
+            title=f"Live Notes - {session.start_time.strftime('%Y-%m-%d %H:%M')}",
+            content=ai_notes,
+            subject='Live Speech Notes'
+        )
+
+# Global service instance; per-connection state lives in its registry
+speech_service = RealSpeechService()
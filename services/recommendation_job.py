@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from sqlalchemy import bindparam, text
+from services.preference_service import load_snapshots
+from services.ta_ranking_engine import TARankingEngine, TAPool
+
+TAS_SQL = """
+    SELECT u.id, p.subjects, p.rating
+    FROM ta_profiles p JOIN users u ON u.id = p.user_id
+    WHERE u.role = 'ta'
+"""
+# Students whose preferences changed since the last finished run, plus any
+# that have never been ranked
+CHANGED_WHERE = """
+    WHERE sp.updated_at >= :since
+       OR NOT EXISTS (SELECT 1 FROM ta_recommendations r WHERE r.student_id = sp.user_id)
+"""
+DELETE_SQL = text("DELETE FROM ta_recommendations WHERE student_id IN :student_ids").bindparams(
+    bindparam('student_ids', expanding=True)
+)
+INSERT_SQL = text("""
+    INSERT INTO ta_recommendations (student_id, position, ta_id, score, version, computed_at)
+    VALUES (:student_id, :position, :ta_id, :score, :version, :computed_at)
+""")
+
+# Per-process state for pool workers: the TA matrix is built once per worker
+# from the list passed to the initializer, not once per chunk
+_worker = {}
+
+def _init_worker(tas):
+    _worker['engine'] = TARankingEngine()
+    _worker['pool'] = TAPool(tas)
+
+def _rank_chunk(preferences, top_n):
+    engine = _worker['engine']
+    pool = _worker['pool']
+    return [(p.user_id, engine.top(p, pool, top_n)) for p in preferences]
+
+class RecommendationJob:
+    # Offline ranking of TAs for every student with preferences. Results are
+    # written to ta_recommendations in chunks, each stamped with the run's id
+    # as its version; /student/swipe reads them back in one indexed query.
+    # Incremental runs only rank students whose preferences changed since the
+    # last finished run (TAs added in between still reach them through the
+    # live part of the swipe feed).
+    def __init__(self, engine, top_n=50, chunk_size=200, workers=None):
+        self.engine = engine
+        self.top_n = top_n
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, incremental=True):
+        started_at = datetime.utcnow()
+        with self.engine.begin() as connection:
+            since = connection.execute(text(
+                "SELECT started_at FROM recommendation_runs WHERE finished_at IS NOT NULL ORDER BY id DESC LIMIT 1"
+            )).scalar() if incremental else None
+            version = connection.execute(
+                text("INSERT INTO recommendation_runs (mode, started_at, students) VALUES (:mode, :started_at, 0) RETURNING id"),
+                {'mode': 'incremental' if since else 'full', 'started_at': started_at}
+            ).scalar()
+            tas = [{'id': row[0], 'subjects': row[1], 'rating': row[2]} for row in connection.execute(text(TAS_SQL))]
+            if since:
+                students = load_snapshots(connection, CHANGED_WHERE, {'since': since})
+            else:
+                students = load_snapshots(connection)
+
+        chunks = [students[i:i + self.chunk_size] for i in range(0, len(students), self.chunk_size)]
+        if tas and chunks:
+            if self.workers == 1 or len(chunks) == 1:
+                _init_worker(tas)
+                for chunk in chunks:
+                    self._write(_rank_chunk(chunk, self.top_n), version, started_at)
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(tas,)) as pool:
+                    futures = [pool.submit(_rank_chunk, chunk, self.top_n) for chunk in chunks]
+                    for future in as_completed(futures):
+                        self._write(future.result(), version, started_at)
+
+        with self.engine.begin() as connection:
+            if not since:
+                # A full run covers every student, so anything older belongs to
+                # students who have since removed their preferences
+                connection.execute(text("DELETE FROM ta_recommendations WHERE version < :version"), {'version': version})
+            connection.execute(
+                text("UPDATE recommendation_runs SET finished_at = :finished_at, students = :students WHERE id = :id"),
+                {'finished_at': datetime.utcnow(), 'students': len(students), 'id': version}
+            )
+        return {
+            'version': version,
+            'mode': 'incremental' if since else 'full',
+            'students': len(students),
+            'tas': len(tas),
+            'seconds': (datetime.utcnow() - started_at).total_seconds()
+        }
+
+    def _write(self, ranked, version, computed_at):
+        rows = [{
+            'student_id': student_id,
+            'position': position,
+            'ta_id': ta_id,
+            'score': score,
+            'version': version,
+            'computed_at': computed_at
+        } for student_id, top in ranked for position, (ta_id, score) in enumerate(top)]
+        with self.engine.begin() as connection:
+            connection.execute(DELETE_SQL, {'student_ids': [student_id for student_id, _ in ranked]})
+            if rows:
+                connection.execute(INSERT_SQL, rows)
@@ -0,0 +1,180 @@
+from datetime import datetime
+from sqlalchemy import bindparam, text
+from services.deadlines import parse_datetime
+from services.timetable_scheduler import timetable_scheduler, StudyBlock
+
+PLAN_SQL = text("SELECT version, base_version, generated_at FROM study_plans WHERE user_id = :user_id")
+UPSERT_PLAN_SQL = text("""
+    INSERT INTO study_plans (user_id, version, base_version, generated_at)
+    VALUES (:user_id, :version, :base_version, :generated_at)
+    ON CONFLICT (user_id) DO UPDATE SET
+        version = excluded.version,
+        base_version = excluded.base_version,
+        generated_at = excluded.generated_at
+""")
+LIVE_BLOCKS_SQL = text("""
+    SELECT id, deadline_id, start_time, end_time FROM study_plan_blocks
+    WHERE user_id = :user_id AND removed_version IS NULL
+    ORDER BY start_time
+""")
+# Blocks added or removed after a version the client already has
+CHANGED_DAYS_SQL = text("""
+    SELECT start_time FROM study_plan_blocks
+    WHERE user_id = :user_id AND (created_version > :since OR removed_version > :since)
+""")
+INSERT_BLOCK_SQL = text("""
+    INSERT INTO study_plan_blocks (user_id, deadline_id, start_time, end_time, created_version)
+    VALUES (:user_id, :deadline_id, :start_time, :end_time, :version)
+""")
+REMOVE_BLOCKS_SQL = text("UPDATE study_plan_blocks SET removed_version = :version WHERE id IN :ids").bindparams(
+    bindparam('ids', expanding=True)
+)
+
+def _hours(block):
+    return (block.end - block.start).total_seconds() / 3600
+
+class StudyPlanner:
+    # Keeps each student's generated plan in study_plan_blocks so it does not
+    # have to be recomputed on every visit. A deadline that is added, changed
+    # or completed is re-planned on its own around the blocks already placed
+    # for the others; only when it no longer fits are the other blocks before
+    # its due date planned again with it. Every change bumps the plan version
+    # and tombstones the blocks it replaces, so a client holding version N
+    # gets back just the days that changed since N. A plan generated on an
+    # earlier day is regenerated in full.
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler or timetable_scheduler
+
+    def timetable(self, connection, user_id, since=None, now=None):
+        # None when the student has no pending deadlines
+        now = now or datetime.now()
+        tasks, busy, studied = self.scheduler.load(connection, user_id, now)
+        if not tasks:
+            return None
+        plan = connection.execute(PLAN_SQL, {'user_id': user_id}).first()
+        if plan is None or parse_datetime(plan[2]).date() < now.date():
+            return self.generate(connection, user_id, now, (tasks, busy, studied))
+        version, base_version = plan[0], plan[1]
+        blocks = self._live_blocks(connection, user_id)
+        if since is not None and base_version <= since <= version:
+            dates = {parse_datetime(row[0]).date()
+                     for row in connection.execute(CHANGED_DAYS_SQL, {'user_id': user_id, 'since': since})}
+            return self._delta(tasks, studied, blocks, dates, version, since)
+        return self._full(tasks, studied, blocks, version)
+
+    def generate(self, connection, user_id, now=None, loaded=None):
+        now = now or datetime.now()
+        tasks, busy, studied = loaded or self.scheduler.load(connection, user_id, now)
+        plan = connection.execute(PLAN_SQL, {'user_id': user_id}).first()
+        version = (plan[0] if plan else 0) + 1
+        blocks, _ = self.scheduler.schedule(tasks, busy, studied, now)
+        # A full plan starts a new delta history; older tombstones go with it
+        connection.execute(text("DELETE FROM study_plan_blocks WHERE user_id = :user_id"), {'user_id': user_id})
+        self._insert(connection, user_id, blocks, version)
+        connection.execute(UPSERT_PLAN_SQL, {'user_id': user_id, 'version': version, 'base_version': version, 'generated_at': now})
+        return self._full(tasks, studied, self._live_blocks(connection, user_id), version)
+
+    def replan(self, connection, user_id, deadline_ids, now=None):
+        # Called after deadlines change; returns the delta, or None when the
+        # student has no current plan (the next visit generates one)
+        now = now or datetime.now()
+        plan = connection.execute(PLAN_SQL, {'user_id': user_id}).first()
+        if plan is None or parse_datetime(plan[2]).date() < now.date():
+            return None
+        tasks, busy, studied = self.scheduler.load(connection, user_id, now)
+        by_id = {task.id: task for task in tasks}
+        changed = set(deadline_ids)
+        live = self._live_blocks(connection, user_id)
+
+        dropped = [b for b in live if b.deadline_id in changed or b.deadline_id not in by_id]
+        kept = [b for b in live if b.deadline_id not in changed and b.deadline_id in by_id]
+        # Hours the other deadlines are still short of get another try, since
+        # a completed or moved deadline may have freed the time they need
+        extra = {i: h for i, h in self._unscheduled(tasks, studied, kept).items()
+                 if i not in changed and by_id[i].due_date > now}
+        targets = [by_id[i] for i in changed if i in by_id]
+        added = []
+        if targets or extra:
+            future = [b for b in kept if b.end > now]
+            added, unscheduled = self._schedule(targets, extra, by_id, busy, studied, now, future)
+            short = [t for t in targets if t.id in unscheduled and t.due_date > now]
+            if short:
+                # Not enough room left around the existing plan: re-plan the
+                # blocks up to the latest due date that came up short
+                window_end = max(t.due_date for t in short)
+                moved = [b for b in future if b.end <= window_end]
+                if moved:
+                    for b in moved:
+                        extra[b.deadline_id] = extra.get(b.deadline_id, 0) + _hours(b)
+                    moved_ids = {b.id for b in moved}
+                    dropped += moved
+                    kept = [b for b in kept if b.id not in moved_ids]
+                    added, _ = self._schedule(targets, extra, by_id, busy, studied, now,
+                                              [b for b in kept if b.end > now])
+
+        version = plan[0]
+        if dropped or added:
+            version += 1
+            if dropped:
+                connection.execute(REMOVE_BLOCKS_SQL, {'version': version, 'ids': [b.id for b in dropped]})
+            self._insert(connection, user_id, added, version)
+            connection.execute(UPSERT_PLAN_SQL, {'user_id': user_id, 'version': version, 'base_version': plan[1],
+                                                 'generated_at': parse_datetime(plan[2])})
+        dates = {b.start.date() for b in dropped + added}
+        return self._delta(tasks, studied, self._live_blocks(connection, user_id), dates, version, plan[0])
+
+    def _schedule(self, targets, extra, by_id, busy, studied, now, reserved):
+        # Changed deadlines are planned in full; the others only for the
+        # extra hours given, around the blocks being kept
+        tasks = targets + [by_id[i].replace(study_hours=h) for i, h in extra.items()]
+        studied = {i: h for i, h in studied.items() if i not in extra}
+        return self.scheduler.schedule(tasks, busy, studied, now, [(b.start, b.end) for b in reserved])
+
+    def _live_blocks(self, connection, user_id):
+        return [StudyBlock(row[1], parse_datetime(row[2]), parse_datetime(row[3]), row[0])
+                for row in connection.execute(LIVE_BLOCKS_SQL, {'user_id': user_id})]
+
+    def _insert(self, connection, user_id, blocks, version):
+        if blocks:
+            connection.execute(INSERT_BLOCK_SQL, [{
+                'user_id': user_id,
+                'deadline_id': b.deadline_id,
+                'start_time': b.start,
+                'end_time': b.end,
+                'version': version
+            } for b in blocks])
+
+    def _unscheduled(self, tasks, studied, blocks):
+        planned = {}
+        for b in blocks:
+            planned[b.deadline_id] = planned.get(b.deadline_id, 0) + _hours(b)
+        unscheduled = {}
+        for task in tasks:
+            missing = (task.study_hours or 0) - studied.get(task.id, 0) - planned.get(task.id, 0)
+            if missing > 0:
+                unscheduled[task.id] = missing
+        return unscheduled
+
+    def _full(self, tasks, studied, blocks, version):
+        by_id = {task.id: task for task in tasks}
+        blocks = [b for b in blocks if b.deadline_id in by_id]
+        timetable = self.scheduler.to_timetable(tasks, blocks, self._unscheduled(tasks, studied, blocks))
+        timetable["version"] = version
+        return timetable
+
+    def _delta(self, tasks, studied, blocks, dates, version, since):
+        # Totals for the whole plan, sessions only for the days that changed
+        # after version since; a changed day that ends up empty comes back
+        # with no sessions. Clients holding any other version must refetch
+        timetable = self._full(tasks, studied, blocks, version)
+        by_id = {task.id: task for task in tasks}
+        timetable["daily_schedule"] = [
+            self.scheduler.render_day(day, [b for b in blocks if b.start.date() == day and b.deadline_id in by_id], by_id)
+            for day in sorted(dates)
+        ]
+        timetable["delta"] = True
+        timetable["since"] = since
+        return timetable
+
+# Global planner
+study_planner = StudyPlanner()
@@ -0,0 +1,100 @@
+from database.db import db, StudySession, StudyStatRollup
+from sqlalchemy import text, bindparam
+from datetime import datetime, timedelta
+
+class StudyStatsService:
+    # Per-user, per-day, per-timer-type totals so the dashboard and stats
+    # pages never have to scan a user's full StudySession history
+    UPSERT_SQL = text("""
+        INSERT INTO study_stat_rollups (user_id, day, timer_type, total_seconds, session_count)
+        VALUES (:user_id, :day, :timer_type, :seconds, :count)
+        ON CONFLICT (user_id, day, timer_type) DO UPDATE SET
+            total_seconds = study_stat_rollups.total_seconds + excluded.total_seconds,
+            session_count = study_stat_rollups.session_count + excluded.session_count
+    """).bindparams(bindparam('day', type_=db.Date))
+
+    def _bump(self, user_id, day, timer_type, seconds=0, count=0):
+        db.session.execute(self.UPSERT_SQL, {
+            'user_id': user_id,
+            'day': day,
+            'timer_type': timer_type,
+            'seconds': seconds,
+            'count': count
+        })
+
+    def record_session_started(self, session_obj):
+        # Called in the same transaction as the StudySession insert
+        self._bump(session_obj.user_id, self._session_day(session_obj), session_obj.timer_type, count=1)
+
+    def record_session_completed(self, session_obj, previous_completed):
+        # end_timer may be called more than once, so only the difference is added
+        delta = (session_obj.completed_duration or 0) - (previous_completed or 0)
+        if delta:
+            self._bump(session_obj.user_id, self._session_day(session_obj), session_obj.timer_type, seconds=delta)
+
+    def _session_day(self, session_obj):
+        created_at = session_obj.created_at or datetime.utcnow()
+        return created_at.date()
+
+    def get_dashboard_stats(self, user_id):
+        today = datetime.now().date()
+        totals = db.session.query(
+            db.func.coalesce(db.func.sum(StudyStatRollup.total_seconds), 0),
+            db.func.coalesce(db.func.sum(db.case((StudyStatRollup.day == today, StudyStatRollup.total_seconds), else_=0)), 0)
+        ).filter(StudyStatRollup.user_id == user_id).one()
+
+        last_session = db.session.query(StudySession.timer_type).filter(
+            StudySession.user_id == user_id
+        ).order_by(StudySession.created_at.desc()).first()
+
+        return {
+            'total_seconds': totals[0],
+            'today_seconds': totals[1],
+            'last_timer': last_session[0] if last_session else None
+        }
+
+    def get_timer_stats(self, user_id):
+        rows = db.session.query(
+            StudyStatRollup.timer_type,
+            db.func.sum(StudyStatRollup.total_seconds),
+            db.func.sum(StudyStatRollup.session_count)
+        ).filter(StudyStatRollup.user_id == user_id).group_by(StudyStatRollup.timer_type).all()
+        return [[timer_type, int(seconds / 60), count] for timer_type, seconds, count in rows]
+
+    def get_daily_stats(self, user_id, days=7):
+        today = datetime.now().date()
+        rows = db.session.query(
+            StudyStatRollup.day,
+            db.func.sum(StudyStatRollup.total_seconds)
+        ).filter(
+            StudyStatRollup.user_id == user_id,
+            StudyStatRollup.day > today - timedelta(days=days)
+        ).group_by(StudyStatRollup.day).all()
+        seconds_by_day = dict(rows)
+
+        daily_stats = []
+        for i in range(days):
+            date = today - timedelta(days=i)
+            daily_stats.append([date.strftime('%a'), int(seconds_by_day.get(date, 0) / 60)])
+        return daily_stats
+
+    def backfill(self, user_id=None):
+        params = {}
+        user_filter = ""
+        if user_id is not None:
+            user_filter = "WHERE user_id = :user_id"
+            params['user_id'] = user_id
+
+        db.session.execute(text(f"DELETE FROM study_stat_rollups {user_filter}"), params)
+        result = db.session.execute(text(f"""
+            INSERT INTO study_stat_rollups (user_id, day, timer_type, total_seconds, session_count)
+            SELECT user_id, date(created_at), timer_type, SUM(COALESCE(completed_duration, 0)), COUNT(*)
+            FROM study_sessions
+            {user_filter}
+            GROUP BY user_id, date(created_at), timer_type
+        """), params)
+        db.session.commit()
+        return result.rowcount
+
+# Global service instance
+study_stats_service = StudyStatsService()
@@ -0,0 +1,160 @@
+import threading
+import time
+from sqlalchemy import bindparam, event, inspect, text
+from sqlalchemy.orm import Session, object_session
+from database.db import db, TAProfile
+from services.subjects import parse_subjects
+
+SUBJECT_IDS_SQL = text("SELECT name, id FROM subjects WHERE name IN :names").bindparams(
+    bindparam('names', expanding=True)
+)
+INSERT_SUBJECT_SQL = text("INSERT INTO subjects (name) VALUES (:name) ON CONFLICT (name) DO NOTHING")
+INSERT_TA_SUBJECT_SQL = text("INSERT INTO ta_subjects (ta_id, subject_id) VALUES (:ta_id, :subject_id)")
+
+def subject_ids(connection, names):
+    names = list(names)
+    if not names:
+        return {}
+    ids = dict(connection.execute(SUBJECT_IDS_SQL, {'names': names}).fetchall())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        connection.execute(INSERT_SUBJECT_SQL, [{'name': name} for name in missing])
+        ids.update(connection.execute(SUBJECT_IDS_SQL, {'names': missing}).fetchall())
+    return ids
+
+def sync_ta_subjects(connection, ta_id, subjects):
+    names = parse_subjects(subjects)
+    connection.execute(text("DELETE FROM ta_subjects WHERE ta_id = :ta_id"), {'ta_id': ta_id})
+    ids = subject_ids(connection, names)
+    if names:
+        connection.execute(INSERT_TA_SUBJECT_SQL, [{'ta_id': ta_id, 'subject_id': ids[name]} for name in names])
+    return names
+
+def rebuild_ta_subjects(connection):
+    # Regenerates ta_subjects from every profile; used by the migration and
+    # after bulk writes that bypass the ORM hooks below
+    parsed = [(ta_id, parse_subjects(subjects))
+              for ta_id, subjects in connection.execute(text("SELECT user_id, subjects FROM ta_profiles"))]
+    connection.execute(text("DELETE FROM ta_subjects"))
+    ids = subject_ids(connection, {name for _, names in parsed for name in names})
+    pairs = {(ta_id, ids[name]) for ta_id, names in parsed for name in names}
+    if pairs:
+        connection.execute(INSERT_TA_SUBJECT_SQL, [{'ta_id': ta_id, 'subject_id': subject_id} for ta_id, subject_id in pairs])
+
+class SubjectIndex:
+    # Inverted index from canonical subject name to the set of TA user ids
+    # teaching it, mirrored from ta_subjects. Each worker loads it once and
+    # patches it as profiles are committed locally; writes made by other
+    # workers are picked up by the periodic reload.
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self.postings = {}
+        self.subjects_by_ta = {}
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def load(self, connection=None):
+        if connection is None:
+            with db.engine.connect() as connection:
+                return self.load(connection)
+        postings = {}
+        subjects_by_ta = {}
+        for name, ta_id in connection.execute(text(
+            "SELECT s.name, ts.ta_id FROM ta_subjects ts JOIN subjects s ON s.id = ts.subject_id"
+        )):
+            postings.setdefault(name, set()).add(ta_id)
+            subjects_by_ta.setdefault(ta_id, []).append(name)
+        with self.lock:
+            self.postings = postings
+            self.subjects_by_ta = subjects_by_ta
+            self.loaded_at = time.monotonic()
+
+    def rebuild(self):
+        with db.engine.begin() as connection:
+            rebuild_ta_subjects(connection)
+        self.load()
+
+    def ensure_loaded(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_interval:
+            self.load()
+
+    def update_ta(self, ta_id, names):
+        with self.lock:
+            for name in self.subjects_by_ta.pop(ta_id, ()):
+                posting = self.postings.get(name)
+                if posting is not None:
+                    posting.discard(ta_id)
+                    if not posting:
+                        del self.postings[name]
+            if names:
+                self.subjects_by_ta[ta_id] = list(names)
+                for name in names:
+                    self.postings.setdefault(name, set()).add(ta_id)
+
+    def candidates(self, subjects, match_all=False):
+        # TAs teaching any of the subjects, or all of them with match_all.
+        # Intersection starts from the shortest posting list.
+        self.ensure_loaded()
+        names = parse_subjects(subjects)
+        with self.lock:
+            postings = [self.postings.get(name, set()) for name in names]
+            if not postings:
+                return set()
+            if not match_all:
+                return set().union(*postings)
+            postings.sort(key=len)
+            result = set(postings[0])
+            for posting in postings[1:]:
+                result &= posting
+                if not result:
+                    break
+            return result
+
+    def subjects_for(self, ta_id):
+        self.ensure_loaded()
+        return list(self.subjects_by_ta.get(ta_id, ()))
+
+    def __len__(self):
+        return len(self.subjects_by_ta)
+
+# Global index; populated on first use or explicitly at startup
+subject_index = SubjectIndex()
+
+# Keep ta_subjects in step with ORM writes to TAProfile. The rows are written
+# in the same transaction as the profile; the in-memory index is only patched
+# once that transaction commits.
+PENDING_KEY = 'subject_index_updates'
+
+def _queue_update(target, ta_id, names):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, {})[ta_id] = names
+
+@event.listens_for(TAProfile, 'after_insert')
+def _profile_inserted(mapper, connection, target):
+    _queue_update(target, target.user_id, sync_ta_subjects(connection, target.user_id, target.subjects))
+
+@event.listens_for(TAProfile, 'after_update')
+def _profile_updated(mapper, connection, target):
+    state = inspect(target)
+    previous = state.attrs.user_id.history.deleted
+    if previous and previous[0] != target.user_id:
+        connection.execute(text("DELETE FROM ta_subjects WHERE ta_id = :ta_id"), {'ta_id': previous[0]})
+        _queue_update(target, previous[0], [])
+    elif not state.attrs.subjects.history.has_changes():
+        return
+    _queue_update(target, target.user_id, sync_ta_subjects(connection, target.user_id, target.subjects))
+
+@event.listens_for(TAProfile, 'after_delete')
+def _profile_deleted(mapper, connection, target):
+    connection.execute(text("DELETE FROM ta_subjects WHERE ta_id = :ta_id"), {'ta_id': target.user_id})
+    _queue_update(target, target.user_id, [])
+
+@event.listens_for(Session, 'after_commit')
+def _apply_updates(session):
+    for ta_id, names in session.info.pop(PENDING_KEY, {}).items():
+        subject_index.update_ta(ta_id, names)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_updates(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,59 @@
+import json
+
+# Spellings that should land on the same taxonomy entry
+SUBJECT_ALIASES = {
+    'math': 'mathematics',
+    'maths': 'mathematics',
+    'cs': 'computer science',
+    'comp sci': 'computer science',
+    'bio': 'biology',
+    'chem': 'chemistry',
+    'stats': 'statistics',
+    'ml': 'machine learning',
+}
+
+def canonical_subject(subject):
+    name = ' '.join(subject.lower().split())
+    return SUBJECT_ALIASES.get(name, name)
+
+def parse_subjects(subjects):
+    # Accepts the comma-separated TAProfile.subjects text, the JSON list
+    # stored in StudentPreference.subjects, or a plain list; returns unique
+    # canonical names in their original order
+    if not subjects:
+        return []
+    if isinstance(subjects, str):
+        stripped = subjects.strip()
+        if stripped.startswith('['):
+            try:
+                subjects = json.loads(stripped)
+            except ValueError:
+                subjects = stripped.split(',')
+        else:
+            subjects = stripped.split(',')
+    names = []
+    for subject in subjects:
+        name = canonical_subject(subject)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def parse_confidence(confidence_levels):
+    # {subject: level} from the JSON stored in StudentPreference.confidence_levels
+    # or a dict, keyed by canonical name with levels clamped to 1-5 (3 when
+    # unreadable)
+    if isinstance(confidence_levels, str):
+        try:
+            confidence_levels = json.loads(confidence_levels)
+        except ValueError:
+            return {}
+    if not isinstance(confidence_levels, dict):
+        return {}
+    levels = {}
+    for subject, level in confidence_levels.items():
+        try:
+            level = min(max(int(level), 1), 5)
+        except (TypeError, ValueError):
+            level = 3
+        levels[canonical_subject(subject)] = level
+    return levels
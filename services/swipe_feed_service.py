@@ -0,0 +1,155 @@
+from datetime import datetime
+from sqlalchemy import bindparam, text
+from database.db import db
+from services.subjects import parse_subjects
+from services.ta_ranking_engine import TARankingEngine, TAPool, PreferenceSnapshot
+
+# The feed is walked in phases:
+#   'r' the student's precomputed ranking (ta_recommendations), by position,
+#       used only when it was computed after their preferences last changed
+#   's' other TAs teaching one of the student's subjects
+#   'o' everyone else ('a' replaces 's' and 'o' for students without subjects)
+# Live phases come in (rating, user_id) descending order, unrated TAs counting
+# as 0, which ix_ta_profiles_score_user serves directly. The cursor is the last row shown,
+# so each page is an index range scan however deep the student is; the
+# rating is also bounded on its own, since SQLite will not range-scan an
+# expression index on a row value alone. On SQLite the index is pinned with
+# INDEXED BY; left to itself the planner starts from users by role and sorts
+# every TA for each page.
+EXCLUDE_SWIPED = """
+      AND NOT EXISTS (SELECT 1 FROM matches m WHERE m.student_id = :student_id AND m.ta_id = {ta})
+      AND NOT EXISTS (SELECT 1 FROM swipe_passes s WHERE s.student_id = :student_id AND s.ta_id = {ta})
+"""
+RECOMMENDED_SQL = """
+    SELECT u.id, u.name, p.subjects, p.bio, p.rating, p.profile_image, r.position
+    FROM ta_recommendations r
+    JOIN ta_profiles p ON p.user_id = r.ta_id
+    JOIN users u ON u.id = r.ta_id
+    WHERE r.student_id = :student_id AND r.computed_at >= :fresh_since
+      {exclude}
+      {after}
+    ORDER BY r.position
+    LIMIT :limit
+"""
+FEED_SQL = """
+    SELECT u.id, u.name, p.subjects, p.bio, p.rating, p.profile_image, COALESCE(p.rating, 0)
+    FROM ta_profiles p {indexed} JOIN users u ON u.id = p.user_id
+    WHERE u.role = 'ta'
+      AND {phase}
+      {exclude}
+      AND NOT EXISTS (SELECT 1 FROM ta_recommendations r
+                      WHERE r.student_id = :student_id AND r.ta_id = p.user_id AND r.computed_at >= :fresh_since)
+      {after}
+    ORDER BY COALESCE(p.rating, 0) DESC, p.user_id DESC
+    LIMIT :limit
+"""
+TEACHES_SUBJECT = "EXISTS (SELECT 1 FROM ta_subjects ts WHERE ts.ta_id = p.user_id AND ts.subject_id IN :subject_ids)"
+PHASE_FILTERS = {'s': TEACHES_SUBJECT, 'o': "NOT " + TEACHES_SUBJECT, 'a': "1 = 1"}
+NEVER = datetime(1970, 1, 1)
+
+class SwipeFeedService:
+    PAGE_SIZE = 10
+
+    def __init__(self, page_size=None, ranking_engine=None):
+        self.page_size = page_size or self.PAGE_SIZE
+        self.ranking_engine = ranking_engine or TARankingEngine()
+        self.queries = {}
+
+    def _query(self, phase, after, dialect):
+        key = (phase, after, dialect.name)
+        if key not in self.queries:
+            if phase == 'r':
+                sql = RECOMMENDED_SQL.format(
+                    exclude=EXCLUDE_SWIPED.format(ta='r.ta_id'),
+                    after="AND r.position > :position" if after else ""
+                )
+            else:
+                sql = FEED_SQL.format(
+                    indexed="INDEXED BY ix_ta_profiles_score_user" if dialect.name == 'sqlite' else "",
+                    phase=PHASE_FILTERS[phase],
+                    exclude=EXCLUDE_SWIPED.format(ta='p.user_id'),
+                    after=("AND COALESCE(p.rating, 0) <= :position"
+                           " AND (COALESCE(p.rating, 0), p.user_id) < (:position, :ta_id)") if after else ""
+                )
+            query = text(sql)
+            if phase in ('s', 'o'):
+                query = query.bindparams(bindparam('subject_ids', expanding=True))
+            self.queries[key] = query
+        return self.queries[key]
+
+    def subject_ids(self, preferences):
+        # Snapshots from preference_service carry the ids; anything else is
+        # looked up by name
+        if not preferences:
+            return []
+        if preferences.subject_ids:
+            return list(preferences.subject_ids)
+        names = parse_subjects(preferences.subjects)
+        if not names:
+            return []
+        query = text("SELECT id FROM subjects WHERE name IN :names").bindparams(bindparam('names', expanding=True))
+        return [row[0] for row in db.session.execute(query, {'names': names})]
+
+    def page(self, student_id, preferences=None, cursor=None, limit=None):
+        limit = max(1, min(limit or self.page_size, 50))
+        if preferences is not None:
+            preferences = PreferenceSnapshot.of(preferences)
+        subject_ids = self.subject_ids(preferences)
+        phases = (['r'] if preferences else []) + (['s', 'o'] if subject_ids else ['a'])
+        phase, position, ta_id = self.decode_cursor(cursor, phases)
+        fresh_since = (preferences.updated_at or NEVER) if preferences else NEVER
+        dialect = db.session.get_bind().dialect
+
+        chunks = []
+        count = 0
+        next_cursor = None
+        for current in phases[phases.index(phase):]:
+            params = {'student_id': student_id, 'limit': limit - count, 'fresh_since': fresh_since}
+            if current in ('s', 'o'):
+                params['subject_ids'] = subject_ids
+            after = current == phase and position is not None
+            if after:
+                params.update(position=position, ta_id=ta_id)
+            rows = db.session.execute(self._query(current, after, dialect), params).fetchall()
+            chunks.append((current, [{
+                'id': row[0],
+                'name': row[1],
+                'subjects': row[2],
+                'bio': row[3],
+                'rating': row[4] or 0.0,
+                'profile_image': row[5]
+            } for row in rows]))
+            count += len(rows)
+            if count >= limit:
+                last = rows[-1]
+                next_cursor = self.encode_cursor(current, last[6], last[0])
+                break
+
+        tas = []
+        for current, chunk in chunks:
+            if current != 'r' and preferences and len(chunk) > 1:
+                # Live pages arrive best-rated first; within a page the TA that
+                # fits the student's subjects and confidence best goes first
+                by_id = {ta['id']: ta for ta in chunk}
+                chunk = [by_id[i] for i in self.ranking_engine.rank(preferences, TAPool(chunk))]
+            tas.extend(chunk)
+        return {'tas': tas, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def encode_cursor(phase, position, ta_id):
+        return f"{phase}:{position!r}:{ta_id}"
+
+    @staticmethod
+    def decode_cursor(cursor, phases):
+        # Unknown or stale cursors (e.g. the student just set preferences)
+        # restart the feed instead of failing
+        try:
+            phase, position, ta_id = cursor.split(':')
+            if phase in phases:
+                return phase, int(position) if phase == 'r' else float(position), int(ta_id)
+        except (AttributeError, ValueError):
+            pass
+        return phases[0], None, None
+
+# Global feed service
+swipe_feed_service = SwipeFeedService()
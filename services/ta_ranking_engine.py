@@ -0,0 +1,192 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date
+import numpy as np
+from services.subjects import parse_confidence, parse_subjects
+
+MONTHS = {m: i + 1 for i, m in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'])}
+DATE_RE = re.compile(r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+(\d{1,2})\b", re.I)
+
+class PreferenceSnapshot(namedtuple('PreferenceSnapshot', 'user_id subjects confidence_levels deadlines learning_style subject_ids updated_at',
+                                   defaults=((), None))):
+    # Detached, typed view of a student's preferences: subjects as canonical
+    # names in the student's order, confidence_levels as {name: 1-5}, plus the
+    # matching subject ids. Safe to hand to a worker thread or process after
+    # the request's session is gone. Built by services.preference_service.
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, preferences):
+        # Also accepts any object with the StudentPreference attributes
+        if isinstance(preferences, cls):
+            return preferences
+        return cls(
+            preferences.user_id,
+            parse_subjects(preferences.subjects),
+            parse_confidence(preferences.confidence_levels),
+            preferences.deadlines,
+            preferences.learning_style,
+            tuple(getattr(preferences, 'subject_ids', ())),
+            getattr(preferences, 'updated_at', None)
+        )
+
+class TAPool:
+    # Dense features for one list of TAs: a TA x subject 0/1 matrix and a
+    # rating vector. Built once and reused for every student ranked against
+    # the same pool.
+    def __init__(self, tas):
+        self.ids = [ta['id'] for ta in tas]
+        self.vocabulary = {}
+        rows, cols = [], []
+        for row, ta in enumerate(tas):
+            for subject in parse_subjects(ta.get('subjects')):
+                col = self.vocabulary.setdefault(subject, len(self.vocabulary))
+                rows.append(row)
+                cols.append(col)
+
+        self.subjects = np.zeros((len(tas), max(len(self.vocabulary), 1)), dtype=np.float32)
+        self.subjects[rows, cols] = 1.0
+        self.ratings = np.array([ta.get('rating') or 0.0 for ta in tas], dtype=np.float32) / 5.0
+
+    @staticmethod
+    def key(tas):
+        # A digest rather than hash() so the key is the same in every process
+        # and distinct pools cannot collide in practice
+        raw = json.dumps([[ta['id'], ta.get('subjects'), ta.get('rating')] for ta in tas], default=str)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+class TARankingEngine:
+    # Scores every TA against a student's preferences in one matrix-vector
+    # pass. A subject counts for more the less confident the student is in it
+    # and the sooner a deadline mentioning it is due; rating breaks ties and
+    # ranks TAs with no subject overlap.
+    def __init__(self, subject_weight=1.0, coverage_weight=0.5, rating_weight=0.3, max_pools=4, today=None):
+        self.subject_weight = subject_weight
+        self.coverage_weight = coverage_weight
+        self.rating_weight = rating_weight
+        self.max_pools = max_pools
+        self.today = today
+        self.pools = OrderedDict()
+        self.lock = threading.Lock()
+
+    def pool(self, tas, key=None):
+        key = TAPool.key(tas) if key is None else key
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool is not None:
+                self.pools.move_to_end(key)
+                return key, pool
+        pool = TAPool(tas)
+        with self.lock:
+            self.pools[key] = pool
+            while len(self.pools) > self.max_pools:
+                self.pools.popitem(last=False)
+        return key, pool
+
+    def student_weights(self, preferences, pool):
+        subjects = parse_subjects(preferences.subjects)
+        confidence = parse_confidence(preferences.confidence_levels)
+        urgency = self.deadline_urgency(preferences.deadlines, subjects)
+
+        weights = np.zeros(pool.subjects.shape[1], dtype=np.float32)
+        for subject in subjects:
+            col = pool.vocabulary.get(subject)
+            if col is None:
+                continue
+            level = confidence.get(subject, 3)
+            # Confidence 1 -> need 1.0, confidence 5 -> need 0.2
+            weights[col] = (6 - level) / 5.0 * (1.0 + urgency.get(subject, 0.0))
+        return weights, len(subjects)
+
+    def deadline_urgency(self, deadlines, subjects):
+        # Deadlines are free text ("Math exam on Dec 15, Physics project due
+        # Dec 20"); each clause naming a subject and a date adds urgency that
+        # grows as the date approaches
+        urgency = {}
+        if not deadlines or not subjects:
+            return urgency
+        today = self.today or date.today()
+        for clause in re.split(r"[,;\n]", deadlines.lower()):
+            found = DATE_RE.search(clause)
+            if not found:
+                continue
+            try:
+                due = date(today.year, MONTHS[found.group(1)[:3].lower()], int(found.group(2)))
+                if due < today:
+                    # Feb 29 has no date next year, so the clause is skipped
+                    due = due.replace(year=today.year + 1)
+            except ValueError:
+                continue
+            score = 1.0 / (1.0 + (due - today).days / 7.0)
+            for subject in subjects:
+                if subject in clause or subject[:4] in clause:
+                    urgency[subject] = max(urgency.get(subject, 0.0), score)
+        return urgency
+
+    def scores(self, preferences, pool):
+        weights, wanted = self.student_weights(preferences, pool)
+        subject_score = pool.subjects @ weights
+        coverage = (pool.subjects @ (weights > 0).astype(np.float32)) / max(wanted, 1)
+        return self.subject_weight * subject_score + self.coverage_weight * coverage + self.rating_weight * pool.ratings
+
+    def rank(self, preferences, pool):
+        # Returns TA ids best first; stable so equal scores keep input order
+        scores = self.scores(preferences, pool) if preferences else pool.ratings
+        order = np.argsort(-scores, kind='stable')
+        return [pool.ids[i] for i in order]
+
+    def top(self, preferences, pool, n):
+        # Best n (ta_id, score) pairs without sorting the whole pool
+        scores = self.scores(preferences, pool) if preferences else pool.ratings
+        n = min(n, len(scores))
+        if n <= 0:
+            return []
+        best = np.argpartition(-scores, n - 1)[:n]
+        best = best[np.lexsort((best, -scores[best]))]
+        return [(pool.ids[i], float(scores[i])) for i in best]
+
+    def fingerprint(self, preferences):
+        # Urgency depends on today's date, so the day is part of the key
+        if not preferences:
+            return 'none'
+        raw = json.dumps([
+            sorted(parse_subjects(preferences.subjects)),
+            sorted(parse_confidence(preferences.confidence_levels).items()),
+            (preferences.deadlines or '').strip().lower(),
+            preferences.learning_style or '',
+            (self.today or date.today()).isoformat()
+        ])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+class RankingCache:
+    # LRU of ranked TA ids keyed by (preference fingerprint, TA pool key)
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key):
+        with self.lock:
+            ranked = self.entries.get(key)
+            if ranked is None:
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return ranked
+
+    def put(self, key, ranked):
+        with self.lock:
+            self.entries[key] = ranked
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,317 @@
+import math
+from collections import namedtuple
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import bindparam, text
+from services.deadlines import load_deadlines, parse_datetime
+
+PRIORITY_WEIGHTS = {'critical': 4.0, 'high': 3.0, 'medium': 2.0, 'low': 1.0}
+
+# One scheduled block of study for a task; id is set once it is persisted
+StudyBlock = namedtuple('StudyBlock', 'deadline_id start end id', defaults=(None,))
+
+# Study blocks written by apply can move; anything else (classes, entries
+# added by hand) is fixed. Past study for a deadline counts as done.
+BUSY_SQL = text("""
+    SELECT start_time, end_time FROM timetable_entries
+    WHERE user_id = :user_id AND (entry_type IS NULL OR entry_type <> 'study') AND end_time > :now
+""")
+STUDIED_SQL = text("""
+    SELECT deadline_id, start_time, end_time FROM timetable_entries
+    WHERE user_id = :user_id AND deadline_id IS NOT NULL AND end_time <= :now
+""")
+# Future entries, the part of the timetable an apply may change
+CURRENT_ENTRIES_SQL = text("""
+    SELECT id, start_time, end_time, title, subject, description, duration, priority, deadline_id, entry_type
+    FROM timetable_entries
+    WHERE user_id = :user_id AND end_time > :now
+""")
+OWNED_DEADLINES_SQL = text("SELECT id FROM deadlines WHERE user_id = :user_id AND id IN :ids").bindparams(
+    bindparam('ids', expanding=True)
+)
+INSERT_ENTRY_SQL = text("""
+    INSERT INTO timetable_entries (user_id, title, start_time, end_time, subject, description, duration, priority, deadline_id, entry_type)
+    VALUES (:user_id, :title, :start_time, :end_time, :subject, :description, :duration, :priority, :deadline_id, 'study')
+""")
+DELETE_ENTRIES_SQL = text("DELETE FROM timetable_entries WHERE id IN :ids").bindparams(bindparam('ids', expanding=True))
+ENTRY_FIELDS = ('start_time', 'end_time', 'title', 'subject', 'description', 'duration', 'priority', 'deadline_id')
+
+class TimetableError(ValueError):
+    pass
+
+def format_duration(minutes):
+    if minutes < 60:
+        return f"{minutes} minutes"
+    hours = minutes / 60
+    return f"{hours:g} hour" if hours == 1 else f"{hours:g} hours"
+
+class TimetableScheduler:
+    # Packs each deadline's study hours into free time before it is due.
+    # Time is a grid of slot_minutes slots between day_start and day_end; slots
+    # overlapping fixed timetable entries or already past are unavailable.
+    # Days are filled slot by slot: each free run goes to the task under the
+    # most pressure (priority weight x slots still needed / free slots left
+    # before its due date), in blocks of at most max_block_hours followed by a
+    # break, up to daily_cap_hours a day. Pressure rises as a deadline nears,
+    # so low-priority work still gets done in time when there is room for it.
+    def __init__(self, slot_minutes=30, day_start=9, day_end=21, daily_cap_hours=6,
+                 max_block_hours=2, break_minutes=30, horizon_days=180):
+        self.slot_minutes = slot_minutes
+        self.day_start = day_start
+        self.day_end = day_end
+        self.slots_per_day = (day_end - day_start) * 60 // slot_minutes
+        self.cap_slots = int(daily_cap_hours * 60 // slot_minutes)
+        self.block_slots = max(int(max_block_hours * 60 // slot_minutes), 1)
+        self.break_slots = math.ceil(break_minutes / slot_minutes)
+        self.horizon_days = horizon_days
+
+    def load(self, connection, user_id, now=None):
+        now = now or datetime.now()
+        tasks = load_deadlines(connection, user_id, completed=False)
+        busy = [(parse_datetime(start), parse_datetime(end))
+                for start, end in connection.execute(BUSY_SQL, {'user_id': user_id, 'now': now})]
+        studied = {}
+        for deadline_id, start, end in connection.execute(STUDIED_SQL, {'user_id': user_id, 'now': now}):
+            hours = (parse_datetime(end) - parse_datetime(start)).total_seconds() / 3600
+            studied[deadline_id] = studied.get(deadline_id, 0) + hours
+        return tasks, busy, studied
+
+    def _day_origin(self, day):
+        return datetime.combine(day, datetime.min.time()) + timedelta(hours=self.day_start)
+
+    def _slot_index(self, first_day, moment, days):
+        # Global index of the first slot starting at or after moment
+        day = (moment.date() - first_day).days
+        if day >= days:
+            return days * self.slots_per_day
+        if day < 0:
+            return 0
+        offset = (moment - self._day_origin(moment.date())).total_seconds() / 60
+        within = min(max(math.ceil(offset / self.slot_minutes), 0), self.slots_per_day)
+        return day * self.slots_per_day + within
+
+    def schedule(self, tasks, busy=(), studied=None, now=None, reserved=()):
+        # reserved: (start, end) blocks already planned for other deadlines;
+        # they take up time, count towards the daily cap and keep a break
+        # free on either side
+        now = now or datetime.now()
+        studied = studied or {}
+        spd = self.slots_per_day
+        slot = timedelta(minutes=self.slot_minutes)
+
+        pending = []
+        overdue = {}
+        for task in tasks:
+            hours = max((task.study_hours or 0) - studied.get(task.id, 0), 0)
+            if hours <= 0:
+                continue
+            if task.due_date > now:
+                pending.append((task, math.ceil(hours * 60 / self.slot_minutes)))
+            else:
+                overdue[task.id] = hours
+        if not pending:
+            return [], overdue
+
+        first_day = now.date()
+        last_due = max(task.due_date for task, _ in pending)
+        days = min((last_due.date() - first_day).days + 1, self.horizon_days)
+
+        free = np.ones(days * spd, dtype=bool)
+        free[:self._slot_index(first_day, now, days)] = False
+        for start, end in busy:
+            # Slots are [s, s + slot); an entry blocks every slot it touches
+            lo = self._slot_index(first_day, start - slot + timedelta(microseconds=1), days)
+            hi = self._slot_index(first_day, end, days)
+            free[lo:hi] = False
+        used_by_day = np.zeros(days, dtype=np.int64)
+        for start, end in reserved:
+            lo = self._slot_index(first_day, start - slot + timedelta(microseconds=1), days)
+            hi = self._slot_index(first_day, end, days)
+            if lo < hi:
+                free[max((lo // spd) * spd, lo - self.break_slots):min((lo // spd + 1) * spd, hi + self.break_slots)] = False
+                used_by_day[lo // spd] += hi - lo
+        free_before = np.concatenate(([0], np.cumsum(free)))
+
+        remaining = np.array([slots for _, slots in pending], dtype=np.int64)
+        due_slot = np.array([self._slot_index(first_day, task.due_date, days) for task, _ in pending], dtype=np.int64)
+        weight = np.array([PRIORITY_WEIGHTS.get(task.priority, 2.0) for task, _ in pending])
+
+        placed = []
+        for day in range(days):
+            base = day * spd
+            used = int(used_by_day[day])
+            i = 0
+            while i < spd and used < self.cap_slots:
+                if not free[base + i]:
+                    i += 1
+                    continue
+                run = 1
+                while i + run < spd and free[base + i + run]:
+                    run += 1
+                g = base + i
+                eligible = (remaining > 0) & (due_slot > g)
+                if not eligible.any():
+                    break
+                capacity = np.maximum(free_before[due_slot] - free_before[g], 1)
+                pressure = np.where(eligible, weight * remaining / capacity, -1.0)
+                t = int(pressure.argmax())
+                length = int(min(run, self.block_slots, remaining[t], self.cap_slots - used, due_slot[t] - g))
+                placed.append((t, g, length))
+                remaining[t] -= length
+                used += length
+                i += length + self.break_slots
+            if not ((remaining > 0) & (due_slot > base + spd)).any():
+                break
+
+        blocks = [StudyBlock(
+            pending[t][0].id,
+            self._day_origin(first_day + timedelta(days=g // spd)) + (g % spd) * slot,
+            self._day_origin(first_day + timedelta(days=g // spd)) + (g % spd + length) * slot
+        ) for t, g, length in placed]
+        unscheduled = dict(overdue)
+        unscheduled.update((pending[t][0].id, float(remaining[t]) * self.slot_minutes / 60)
+                           for t in range(len(pending)) if remaining[t] > 0)
+        return blocks, unscheduled
+
+    def to_timetable(self, tasks, blocks, unscheduled=None):
+        # Same shape the old generate_ai_timetable returned, so the timetable
+        # page and apply-timetable work unchanged; days without study are left out
+        by_id = {task.id: task for task in tasks}
+        days = {}
+        for block in sorted(blocks, key=lambda b: b.start):
+            days.setdefault(block.start.date(), []).append(block)
+
+        timetable = {
+            "total_sessions": len(blocks),
+            "total_hours": round(sum((b.end - b.start).total_seconds() for b in blocks) / 3600, 1),
+            "subjects": sorted({by_id[b.deadline_id].subject for b in blocks}),
+            "daily_schedule": [],
+            "unscheduled": [{
+                "deadline_id": deadline_id,
+                "title": by_id[deadline_id].title,
+                "hours": round(hours, 1)
+            } for deadline_id, hours in (unscheduled or {}).items() if deadline_id in by_id]
+        }
+        for day, day_blocks in sorted(days.items()):
+            timetable["daily_schedule"].append(self.render_day(day, day_blocks, by_id))
+        return timetable
+
+    def render_day(self, day, blocks, tasks_by_id):
+        sessions = []
+        blocks = sorted(blocks, key=lambda b: b.start)
+        for n, block in enumerate(blocks):
+            task = tasks_by_id[block.deadline_id]
+            session = {
+                "time": f"{block.start:%H:%M} - {block.end:%H:%M}",
+                "title": f"Study: {task.title}",
+                "description": f"Focus on {task.subject}, due {task.due_date:%a %d %b %H:%M}",
+                "duration": format_duration(int((block.end - block.start).total_seconds() // 60)),
+                "stress_level": task.priority,
+                "subject": task.subject,
+                "deadline_id": task.id
+            }
+            if block.id is not None:
+                session["block_id"] = block.id
+            sessions.append(session)
+            following = blocks[n + 1] if n + 1 < len(blocks) else None
+            if following and following.start > block.end:
+                gap = min(following.start - block.end, timedelta(minutes=self.break_slots * self.slot_minutes))
+                sessions.append({
+                    "time": f"{block.end:%H:%M} - {block.end + gap:%H:%M}",
+                    "title": "Break Time",
+                    "description": "Rest and refresh",
+                    "duration": format_duration(int(gap.total_seconds() // 60)),
+                    "stress_level": "low"
+                })
+        return {
+            "day_name": day.strftime("%A"),
+            "date": day.strftime("%Y-%m-%d"),
+            "sessions": sessions
+        }
+
+    def entries(self, connection, user_id, timetable, now=None):
+        # Validates a generated timetable as a whole and turns its study
+        # sessions into timetable_entries rows; breaks are not stored.
+        # Sessions that have already ended are dropped: past study blocks
+        # count as hours studied, so only apply's own earlier rows may say so
+        now = now or datetime.now()
+        entries = []
+        try:
+            for day in timetable["daily_schedule"]:
+                date = day["date"]
+                for session in day["sessions"]:
+                    if "Break" in session["title"]:
+                        continue
+                    start, end = session["time"].split(" - ")
+                    entry = {
+                        "start_time": datetime.fromisoformat(f"{date} {start}"),
+                        "end_time": datetime.fromisoformat(f"{date} {end}"),
+                        "title": session["title"],
+                        "subject": session.get("subject", "Study"),
+                        "description": session.get("description"),
+                        "duration": session.get("duration"),
+                        "priority": session.get("stress_level", "medium"),
+                        "deadline_id": session.get("deadline_id")
+                    }
+                    entries.append(entry)
+        except (KeyError, TypeError, ValueError) as e:
+            raise TimetableError(f"Invalid timetable: {e!r}")
+        for entry in entries:
+            if entry["end_time"] <= entry["start_time"]:
+                raise TimetableError(f"Session {entry['title']!r} at {entry['start_time']} ends before it starts")
+        entries = [entry for entry in entries if entry["end_time"] > now]
+
+        # Sessions from the sample plan carry negative ids and are stored
+        # without a deadline; any other id must be one of the user's deadlines.
+        # JSON true is not an id, though bool is an int subclass
+        is_id = lambda value: isinstance(value, int) and not isinstance(value, bool)
+        ids = {e["deadline_id"] for e in entries if is_id(e["deadline_id"]) and e["deadline_id"] > 0}
+        owned = {row[0] for row in connection.execute(OWNED_DEADLINES_SQL, {"user_id": user_id, "ids": list(ids)})} if ids else set()
+        for entry in entries:
+            deadline_id = entry["deadline_id"]
+            if is_id(deadline_id) and deadline_id in owned:
+                continue
+            if deadline_id is not None and not (is_id(deadline_id) and deadline_id < 0):
+                raise TimetableError(f"Unknown deadline {deadline_id!r}")
+            entry["deadline_id"] = None
+        return entries
+
+    def apply(self, connection, user_id, timetable, now=None):
+        # Replaces the future study blocks with the timetable's sessions.
+        # Rows identical to an incoming session stay as they are; blocks
+        # missing from it are deleted in one statement and new sessions are
+        # inserted in one executemany. Fixed entries and past sessions, which
+        # count as hours studied, are never touched.
+        now = now or datetime.now()
+        entries = self.entries(connection, user_id, timetable, now)
+        existing = {}
+        deletable = []
+        for row in connection.execute(CURRENT_ENTRIES_SQL, {"user_id": user_id, "now": now}):
+            if row[9] != 'study':
+                continue
+            key = (parse_datetime(row[1]), parse_datetime(row[2])) + tuple(row[3:9])
+            existing.setdefault(key, []).append(row[0])
+            deletable.append(row[0])
+
+        kept = set()
+        inserts = []
+        for entry in entries:
+            ids = existing.get(tuple(entry[field] for field in ENTRY_FIELDS))
+            if ids:
+                kept.add(ids.pop())
+            else:
+                inserts.append(dict(entry, user_id=user_id))
+        deletes = [entry_id for entry_id in deletable if entry_id not in kept]
+
+        if deletes:
+            connection.execute(DELETE_ENTRIES_SQL, {"ids": deletes})
+        if inserts:
+            connection.execute(INSERT_ENTRY_SQL, inserts)
+        return {"inserted": len(inserts), "deleted": len(deletes), "unchanged": len(kept)}
+
+    def plan(self, tasks, busy=(), studied=None, now=None):
+        blocks, unscheduled = self.schedule(tasks, busy, studied, now)
+        return self.to_timetable(tasks, blocks, unscheduled)
+
+# Global scheduler
+timetable_scheduler = TimetableScheduler()
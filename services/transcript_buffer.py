@@ -0,0 +1,69 @@
+from datetime import datetime
+
+class TranscriptSegment:
+    __slots__ = ('text', 'timestamp', 'speaker')
+
+    def __init__(self, text, timestamp, speaker=None):
+        self.text = text
+        self.timestamp = timestamp
+        self.speaker = speaker
+
+    def formatted(self):
+        if self.speaker is None:
+            return self.text
+        return f"[Speaker {self.speaker}] {self.text}"
+
+class TranscriptBuffer:
+    # Append-only list of final transcript segments. Appending is amortized
+    # O(1); the full text is joined on demand and cached until the next append,
+    # so a lecture is materialized once at stop time instead of being copied on
+    # every result the way `transcript += ...` did.
+    def __init__(self, max_chars=None):
+        self.max_chars = max_chars
+        self.segments = []
+        self.char_count = 0
+        self.word_count = 0
+        self.speakers = {}
+        self.truncated = False
+        self._text = None
+        self._text_segments = 0
+
+    def append(self, text, speaker=None, timestamp=None):
+        text = text.strip()
+        if not text:
+            return None
+        if self.max_chars is not None and self.char_count + len(text) + 1 > self.max_chars:
+            self.truncated = True
+            return None
+
+        segment = TranscriptSegment(text, timestamp or datetime.now(), speaker)
+        self.segments.append(segment)
+        self.char_count += len(text) + 1
+        self.word_count += text.count(' ') + 1
+        if speaker is not None:
+            self.speakers[speaker] = self.speakers.get(speaker, 0) + 1
+        return segment
+
+    def iter_segments(self, start=0):
+        # Index-based so segments appended while a consumer is iterating are
+        # still picked up, which lets the notes engine follow a live stream
+        index = start
+        while index < len(self.segments):
+            yield self.segments[index]
+            index += 1
+
+    def iter_text(self, start=0, with_speakers=True):
+        for segment in self.iter_segments(start):
+            yield segment.formatted() if with_speakers else segment.text
+
+    def text(self):
+        if self._text is None or self._text_segments != len(self.segments):
+            self._text = ' '.join(self.iter_text())
+            self._text_segments = len(self.segments)
+        return self._text
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __bool__(self):
+        return bool(self.segments)
@@ -5,22 +5,24 @@ import os
 from deepgram import DeepgramClientClient
 from flask_socketio import SocketIO, emit
 from database.db import db, Note
+from services.transcript_buffer import TranscriptBuffer
 from sqlalchemy import text
 from datetime import datetime
 
 class DeepgramTranscriptionService:
-    def __init__(self, api_key):
+    def __init__(self, api_key, coalescer=None):
         self.dg_client = DeepgramClient(api_key)
         self.live_transcription = None
         self.transcript_buffer = []
         self.current_session = None
+        self.coalescer = coalescer
         
-    async def start_transcription(self, user_id, language='en-US'):
+    async def start_transcription(self, user_id, language='en-US', sid=None):
         self.current_session = {
             'user_id': user_id,
+            'sid': sid,
             'start_time': datetime.now(),
-            'transcript': '',
-            'speakers': {}
+            'transcript': TranscriptBuffer()
         }
         
         try:
@@ -53,33 +55,38 @@ class DeepgramTranscriptionService:
         
         if result.is_final:
             # Handle speaker diarization
-            speaker_info = ""
-            speaker = 0
+            speaker = None
             if result.channel.alternatives[0].words:
                 words = result.channel.alternatives[0].words
                 if len(words) > 0 and hasattr(words[0], 'speaker'):
                     speaker = words[0].speaker
-                    speaker_info = f"[Speaker {speaker}] "
-                    self.current_session['speakers'][speaker] = self.current_session['speakers'].get(speaker, 0) + 1
             
-            formatted_transcript = f"{speaker_info}{sentence}"
-            self.current_session['transcript'] += formatted_transcript + " "
+            segment = self.current_session['transcript'].append(sentence, speaker=speaker)
+            if segment is None:
+                return
             
             # Emit to frontend
-            emit('transcript_update', {
-                'transcript': formatted_transcript,
+            self.send_update({
+                'transcript': segment.formatted(),
                 'is_final': True,
-                'speaker': speaker,
+                'speaker': speaker if speaker is not None else 0,
                 'confidence': result.channel.alternatives[0].confidence
             })
         else:
             # Interim results
-            emit('transcript_update', {
+            self.send_update({
                 'transcript': sentence,
                 'is_final': False,
                 'confidence': result.channel.alternatives[0].confidence
             })
     
+    def send_update(self, update):
+        sid = self.current_session.get('sid')
+        if self.coalescer and sid:
+            self.coalescer.submit(sid, 'transcript_update', update, update['is_final'])
+        else:
+            emit('transcript_update', update)
+    
     async def send_audio(self, audio_data):
         if self.live_transcription:
             self.live_transcription.send(bytes(audio_data))
@@ -91,9 +98,11 @@ class DeepgramTranscriptionService:
         return None
     
     def save_transcript(self):
-        if not self.current_session or not self.current_session['transcript'].strip():
+        if not self.current_session or not self.current_session['transcript']:
             return None
         
+        transcript = self.current_session['transcript']
+        
         try:
             # Save to database
             db.session.execute(
@@ -104,18 +113,18 @@ class DeepgramTranscriptionService:
                 {
                     'user_id': self.current_session['user_id'],
                     'title': f"Live Transcript - {self.current_session['start_time'].strftime('%Y-%m-%d %H:%M')}",
-                    'content': self.current_session['transcript'],
+                    'content': transcript.text(),
                     'subject': 'Live Transcription',
                     'transcript_data': json.dumps({
-                        'speakers': self.current_session['speakers'],
+                        'speakers': transcript.speakers,
                         'duration': str(datetime.now() - self.current_session['start_time']),
-                        'word_count': len(self.current_session['transcript'].split())
+                        'word_count': transcript.word_count
                     }),
                     'created_at': datetime.now()
                 }
             )
             db.session.commit()
-            return self.current_session['transcript']
+            return transcript.text()
         except Exception as e:
             print(f"Error saving transcript: {e}")
             db.session.rollback()
@@ -124,7 +133,7 @@ class DeepgramTranscriptionService:
 # Global transcription service instance
 transcription_service = None
 
-def init_transcription_service(api_key):
+def init_transcription_service(api_key, coalescer=None):
     global transcription_service
-    transcription_service = DeepgramTranscriptionService(api_key)
+    transcription_service = DeepgramTranscriptionService(api_key, coalescer)
     return transcription_service
\ No newline at end of file
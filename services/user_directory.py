@@ -0,0 +1,81 @@
+import re
+from sqlalchemy import text
+from database.db import db
+from services.keyset import decode_cursor, encode_cursor, position_sql
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SORTS = {'newest': ('<', 'DESC'), 'oldest': ('>', 'ASC')}
+ROLES = ('student', 'ta', 'admin')
+
+USER_COLUMNS = "u.id, u.name, u.email, u.role, u.is_active, u.created_at, {position} AS position"
+FTS_MATCH = "u.id IN (SELECT rowid FROM users_fts WHERE users_fts MATCH :match)"
+LIKE_MATCH = "(lower(u.name) LIKE :like OR lower(u.email) LIKE :like)"
+
+def search_terms(query):
+    # Words of the query, each matched as a prefix: "ann smi" finds
+    # "Anna Smith" and "ann@smith.edu"
+    return re.findall(r'\w+', query.lower())
+
+class UserDirectory:
+    # Pages through users for the admin directory in (created_at, id) order.
+    # Each page continues strictly after the previous page's last row, so a
+    # page costs the same at any depth and rows never repeat or go missing
+    # when users sign up mid-scroll. Name and email prefix search uses the
+    # users_fts index on SQLite and LIKE elsewhere.
+    def page(self, query=None, role=None, status=None, sort='newest', cursor=None, limit=PAGE_SIZE, connection=None):
+        connection = connection or db.session.connection()
+        op, direction = SORTS.get(sort, SORTS['newest'])
+        position = position_sql('u.created_at', connection.dialect)
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        where = []
+        params = {'limit': limit + 1}
+
+        if role in ROLES:
+            where.append("u.role = :role")
+            params['role'] = role
+        if status in ('active', 'inactive'):
+            where.append("u.is_active = :is_active")
+            params['is_active'] = status == 'active'
+        terms = search_terms(query or '')
+        if terms:
+            if connection.dialect.name == 'sqlite':
+                where.append(FTS_MATCH)
+                params['match'] = ' '.join(f'"{term}"*' for term in terms)
+            else:
+                for n, term in enumerate(terms):
+                    where.append(LIKE_MATCH.replace(':like', f':like{n}'))
+                    params[f'like{n}'] = f'{term}%'
+        if cursor:
+            after, user_id = decode_cursor(cursor, connection.dialect)
+            where.append(f"{position} {op}= :position AND ({position}, u.id) {op} (:position, :id)")
+            params.update(position=after, id=user_id)
+
+        sql = text(f"""
+            SELECT {USER_COLUMNS.format(position=position)} FROM users u
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY {position} {direction}, u.id {direction}
+            LIMIT :limit
+        """).columns(
+            db.column('id', db.Integer), db.column('name', db.String), db.column('email', db.String),
+            db.column('role', db.String), db.column('is_active', db.Boolean), db.column('created_at', db.DateTime),
+            db.column('position', db.String if connection.dialect.name == 'sqlite' else db.DateTime)
+        )
+        rows = connection.execute(sql, params).fetchall()
+
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'users': [{
+                'id': row.id,
+                'name': row.name,
+                'email': row.email,
+                'role': row.role,
+                'is_active': bool(row.is_active),
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            } for row in rows],
+            'next_cursor': encode_cursor(rows[-1].position, rows[-1].id) if more else None
+        }
+
+# Global directory
+user_directory = UserDirectory()
@@ -0,0 +1,66 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import run_migrations
+from services.timetable_scheduler import TimetableError, TimetableScheduler
+
+USER_ID = 1
+NOW = datetime(2026, 1, 5, 8, 0)
+
+class ApplyTimetableTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        run_migrations(self.engine)
+        self.scheduler = TimetableScheduler()
+        with self.engine.begin() as connection:
+            connection.execute(text("INSERT INTO users (id, email, password_hash, name, role) "
+                                    "VALUES (1, 'student@example.edu', 'x', 'Student', 'student')"))
+            connection.execute(text("INSERT INTO deadlines (id, user_id, title, subject, due_date, priority, study_hours) "
+                                    "VALUES (1, 1, 'Essay', 'History', :due, 'high', 5)"),
+                               {'due': NOW + timedelta(days=3)})
+
+    def studied(self, now):
+        with self.engine.connect() as connection:
+            return self.scheduler.load(connection, USER_ID, now)[2].get(1, 0)
+
+    def test_reapplying_after_a_session_ended_does_not_add_study(self):
+        with self.engine.begin() as connection:
+            tasks = self.scheduler.load(connection, USER_ID, NOW)[0]
+            timetable = self.scheduler.plan(tasks, now=NOW)
+            self.scheduler.apply(connection, USER_ID, timetable, now=NOW)
+        first = timetable["daily_schedule"][0]
+        date, end = first["date"], first["sessions"][0]["time"].split(" - ")[1]
+        later = datetime.fromisoformat(f"{date} {end}") + timedelta(minutes=1)
+        studied = self.studied(later)
+
+        with self.engine.begin() as connection:
+            result = self.scheduler.apply(connection, USER_ID, timetable, now=later)
+        self.assertEqual(result["inserted"], 0)
+        self.assertEqual(result["deleted"], 0)
+        self.assertEqual(self.studied(later), studied)
+
+    def test_made_up_past_sessions_are_not_stored(self):
+        day = NOW - timedelta(days=1)
+        timetable = {"daily_schedule": [{"date": f"{day:%Y-%m-%d}", "sessions": [
+            {"time": "10:00 - 12:00", "title": "Study: Essay", "subject": "History", "deadline_id": 1}
+        ]}]}
+        with self.engine.begin() as connection:
+            result = self.scheduler.apply(connection, USER_ID, timetable, now=NOW)
+        self.assertEqual(result["inserted"], 0)
+        self.assertEqual(self.studied(NOW), 0)
+
+    def test_boolean_deadline_id_is_rejected(self):
+        day = NOW + timedelta(days=1)
+        timetable = {"daily_schedule": [{"date": f"{day:%Y-%m-%d}", "sessions": [
+            {"time": "10:00 - 12:00", "title": "Study: Essay", "subject": "History", "deadline_id": True}
+        ]}]}
+        with self.engine.begin() as connection:
+            with self.assertRaises(TimetableError):
+                self.scheduler.apply(connection, USER_ID, timetable, now=NOW)
+
+if __name__ == "__main__":
+    unittest.main()